@@ -0,0 +1,147 @@
+import hashlib
+import json
+from datetime import date
+
+from flask import Response, jsonify, request
+from sqlalchemy import func
+
+from app import db
+from models import Car, CarTotals, Part, Rental
+from ledger import month_starts, monthly_totals, month_summary, expense_categories, \
+    SOURCE_RENTAL, SOURCE_PARTS, SOURCE_EXPENSE
+from kpi_cache import (kpi_cache, METRIC_ACTIVE_CARS, METRIC_ACTIVE_RENTALS, METRIC_TOTAL_PARTS,
+                       METRIC_MONTH_SUMMARY)
+from versioning import current_data_version
+
+# JSON API для графиков и опроса со страниц (/api/v1/...).
+# Каждый ответ получает сильный ETag из версии данных (растет при каждой
+# записи через маршруты), адреса с параметрами и сегодняшней даты (от нее
+# зависят текущий месяц и окно графиков). Если клиент прислал тот же ETag
+# в If-None-Match, отвечаем 304 без расчета данных - один запрос к базе.
+
+API_VERSION = 'v1'
+
+# Сколько месяцев отдает /api/v1/analytics/monthly по умолчанию и максимум
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 60
+
+
+def response_etag(version):
+    """ETag ответа: версия данных, адрес с параметрами и дата"""
+    key = json.dumps([API_VERSION, version, request.path, sorted(request.args.items(multi=True)),
+                      date.today().isoformat()], ensure_ascii=False)
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def conditional_json(build):
+    """Ответ JSON с ETag; при совпадении If-None-Match - 304 без вызова build().
+
+    Cache-Control: no-cache заставляет браузер проверять ETag при каждом
+    запросе, поэтому fetch() со страницы сам получает 304 и берет тело из кэша.
+    """
+    etag = response_etag(current_data_version())
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def dashboard_kpis(use_cache=True):
+    """Показатели главной страницы.
+
+    Страница берет их из кэша показателей, записи которого привязаны к
+    версии данных. API считает напрямую: ответ кэширует клиент по ETag.
+    """
+    version = current_data_version() if use_cache else None
+
+    def get(metric, compute, month=None):
+        return kpi_cache.get_or_compute(metric, compute, version, month=month) if use_cache else compute()
+
+    current_month = date.today().replace(day=1)
+    rental_income, parts_income, expenses = get(
+        METRIC_MONTH_SUMMARY, lambda: month_summary(current_month), month=current_month)
+    income = rental_income + parts_income
+    return {
+        'total_cars': get(METRIC_ACTIVE_CARS, lambda: Car.query.filter_by(status='active').count()),
+        'active_rentals': get(METRIC_ACTIVE_RENTALS, lambda: Rental.query.filter_by(status='active').count()),
+        'total_parts': get(METRIC_TOTAL_PARTS, lambda: db.session.query(func.sum(Part.quantity)).scalar() or 0),
+        'month': current_month.isoformat(),
+        'monthly_rental_income': rental_income,
+        'monthly_parts_income': parts_income,
+        'monthly_income': income,
+        'monthly_expenses': expenses,
+        'monthly_profit': income - expenses,
+    }
+
+
+def months_arg():
+    try:
+        count = int(request.args.get('months', DEFAULT_MONTHS))
+    except ValueError:
+        count = DEFAULT_MONTHS
+    return max(1, min(count, MAX_MONTHS))
+
+
+def monthly_series(count=DEFAULT_MONTHS):
+    """Доходы, расходы и прибыль по последним count месяцам из месячной свертки"""
+    month_list = month_starts(count)
+    totals = monthly_totals(month_list[0], month_list[-1])
+
+    series = {'months': [], 'rental_income': [], 'parts_income': [], 'income': [], 'expenses': [], 'profit': []}
+    for month in month_list:
+        month_totals = totals.get(month, {})
+        rental_income = month_totals.get(SOURCE_RENTAL, 0)
+        parts_income = month_totals.get(SOURCE_PARTS, 0)
+        expenses = month_totals.get(SOURCE_EXPENSE, 0)
+        series['months'].append(month.strftime('%Y-%m'))
+        series['rental_income'].append(rental_income)
+        series['parts_income'].append(parts_income)
+        series['income'].append(rental_income + parts_income)
+        series['expenses'].append(expenses)
+        series['profit'].append(rental_income + parts_income - expenses)
+    return series
+
+
+def expense_category_totals():
+    return [{'category': category, 'amount': amount or 0} for category, amount in expense_categories()]
+
+
+def car_summaries(car_id=None):
+    """Итоги по автомобилям из car_totals: один запрос на весь список"""
+    query = db.session.query(Car, CarTotals).outerjoin(CarTotals, CarTotals.car_id == Car.id).order_by(Car.id)
+    if car_id is not None:
+        query = query.filter(Car.id == car_id)
+
+    summaries = []
+    for car, totals in query:
+        expenses = totals.total_expenses if totals else 0
+        income = totals.total_income if totals else 0
+        summaries.append({
+            'id': car.id,
+            'brand': car.brand,
+            'model': car.model,
+            'year': car.year,
+            'status': car.status,
+            'purchase_price': car.purchase_price or 0,
+            'total_expenses': expenses,
+            'total_income': income,
+            'profit': income - expenses,
+            'rental_days': totals.rental_days if totals else 0,
+            'last_activity': totals.last_activity.isoformat() if totals and totals.last_activity else None,
+        })
+    return summaries
+
+
+def part_payload(part):
+    return {
+        'id': part.id,
+        'name': part.name,
+        'code': part.code,
+        'quantity': part.quantity or 0,
+        'price': part.price or 0,
+        'location': part.location,
+        'supplier': part.supplier.name if part.supplier else None,
+    }
@@ -1,49 +1,194 @@
+import importlib
 import os
 import logging
+import sqlite3
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-from flask_migrate import Migrate
 from dotenv import load_dotenv
+from money import MoneyJSONProvider
+from replica import REPLICA_BIND, RoutingSession
 
 # Загружаем настройки из .env
 load_dotenv()
 
-# Настройка логирования для отладки
-logging.basicConfig(level=logging.DEBUG)
-
 class Base(DeclarativeBase):
     pass
 
-# Создание экземпляра базы данных
-db = SQLAlchemy(model_class=Base)
+# Создание экземпляра базы данных (с приложением связывается в create_app).
+# Сессия выбирает базу для каждого запроса к ней: основную или реплику (replica.py)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
+
+# Модули с функцией init_app(app): обработчики запросов, команды CLI и
+# настройка общих объектов процесса (см. create_app)
+APP_MODULES = (
+    "query_budget", "instrumentation", "pagination", "replica", "availability", "kpi_cache", "reports",
+    "jobs", "ledger", "car_totals", "search", "parts_import",
+)
+
+
+def configure(app):
+    """Настройки приложения из переменных окружения"""
+    # Настройка базы данных (берём из .env)
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///autobusiness.db")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+    # Как часто индекс занятости автомобилей перечитывается из базы (секунды)
+    app.config["AVAILABILITY_REFRESH_SECONDS"] = int(os.environ.get("AVAILABILITY_REFRESH_SECONDS", 60))
+
+    # Фоновое построение PDF-отчетов: каталог кэша, число потоков, срок хранения файлов
+    app.config["REPORTS_DIR"] = os.environ.get("REPORTS_DIR", os.path.join(app.instance_path, "reports"))
+    app.config["REPORT_WORKERS"] = int(os.environ.get("REPORT_WORKERS", 2))
+    app.config["REPORT_CACHE_MAX_AGE_DAYS"] = int(os.environ.get("REPORT_CACHE_MAX_AGE_DAYS", 7))
+
+    # Кэш показателей дашборда: время жизни записи, размер LRU в памяти процесса,
+    # адрес общего кэша (redis://...), если воркеров несколько
+    app.config["KPI_CACHE_TTL"] = int(os.environ.get("KPI_CACHE_TTL", 300))
+    app.config["KPI_CACHE_MAX_ENTRIES"] = int(os.environ.get("KPI_CACHE_MAX_ENTRIES", 256))
+    app.config["KPI_CACHE_URL"] = os.environ.get("KPI_CACHE_URL", "")
+
+    # Пакетный импорт запчастей: строк в одной транзакции
+    app.config["IMPORT_BATCH_SIZE"] = int(os.environ.get("IMPORT_BATCH_SIZE", 500))
+
+    # Сколько секунд держится резерв запчасти, пока оформляется продажа
+    app.config["STOCK_HOLD_SECONDS"] = int(os.environ.get("STOCK_HOLD_SECONDS", 120))
+
+    # Пул соединений: у каждого процесса столько соединений, сколько потоков
+    # обслуживают запросы (WEB_THREADS, см. gunicorn.conf.py), плюс потоки отчетов.
+    # Всего к базе открыто до WEB_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # соединений - для PostgreSQL это число должно помещаться в max_connections
+    app.config["WEB_THREADS"] = int(os.environ.get("WEB_THREADS", 4))
+    app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", app.config["WEB_THREADS"] + app.config["REPORT_WORKERS"]))
+    app.config["DB_MAX_OVERFLOW"] = int(os.environ.get("DB_MAX_OVERFLOW", 2))
+    app.config["DB_POOL_TIMEOUT"] = int(os.environ.get("DB_POOL_TIMEOUT", 10))
+
+    # Реплика для чтения (replica.py): аналитика, выгрузки и API читают из нее,
+    # запись остается в основной базе. Пул у реплики свой. После записи клиент
+    # REPLICA_STALENESS_SECONDS читает из основной базы, пока реплика догоняет
+    app.config["DATABASE_REPLICA_URL"] = os.environ.get("DATABASE_REPLICA_URL", "")
+    app.config["REPLICA_POOL_SIZE"] = int(os.environ.get("REPLICA_POOL_SIZE", app.config["DB_POOL_SIZE"]))
+    app.config["REPLICA_MAX_OVERFLOW"] = int(os.environ.get("REPLICA_MAX_OVERFLOW", app.config["DB_MAX_OVERFLOW"]))
+    app.config["REPLICA_STALENESS_SECONDS"] = int(os.environ.get("REPLICA_STALENESS_SECONDS", 10))
+
+    # SQLite: журнал WAL (чтение не ждет записи) и ожидание блокировки вместо
+    # немедленной ошибки "database is locked" при параллельной записи
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+    # Профилирование запросов (instrumentation.py): метрики на /metrics и журнал
+    # медленных запросов. METRICS_TOKEN закрывает их токеном (Authorization: Bearer ...)
+    app.config["INSTRUMENTATION_ENABLED"] = os.environ.get("INSTRUMENTATION_ENABLED", "0") == "1"
+    app.config["SLOW_REQUEST_MS"] = int(os.environ.get("SLOW_REQUEST_MS", 500))
+    app.config["SLOW_REQUEST_LOG_SIZE"] = int(os.environ.get("SLOW_REQUEST_LOG_SIZE", 100))
+    app.config["SLOW_STATEMENTS_SHOWN"] = int(os.environ.get("SLOW_STATEMENTS_SHOWN", 5))
+    app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
+
+    # Фоновые задания (jobs.py): завершение просроченных аренд, статусы
+    # автомобилей, остатки к оплате. JOBS_ENABLED=0 отключает поток в процессах
+    # приложения - тогда задания запускает `flask run-jobs`
+    app.config["JOBS_ENABLED"] = os.environ.get("JOBS_ENABLED", "1") == "1"
+    app.config["JOBS_INTERVAL_SECONDS"] = int(os.environ.get("JOBS_INTERVAL_SECONDS", 300))
+    app.config["JOB_BATCH_SIZE"] = int(os.environ.get("JOB_BATCH_SIZE", 1000))
+
+
+def pool_options(url, pool_size, max_overflow, pool_timeout):
+    """Настройки пула соединений для базы по адресу url"""
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "sqlite" and database_url.database in (None, "", ":memory:"):
+        # База в памяти SQLite живет в одном соединении, пул для нее не настраивается
+        return {}
+    return {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout}
+
+
+def configure_pool(app):
+    """Пулы соединений основной базы (DB_POOL_*) и реплики (REPLICA_*)"""
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update(pool_options(
+        app.config["SQLALCHEMY_DATABASE_URI"], app.config["DB_POOL_SIZE"],
+        app.config["DB_MAX_OVERFLOW"], app.config["DB_POOL_TIMEOUT"]))
+
+    replica_url = app.config["DATABASE_REPLICA_URL"]
+    if replica_url:
+        # Общие настройки SQLALCHEMY_ENGINE_OPTIONS на дополнительные bind не действуют
+        app.config["SQLALCHEMY_BINDS"] = {REPLICA_BIND: {
+            "url": replica_url,
+            "pool_recycle": 300,
+            "pool_pre_ping": True,
+            **pool_options(replica_url, app.config["REPLICA_POOL_SIZE"],
+                           app.config["REPLICA_MAX_OVERFLOW"], app.config["DB_POOL_TIMEOUT"]),
+        }}
+
+
+def configure_sqlite(engine, busy_timeout_ms, read_only=False):
+    """Режим журнала и ожидание блокировки для каждого нового соединения SQLite.
+
+    read_only - соединения реплики: случайная запись в нее завершится ошибкой,
+    а не разойдется с основной базой.
+    """
+    @event.listens_for(engine, "connect")
+    def configure_sqlite_connection(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def create_app(config=None):
+    """Создает приложение: настройки, база, модули (blueprints), обработчики и команды CLI.
+
+    config - настройки поверх переменных окружения (бенчмарки, проверки).
+    Тяжелые библиотеки (ReportLab, NumPy, Alembic) здесь не загружаются:
+    их импортируют только те функции, которым они нужны.
+    """
+    # Настройка логирования: в работе INFO, для отладки LOG_LEVEL=DEBUG
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+
+    app = Flask(__name__)
+
+    # Денежные суммы (Decimal) отдаются в JSON числами
+    app.json = MoneyJSONProvider(app)
 
-# Создание приложения Flask
-app = Flask(__name__)
+    # Настройка секретного ключа для сессий
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 
-# Настройка секретного ключа для сессий
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+    # Middleware для обработки прокси (нужно для правильной генерации URL)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Middleware для обработки прокси (нужно для правильной генерации URL)
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    configure(app)
+    app.config.update(config or {})
+    configure_pool(app)
 
-# Настройка базы данных (берём из .env)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///autobusiness.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Инициализация базы данных с приложением
+    db.init_app(app)
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            configure_sqlite(engine, app.config["SQLITE_BUSY_TIMEOUT_MS"], read_only=bind_key == REPLICA_BIND)
 
-# Инициализация базы данных с приложением
-db.init_app(app)
+    # Миграции нужны только командам `flask db ...`: воркеры gunicorn не
+    # загружают Alembic
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        # При импорте Alembic пишет в INFO о каждом модуле автогенерации
+        logging.getLogger("alembic.runtime.plugins").setLevel(logging.WARNING)
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
-# Настройка миграций
-migrate = Migrate(app, db)
+    # Модели, модули приложения и общие объекты процесса (кэши, индекс
+    # занятости, очередь отчетов, поток заданий) с их обработчиками и командами
+    import models  # noqa
+    from views import register_blueprints
 
-# Импорт моделей
-import models  # noqa
+    for name in APP_MODULES:
+        importlib.import_module(name).init_app(app)
+    register_blueprints(app)
 
-# Импорт маршрутов
-import routes  # noqa
+    return app
@@ -0,0 +1,152 @@
+import threading
+import time
+from bisect import bisect_right, insort
+
+from sqlalchemy import exists, select, update
+
+from app import db
+from models import Car, Rental
+
+
+class CarSchedule:
+    """Активные аренды одного автомобиля, отсортированные по дате начала.
+
+    Рядом с концами интервалов хранится префиксный максимум, поэтому
+    проверка пересечения с периодом - один двоичный поиск.
+    """
+
+    def __init__(self):
+        self.intervals = []  # (start_date, end_date, rental_id)
+        self.starts = []
+        self.max_end = []
+
+    def reindex(self, position):
+        self.starts = [interval[0] for interval in self.intervals]
+        del self.max_end[position:]
+        current = self.max_end[-1] if self.max_end else None
+        for start, end, _ in self.intervals[position:]:
+            current = end if current is None or end > current else current
+            self.max_end.append(current)
+
+    def add(self, start, end, rental_id):
+        interval = (start, end, rental_id)
+        insort(self.intervals, interval)
+        self.reindex(self.intervals.index(interval))
+
+    def remove(self, rental_id):
+        for position, interval in enumerate(self.intervals):
+            if interval[2] == rental_id:
+                del self.intervals[position]
+                self.reindex(position)
+                return True
+        return False
+
+    def is_free(self, start, end):
+        """Нет ни одной аренды, пересекающейся с периодом [start, end]"""
+        count = bisect_right(self.starts, end)
+        return count == 0 or self.max_end[count - 1] < start
+
+
+class AvailabilityIndex:
+    """Индекс занятости автомобилей по активным арендам.
+
+    Строится из таблицы rentals и обновляется маршрутами add_rental и
+    complete_rental. Индекс живет в памяти процесса, поэтому периодически
+    перестраивается, чтобы подхватить изменения из других воркеров.
+    """
+
+    def __init__(self, refresh_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self.schedules = {}
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def rebuild(self):
+        rows = db.session.query(
+            Rental.car_id, Rental.start_date, Rental.end_date, Rental.id
+        ).filter(Rental.status == 'active').order_by(Rental.car_id, Rental.start_date).all()
+
+        schedules = {}
+        for car_id, start, end, rental_id in rows:
+            schedule = schedules.setdefault(car_id, CarSchedule())
+            schedule.intervals.append((start, end, rental_id))
+        for schedule in schedules.values():
+            schedule.intervals.sort()
+            schedule.reindex(0)
+
+        with self.lock:
+            self.schedules = schedules
+            self.loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Перестроить индекс при следующем обращении (аренды изменены вне маршрутов)"""
+        with self.lock:
+            self.loaded_at = None
+
+    def ensure_fresh(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_seconds:
+            self.rebuild()
+
+    def add(self, car_id, start, end, rental_id):
+        if self.loaded_at is None:
+            return
+        with self.lock:
+            self.schedules.setdefault(car_id, CarSchedule()).add(start, end, rental_id)
+
+    def remove(self, car_id, rental_id):
+        if self.loaded_at is None:
+            return
+        with self.lock:
+            schedule = self.schedules.get(car_id)
+            if schedule:
+                schedule.remove(rental_id)
+
+    def is_available(self, car_id, start, end):
+        self.ensure_fresh()
+        with self.lock:
+            schedule = self.schedules.get(car_id)
+            return schedule is None or schedule.is_free(start, end)
+
+    def free_cars(self, car_ids, start, end):
+        """Идентификаторы автомобилей из car_ids, свободных в период [start, end]"""
+        self.ensure_fresh()
+        with self.lock:
+            return [car_id for car_id in car_ids
+                    if car_id not in self.schedules or self.schedules[car_id].is_free(start, end)]
+
+
+def lock_car(car_id):
+    """Блокирует строку автомобиля до конца транзакции. Возвращает False, если автомобиля нет.
+
+    PostgreSQL: SELECT ... FOR UPDATE. SQLite блокирует всю базу при первой
+    записи, поэтому транзакция начинается с пустого UPDATE - иначе две
+    транзакции успеют прочитать таблицу аренд до того, как одна из них
+    запишет новую аренду.
+    """
+    cars = Car.__table__
+    if db.session.get_bind().dialect.name == 'postgresql':
+        row = db.session.execute(select(cars.c.id).where(cars.c.id == car_id).with_for_update()).first()
+        return row is not None
+    return db.session.execute(update(cars).where(cars.c.id == car_id).values(status=cars.c.status)).rowcount > 0
+
+
+def rental_overlaps(car_id, start, end):
+    """Есть активная аренда автомобиля, пересекающаяся с периодом [start, end].
+
+    Один запрос по индексу (car_id, status, start_date, end_date). Индекс
+    занятости в памяти воркера может отставать от других процессов, поэтому
+    перед созданием аренды пересечение проверяется в базе.
+    """
+    return db.session.query(exists().where(
+        Rental.car_id == car_id, Rental.status == 'active',
+        Rental.start_date <= end, Rental.end_date >= start
+    )).scalar()
+
+
+availability_index = AvailabilityIndex()
+
+
+def init_app(app):
+    availability_index.refresh_seconds = app.config['AVAILABILITY_REFRESH_SECONDS']
+    # Индекс строится заново из базы нового приложения
+    availability_index.invalidate()
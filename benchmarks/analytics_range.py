@@ -0,0 +1,85 @@
+"""Ряды доходов и расходов за длинный период: число запросов и время.
+
+Для каждого шага (день, неделя, месяц, квартал, год) строит ряд за
+указанное число лет через timeseries.range_series (дни и недели - из
+исходных таблиц, месяцы и крупнее - из monthly_ledger) и сравнивает с
+наивным вариантом - отдельным запросом на каждый интервал и источник.
+Суммы обоих вариантов должны совпасть, поэтому свертка должна быть
+пересчитана (benchmarks.seed делает это сам).
+
+Запуск:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --cars 500 --years 5 --drop
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.analytics_range --years 5
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+
+from app import create_app, db
+from timeseries import GRANULARITIES, SOURCES, bucket_starts, next_bucket, range_series
+
+app = create_app()
+
+query_count = 0
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    global query_count
+    query_count += 1
+
+
+def naive_series(start, end, granularity):
+    """Запрос на каждый интервал и источник - так графики строились раньше"""
+    income = []
+    expenses = []
+    for bucket in bucket_starts(start, end, granularity):
+        bucket_end = min(next_bucket(bucket, granularity) - timedelta(days=1), end)
+        bucket_begin = max(bucket, start)
+        totals = {}
+        for name, date_column, amount_column in SOURCES:
+            totals[name] = db.session.query(func.coalesce(func.sum(amount_column), 0)).filter(
+                date_column >= bucket_begin, date_column <= bucket_end
+            ).scalar()
+        income.append(totals['rental_income'] + totals['parts_income'])
+        expenses.append(totals['expenses'])
+    return income, expenses
+
+
+def measure(build):
+    global query_count
+    query_count = 0
+    started = time.perf_counter()
+    result = build()
+    return result, query_count, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ряды доходов и расходов: сгруппированные запросы против запроса на интервал')
+    parser.add_argument('--years', type=int, default=5, help='длина периода в годах')
+    parser.add_argument('--skip-naive', action='store_true', help='не запускать наивный вариант')
+    args = parser.parse_args()
+
+    end = date.today()
+    start = end - timedelta(days=365 * args.years)
+
+    print(f'Период {start} - {end}')
+    print(f'{"шаг":<9} {"точек":>6} {"запросов":>9} {"мс":>9} {"наивно запросов":>16} {"наивно мс":>10}')
+    with app.app_context():
+        for granularity in GRANULARITIES:
+            series, queries, elapsed = measure(lambda: range_series(start, end, granularity))
+            line = f'{granularity:<9} {len(series["buckets"]):>6} {queries:>9} {elapsed:>9.1f}'
+            if not args.skip_naive:
+                (income, expenses), naive_queries, naive_elapsed = measure(
+                    lambda: naive_series(start, end, granularity))
+                if income + expenses != series['income'] + series['expenses']:
+                    raise SystemExit(f'{granularity}: суммы не совпадают с наивным вариантом')
+                line += f' {naive_queries:>16} {naive_elapsed:>10.1f}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,523 @@
+"""Замер всех маршрутов приложения через тестовый клиент Flask.
+
+Для каждого маршрута приложения (views/) есть сценарий запроса (см. SCENARIOS);
+маршрут без сценария - ошибка, так что новые страницы не выпадают из
+замера. По каждому маршруту записываются задержки p50/p95/p99, число
+SQL-запросов на один запрос и пик памяти Python (tracemalloc, отдельным
+запросом - под трассировкой время не показательно).
+
+Результат сохраняется в JSON (--save) и сравнивается с сохраненным ранее
+(--compare): рост медианы задержки сверх допуска, рост числа запросов и памяти
+отмечаются как регрессии, код выхода при этом 1.
+
+Сценарии записи (добавление, продажа, импорт) меняют данные - запускайте
+на отдельной базе или с --skip-writes.
+
+Запуск:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --cars 500 --drop
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.endpoints --save baseline.json
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.endpoints --compare baseline.json
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta
+
+from flask import has_request_context
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+
+from app import create_app, db
+from models import Car, Client, DisassemblyRecord, Part, Rental, Supplier
+from benchmarks.load_test import percentile
+from reports import report_pipeline
+
+# Фоновые задания меняли бы данные посреди замера
+app = create_app({'JOBS_ENABLED': False})
+
+# Маршруты, которые не относятся к views/
+SKIPPED_ENDPOINTS = {'static'}
+
+# Сколько ждать готовности PDF для сценария скачивания, секунд
+REPORT_READY_TIMEOUT = 60
+
+# Допуски сравнения с базовым замером: относительный рост и минимальная
+# разница в миллисекундах, меньше которой колебания задержки не считаются
+LATENCY_TOLERANCE = 0.3
+MEMORY_TOLERANCE = 0.25
+MIN_LATENCY_DELTA_MS = 2.0
+
+SCENARIOS = {}
+
+query_count = 0
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    # Запросы фоновых потоков (построение отчетов) к замеру не относятся
+    global query_count
+    if has_request_context():
+        query_count += 1
+
+
+def scenario(endpoint, write=False, expect=(200, 302)):
+    """Регистрирует сценарий маршрута.
+
+    Функция сценария получает тестовый клиент, образцы данных и номер
+    повтора и возвращает (метод, адрес, параметры запроса). Подготовка
+    внутри нее (например, резерв перед снятием) в замер не входит.
+    """
+    def decorator(build):
+        SCENARIOS[endpoint] = {'build': build, 'write': write, 'expect': expect}
+        return build
+    return decorator
+
+
+def today():
+    return date.today().isoformat()
+
+
+def period():
+    end = date.today()
+    return {'start_date': (end - timedelta(days=365)).isoformat(), 'end_date': end.isoformat()}
+
+
+def unique(prefix):
+    return f'{prefix}-{uuid.uuid4().hex[:10]}'
+
+
+def pick(items, number):
+    return items[number % len(items)]
+
+
+# Чтение
+
+@scenario('dashboard.index')
+def index_page(client, sample, number):
+    return 'GET', '/', {}
+
+
+@scenario('garage.garage')
+def garage_page(client, sample, number):
+    return 'GET', '/garage', {}
+
+
+@scenario('garage.car_detail')
+def car_detail_page(client, sample, number):
+    return 'GET', f'/garage/car/{pick(sample["cars"], number)}', {}
+
+
+@scenario('rent.rent')
+def rent_page(client, sample, number):
+    return 'GET', '/rent', {}
+
+
+@scenario('disassembly.disassembly')
+def disassembly_page(client, sample, number):
+    return 'GET', '/disassembly', {}
+
+
+@scenario('parts.parts')
+def parts_page(client, sample, number):
+    return 'GET', '/parts', {'query_string': {'search': 'фильтр'} if number % 2 else {}}
+
+
+@scenario('analytics.analytics')
+def analytics_page(client, sample, number):
+    return 'GET', '/analytics', {}
+
+
+@scenario('analytics.export_pdf')
+def export_pdf_page(client, sample, number):
+    return 'GET', '/analytics/export_pdf', {}
+
+
+@scenario('analytics.report_status')
+def report_status_api(client, sample, number):
+    return 'GET', f'/analytics/reports/{sample["report_key"]}', {}
+
+
+@scenario('analytics.download_report')
+def download_report_page(client, sample, number):
+    return 'GET', f'/analytics/reports/{sample["report_key"]}/download', {}
+
+
+@scenario('analytics.export_data')
+def export_data_stream(client, sample, number):
+    fmt = 'jsonl' if number % 2 else 'csv'
+    return 'GET', '/export/expenses', {'query_string': dict(period(), format=fmt)}
+
+
+@scenario('api.available_cars')
+def available_cars_api(client, sample, number):
+    start = date.today() + timedelta(days=number % 30)
+    return 'GET', '/api/available_cars', {
+        'query_string': {'start_date': start.isoformat(), 'end_date': (start + timedelta(days=7)).isoformat()}}
+
+
+@scenario('api.car_availability')
+def car_availability_api(client, sample, number):
+    return 'GET', f'/api/car_availability/{pick(sample["cars"], number)}', {'query_string': {
+        'start_date': today(), 'end_date': (date.today() + timedelta(days=7)).isoformat()}}
+
+
+@scenario('api.api_dashboard')
+def dashboard_api(client, sample, number):
+    return 'GET', '/api/v1/dashboard', {}
+
+
+@scenario('api.api_monthly')
+def monthly_api(client, sample, number):
+    return 'GET', '/api/v1/analytics/monthly', {'query_string': {'months': 24}}
+
+
+@scenario('api.api_series')
+def series_api(client, sample, number):
+    return 'GET', '/api/v1/analytics/series', {'query_string': dict(period(), granularity='day')}
+
+
+@scenario('api.api_expense_categories')
+def expense_categories_api(client, sample, number):
+    return 'GET', '/api/v1/analytics/expense-categories', {}
+
+
+@scenario('api.api_utilization')
+def utilization_api(client, sample, number):
+    return 'GET', '/api/v1/utilization', {'query_string': dict(period(), granularity='week')}
+
+
+@scenario('api.api_utilization_cars')
+def utilization_cars_api(client, sample, number):
+    return 'GET', '/api/v1/utilization/cars', {'query_string': dict(period(), limit=20)}
+
+
+@scenario('api.api_cars')
+def cars_api(client, sample, number):
+    return 'GET', '/api/v1/cars', {}
+
+
+@scenario('api.api_car')
+def car_api(client, sample, number):
+    return 'GET', f'/api/v1/cars/{pick(sample["cars"], number)}', {}
+
+
+@scenario('api.api_parts')
+def parts_api(client, sample, number):
+    return 'GET', '/api/v1/parts', {'query_string': {'search': 'фара'} if number % 2 else {}}
+
+
+# Без INSTRUMENTATION_ENABLED=1 метрики отвечают 404 - замеряется и это
+@scenario('metrics.metrics', expect=(200, 404))
+def metrics_page(client, sample, number):
+    return 'GET', '/metrics', {}
+
+
+@scenario('metrics.slow_requests', expect=(200, 404))
+def slow_requests_page(client, sample, number):
+    return 'GET', '/metrics/slow', {}
+
+
+# Запись
+
+@scenario('garage.add_car', write=True)
+def add_car_form(client, sample, number):
+    return 'POST', '/garage/add_car', {'data': {
+        'brand': 'Bench', 'model': unique('M'), 'year': 2020, 'purchase_price': '850000'}}
+
+
+@scenario('garage.add_expense', write=True)
+def add_expense_form(client, sample, number):
+    return 'POST', '/garage/add_expense', {'data': {
+        'car_id': pick(sample['cars'], number), 'date': today(), 'amount': '1234.50', 'category': 'ремонт'}}
+
+
+@scenario('rent.add_client', write=True)
+def add_client_form(client, sample, number):
+    return 'POST', '/rent/add_client', {'data': {'name': unique('Клиент'), 'phone': '+79000000000'}}
+
+
+@scenario('rent.add_rental', write=True)
+def add_rental_form(client, sample, number):
+    start = date.today() + timedelta(days=400 + number * 10)
+    return 'POST', '/rent/add_rental', {'data': {
+        'car_id': pick(sample['cars'], number), 'client_id': sample['client'],
+        'start_date': start.isoformat(), 'end_date': (start + timedelta(days=3)).isoformat(),
+        'daily_rate': '2500'}}
+
+
+@scenario('rent.add_payment', write=True)
+def add_payment_form(client, sample, number):
+    return 'POST', '/rent/add_payment', {'data': {
+        'rental_id': pick(sample['rentals'], number), 'amount': '1500', 'payment_date': today()}}
+
+
+@scenario('rent.complete_rental', write=True)
+def complete_rental_page(client, sample, number):
+    return 'GET', f'/rent/complete/{pick(sample["rentals"], number)}', {}
+
+
+@scenario('disassembly.add_disassembly_record', write=True)
+def add_disassembly_record_form(client, sample, number):
+    return 'POST', '/disassembly/add_record', {'data': {
+        'car_brand': 'Lada', 'car_model': 'Vesta', 'car_year': 2015, 'disassembly_date': today()}}
+
+
+@scenario('disassembly.add_part_from_disassembly', write=True)
+def add_part_from_disassembly_form(client, sample, number):
+    return 'POST', '/disassembly/add_part', {'data': {
+        'name': 'Фара', 'code': unique('D'), 'quantity': 5, 'price': '3000',
+        'disassembly_record_id': sample['record']}}
+
+
+@scenario('parts.add_supplier', write=True)
+def add_supplier_form(client, sample, number):
+    return 'POST', '/parts/add_supplier', {'data': {'name': unique('Поставщик')}}
+
+
+@scenario('parts.add_part', write=True)
+def add_part_form(client, sample, number):
+    return 'POST', '/parts/add_part', {'data': {
+        'name': 'Генератор', 'code': unique('P'), 'quantity': 5, 'price': '12000',
+        'supplier_id': sample['supplier']}}
+
+
+@scenario('parts.import_parts_file', write=True)
+def import_parts_upload(client, sample, number):
+    prefix = unique('I')
+    lines = ['name;code;quantity;price'] + [f'Фильтр {line};{prefix}-{line};4;350,50' for line in range(100)]
+    upload = io.BytesIO('\n'.join(lines).encode('utf-8'))
+    return 'POST', '/parts/import', {'data': {'file': (upload, 'parts.csv'), 'supplier_id': sample['supplier']}}
+
+
+@scenario('parts.sell_part', write=True)
+def sell_part_form(client, sample, number):
+    return 'POST', '/parts/sale', {'data': {
+        'part_id': pick(sample['parts'], number), 'quantity_sold': 1, 'sale_price': '500',
+        'sale_date': today()}}
+
+
+@scenario('parts.create_sales_order', write=True)
+def sales_order_form(client, sample, number):
+    part_ids = [pick(sample['parts'], number * 3 + line) for line in range(3)]
+    return 'POST', '/parts/order', {'data': {
+        'part_id': part_ids, 'quantity': [1] * 3, 'price': ['500'] * 3, 'sale_date': today()}}
+
+
+@scenario('api.hold_part', write=True)
+def hold_part_api(client, sample, number):
+    return 'POST', f'/api/parts/{pick(sample["parts"], number)}/hold', {'data': {'quantity': 1}}
+
+
+@scenario('api.release_part_hold', write=True)
+def release_part_hold_api(client, sample, number):
+    hold = client.post(f'/api/parts/{pick(sample["parts"], number)}/hold', data={'quantity': 1}).get_json()
+    return 'POST', f'/api/parts/holds/{hold["token"]}/release', {}
+
+
+@scenario('analytics.request_report', write=True, expect=(200, 202))
+def request_report_api(client, sample, number):
+    return 'POST', '/analytics/reports', {'data': {'kind': 'dashboard'}}
+
+
+def load_sample():
+    """Образцы идентификаторов для адресов и форм"""
+    cars = [car_id for (car_id,) in db.session.query(Car.id).order_by(Car.id).limit(100)]
+    rentals = [rental_id for (rental_id,) in db.session.query(Rental.id)
+               .filter(Rental.status == 'active').order_by(Rental.id).limit(100)]
+    parts = [part_id for (part_id,) in db.session.query(Part.id)
+             .filter(Part.quantity >= 5).order_by(Part.quantity.desc(), Part.id).limit(500)]
+    sample = {
+        'cars': cars,
+        'rentals': rentals or [rental_id for (rental_id,) in db.session.query(Rental.id).limit(100)],
+        'parts': parts,
+        'client': db.session.query(func.min(Client.id)).scalar(),
+        'record': db.session.query(func.min(DisassemblyRecord.id)).scalar(),
+        'supplier': db.session.query(func.min(Supplier.id)).scalar(),
+    }
+    missing = [name for name, value in sample.items() if not value]
+    if missing:
+        raise SystemExit(f'В базе нет данных для сценариев ({", ".join(missing)}): заполните ее benchmarks.seed')
+    return sample
+
+
+def dataset_counts():
+    return {model.__tablename__: db.session.query(func.count()).select_from(model).scalar()
+            for model in (Car, Client, Rental, Part, Supplier, DisassemblyRecord)}
+
+
+def prepare_report(client, sample):
+    """Ключ готового PDF для сценариев состояния и скачивания"""
+    key = client.post('/analytics/reports', data={'kind': 'dashboard'}).get_json()['key']
+    deadline = time.time() + REPORT_READY_TIMEOUT
+    while report_pipeline.status(key)['status'] != 'ready':
+        if time.time() > deadline:
+            raise SystemExit(f'Отчет {key} не построен за {REPORT_READY_TIMEOUT} с')
+        time.sleep(0.2)
+    sample['report_key'] = key
+
+
+def request_once(client, spec, sample, number):
+    """Один запрос сценария: (код ответа, мс, SQL-запросов)"""
+    global query_count
+    method, path, options = spec['build'](client, sample, number)
+    query_count = 0
+    started = time.perf_counter()
+    response = client.open(path, method=method, **options)
+    response.get_data()
+    elapsed = (time.perf_counter() - started) * 1000
+    response.close()
+    return response.status_code, elapsed, query_count
+
+
+def measure(client, endpoint, spec, sample, iterations, warmup):
+    for number in range(warmup):
+        request_once(client, spec, sample, number)
+
+    # Как timeit: сборщик мусора на время замера выключен, иначе его паузы
+    # попадают в случайные запросы и шумят в p95/p99
+    timings, queries, errors = [], [], []
+    gc.collect()
+    gc.disable()
+    try:
+        for number in range(warmup, warmup + iterations):
+            status, elapsed, count = request_once(client, spec, sample, number)
+            if status not in spec['expect']:
+                errors.append(status)
+            timings.append(elapsed)
+            queries.append(count)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        request_once(client, spec, sample, warmup + iterations)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'requests': iterations,
+        'errors': len(errors),
+        'statuses': sorted(set(errors)),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': statistics.median_high(queries),
+        'max_queries': max(queries),
+        'peak_kb': round(peak / 1024),
+    }
+
+
+def run(iterations, warmup, skip_writes=False, only=None):
+    uncovered = sorted(set(app.view_functions) - set(SCENARIOS) - SKIPPED_ENDPOINTS)
+    if uncovered:
+        raise SystemExit(f'Нет сценария замера для маршрутов: {", ".join(uncovered)}')
+
+    # Чтение замеряется до записи, чтобы данные не менялись между повторами
+    endpoints = sorted(SCENARIOS, key=lambda name: (SCENARIOS[name]['write'], name))
+    if skip_writes:
+        endpoints = [name for name in endpoints if not SCENARIOS[name]['write']]
+    if only:
+        endpoints = [name for name in endpoints if name in only]
+
+    results = {}
+    with app.app_context():
+        sample = load_sample()
+        counts = dataset_counts()
+        database = db.engine.dialect.name
+    client = app.test_client()
+    prepare_report(client, sample)
+    for endpoint in endpoints:
+        results[endpoint] = measure(client, endpoint, SCENARIOS[endpoint], sample, iterations, warmup)
+        print(format_row(endpoint, results[endpoint]), flush=True)
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': database,
+            'iterations': iterations,
+            'dataset': counts,
+        },
+        'endpoints': results,
+    }
+
+
+def compare(current, baseline, latency_tolerance=LATENCY_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE,
+            min_delta_ms=MIN_LATENCY_DELTA_MS):
+    """Регрессии относительно базового замера: список (маршрут, показатель, было, стало)"""
+    regressions = []
+    for endpoint, result in current['endpoints'].items():
+        before = baseline['endpoints'].get(endpoint)
+        if before is None:
+            continue
+        # Задержка сравнивается по медиане: p95 из пары десятков запросов на
+        # общей машине колеблется в разы и записывается только для справки
+        if result['p50_ms'] > before['p50_ms'] * (1 + latency_tolerance) and \
+                result['p50_ms'] - before['p50_ms'] >= min_delta_ms:
+            regressions.append((endpoint, 'p50_ms', before['p50_ms'], result['p50_ms']))
+        # Число запросов не зависит от шума - любой рост считается регрессией
+        if result['queries'] > before['queries']:
+            regressions.append((endpoint, 'queries', before['queries'], result['queries']))
+        if result['peak_kb'] > before['peak_kb'] * (1 + memory_tolerance):
+            regressions.append((endpoint, 'peak_kb', before['peak_kb'], result['peak_kb']))
+        if result['errors'] > before['errors']:
+            regressions.append((endpoint, 'errors', before['errors'], result['errors']))
+    return regressions
+
+
+def format_row(endpoint, item):
+    errors = f"{item['errors']} {item['statuses']}" if item['errors'] else '0'
+    return (f"{endpoint:<38} {item['p50_ms']:>8} {item['p95_ms']:>8} {item['p99_ms']:>8} "
+            f"{item['queries']:>8} {item['peak_kb']:>9} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Задержка, SQL-запросы и память всех маршрутов приложения')
+    parser.add_argument('--iterations', type=int, default=20, help='замеряемых запросов на маршрут')
+    parser.add_argument('--warmup', type=int, default=2, help='запросов прогрева на маршрут')
+    parser.add_argument('--skip-writes', action='store_true', help='только маршруты чтения (база не меняется)')
+    parser.add_argument('--only', nargs='+', metavar='ENDPOINT', help='замерить только указанные маршруты')
+    parser.add_argument('--save', help='сохранить результат в JSON-файл (новый базовый замер)')
+    parser.add_argument('--compare', help='сравнить с базовым замером из JSON-файла')
+    parser.add_argument('--latency-tolerance', type=float, default=LATENCY_TOLERANCE,
+                        help='допустимый относительный рост задержки')
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE,
+                        help='допустимый относительный рост пика памяти')
+    args = parser.parse_args()
+
+    print(f'{"маршрут":<38} {"p50, мс":>8} {"p95, мс":>8} {"p99, мс":>8} {"SQL":>8} {"память, КБ":>9} {"ошибок":>7}')
+    current = run(args.iterations, args.warmup, args.skip_writes, args.only)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('dataset') != current['meta']['dataset']:
+            print('Внимание: объем данных отличается от базового замера, сравнение приблизительное')
+        regressions = compare(current, baseline, args.latency_tolerance, args.memory_tolerance)
+        for endpoint, metric, before, after in regressions:
+            print(f'РЕГРЕССИЯ {endpoint}: {metric} {before} -> {after}')
+        if regressions:
+            sys.exit(1)
+        print('Регрессий относительно базового замера нет')
+
+    failed = sum(item['errors'] for item in current['endpoints'].values())
+    if failed:
+        sys.exit(f'Маршрутов с неожиданными ответами: '
+                 f'{sum(1 for item in current["endpoints"].values() if item["errors"])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Нагрузочный тест основных страниц: запросы в секунду и задержки p50/p99.
+
+Скрипт обращается к уже запущенному серверу по HTTP из нескольких потоков
+в течение заданного времени. С флагом --spawn сам запускает gunicorn с
+настройками из gunicorn.conf.py и останавливает его после замера.
+
+Запуск:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --cars 500 --drop
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.load_test --spawn --concurrency 16
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+
+PAGES = [
+    '/',
+    '/garage',
+    '/rent',
+    '/parts',
+    '/parts?search=фильтр',
+    '/analytics',
+]
+
+
+def pages():
+    start = date.today()
+    end = start + timedelta(days=7)
+    return PAGES + [f'/api/available_cars?start_date={start}&end_date={end}']
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def fetch(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = None
+    return status, (time.perf_counter() - started) * 1000
+
+
+def worker(base_url, paths, deadline, offset, results, lock):
+    local = {path: [] for path in paths}
+    errors = {path: 0 for path in paths}
+    number = offset
+    while time.perf_counter() < deadline:
+        path = paths[number % len(paths)]
+        number += 1
+        status, elapsed = fetch(base_url + urllib.request.quote(path, safe='/?=&'))
+        if status == 200:
+            local[path].append(elapsed)
+        else:
+            errors[path] += 1
+    with lock:
+        for path in paths:
+            results[path]['timings'].extend(local[path])
+            results[path]['errors'] += errors[path]
+
+
+def run(base_url, concurrency, duration):
+    paths = pages()
+    results = {path: {'timings': [], 'errors': 0} for path in paths}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=worker, args=(base_url, paths, deadline, number, results, lock))
+               for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for path, result in results.items():
+        timings = result['timings']
+        report[path] = {
+            'requests': len(timings),
+            'errors': result['errors'],
+            'rps': round(len(timings) / duration, 1),
+            'p50_ms': round(statistics.median(timings), 1) if timings else None,
+            'p99_ms': round(percentile(timings, 0.99), 1) if timings else None,
+        }
+    total = sum(item['requests'] for item in report.values())
+    report['total'] = {
+        'requests': total,
+        'errors': sum(item['errors'] for item in report.values()),
+        'rps': round(total / duration, 1),
+    }
+    return report
+
+
+def wait_for_server(base_url, server=None, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f'gunicorn завершился с кодом {server.returncode}')
+        if fetch(base_url + '/')[0] == 200:
+            return
+        time.sleep(0.5)
+    raise RuntimeError(f'Сервер {base_url} не ответил за {timeout} с')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест основных страниц')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='адрес запущенного сервера')
+    parser.add_argument('--concurrency', type=int, default=16, help='одновременных клиентов')
+    parser.add_argument('--duration', type=float, default=20, help='длительность замера, секунд')
+    parser.add_argument('--warmup', type=float, default=3, help='прогрев перед замером, секунд')
+    parser.add_argument('--spawn', action='store_true', help='запустить gunicorn с gunicorn.conf.py на время теста')
+    parser.add_argument('--json', help='сохранить результаты в JSON-файл')
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        port = args.url.rsplit(':', 1)[-1].strip('/')
+        env = dict(os.environ, PORT=port, WEB_ACCESS_LOG='', LOG_LEVEL=os.environ.get('LOG_LEVEL', 'warning'))
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app'], env=env)
+
+    try:
+        wait_for_server(args.url, server)
+        if args.warmup:
+            run(args.url, args.concurrency, args.warmup)
+        report = run(args.url, args.concurrency, args.duration)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f'{"страница":<50} {"запросов":>9} {"ошибок":>7} {"RPS":>8} {"p50, мс":>9} {"p99, мс":>9}')
+    for path, item in report.items():
+        if path == 'total':
+            continue
+        print(f"{path[:50]:<50} {item['requests']:>9} {item['errors']:>7} {item['rps']:>8} "
+              f"{item['p50_ms'] or '-':>9} {item['p99_ms'] or '-':>9}")
+    total = report['total']
+    print(f"{'всего':<50} {total['requests']:>9} {total['errors']:>7} {total['rps']:>8}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Время и память построения PDF-отчета за период.
+
+Скрипт строит отчет за весь период по текущей базе и печатает время и пик
+памяти Python (tracemalloc). Для сравнения тот же отчет строится с историей,
+собранной в список целиком до верстки. С флагом --drop база пересоздается и
+заполняется синтетической историей; для этого нужна отдельная база в
+DATABASE_URL.
+
+Запуск: DATABASE_URL=sqlite:///bench.db python -m benchmarks.period_report --cars 5000 --drop
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate
+
+from app import create_app, db
+from benchmarks.seed import require_scratch_database, seed
+from ledger import rebuild_ledger
+from period_report import build_period_pdf, report_story
+
+app = create_app({'JOBS_ENABLED': False})
+
+
+def build_eager_pdf(params, output):
+    """Тот же отчет, но вся история собирается в память до верстки"""
+    start = date.fromisoformat(params['start'])
+    end = date.fromisoformat(params['end'])
+    story = [flowable for chunk in report_story(start, end, getSampleStyleSheet()) for flowable in chunk]
+    SimpleDocTemplate(output, pagesize=A4).build(story)
+
+
+def measure(build, params):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'report.pdf')
+        tracemalloc.start()
+        started = time.perf_counter()
+        with open(path, 'wb') as output:
+            build(params, output)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = os.path.getsize(path)
+
+    return {
+        'seconds': round(elapsed, 2),
+        'peak_mb': round(peak / 1024 / 1024, 1),
+        'pdf_kb': round(size / 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замер построения отчета за период')
+    parser.add_argument('--cars', type=int, default=5000, help='количество автомобилей в синтетических данных')
+    parser.add_argument('--years', type=int, default=5, help='глубина истории и длина периода отчета в годах')
+    parser.add_argument('--drop', action='store_true', help='пересоздать таблицы и заполнить синтетическими данными')
+    parser.add_argument('--json', help='сохранить результаты в JSON-файл')
+    args = parser.parse_args()
+    if args.drop:
+        require_scratch_database(parser, args)
+
+    today = date.today()
+    params = {'start': today.replace(year=today.year - args.years).isoformat(), 'end': today.isoformat()}
+
+    with app.app_context():
+        if args.drop:
+            db.drop_all()
+            db.create_all()
+            counts = seed(cars=args.cars, years=args.years)
+            rebuild_ledger()
+            print('Данные: ' + ', '.join(f'{table}={count}' for table, count in counts.items()))
+
+        results = {
+            'streaming': measure(build_period_pdf, params),
+            'eager': measure(build_eager_pdf, params),
+        }
+
+    print(f"Период: {params['start']} - {params['end']}")
+    for label, result in results.items():
+        print(f"{label:>10}: {result['seconds']:.2f} с, пик памяти {result['peak_mb']} МБ, PDF {result['pdf_kb']} КБ")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Планы запросов и время ответа горячих страниц до и после индексов.
+
+Скрипт пересоздает базу, заполняет ее синтетическими данными, удаляет
+индексы из миграции c41f8d2b6e53, прогоняет страницы, затем создает индексы
+и повторяет замер. Все таблицы удаляются, поэтому нужны отдельная база в
+DATABASE_URL и флаг --drop.
+
+Запуск: DATABASE_URL=sqlite:///bench.db python -m benchmarks.query_plans --cars 2000 --drop
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event, text
+
+from app import create_app, db
+from benchmarks.seed import require_scratch_database, seed
+from car_totals import rebuild_car_totals
+from ledger import rebuild_ledger
+from search import rebuild_search_index
+
+app = create_app({'JOBS_ENABLED': False})
+
+# Индексы из миграции hot_query_indexes
+HOT_INDEXES = [
+    'ix_cars_status',
+    'ix_expenses_car_id_date',
+    'ix_expenses_date_amount',
+    'ix_rentals_car_id_status_dates',
+    'ix_rentals_status',
+    'ix_payments_rental_id_amount',
+    'ix_payments_payment_date_amount',
+    'ix_sales_sale_date_total_amount',
+]
+
+
+def endpoints():
+    """Страницы, которые попадают в замер"""
+    start = date.today()
+    end = start + timedelta(days=7)
+    return [
+        '/',
+        '/garage',
+        '/garage/car/1',
+        '/analytics',
+        f'/api/car_availability/1?start_date={start}&end_date={end}',
+    ]
+
+
+def hot_indexes():
+    indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    return [indexes[name] for name in HOT_INDEXES]
+
+
+def explain(connection, statement, parameters):
+    """План выполнения запроса для текущей СУБД"""
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+    return [row[0] for row in rows]
+
+
+def measure(client, url, repeat):
+    """Время ответа и запросы, которые выполнила страница"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # Одинаковые запросы (N+1) показываем один раз с количеством повторов
+    unique = {}
+    for statement, parameters in statements:
+        unique.setdefault(statement, [parameters, 0])[1] += 1
+
+    with db.engine.connect() as connection:
+        plans = [{'sql': statement, 'count': count, 'plan': explain(connection, statement, parameters)}
+                 for statement, (parameters, count) in unique.items()]
+
+    return {
+        'status': response.status_code,
+        'queries': len(statements),
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'plans': plans,
+    }
+
+
+def run(repeat):
+    client = app.test_client()
+    return {url: measure(client, url, repeat) for url in endpoints()}
+
+
+def print_report(label, results, show_plans):
+    print(f'\n=== {label} ===')
+    for url, result in results.items():
+        print(f"{result['median_ms']:>10.2f} ms  (max {result['max_ms']:.2f}, "
+              f"{result['queries']} запросов, HTTP {result['status']})  {url}")
+        if show_plans:
+            for item in result['plans']:
+                print(f"    x{item['count']} " + ' '.join(item['sql'].split())[:150])
+                for line in item['plan']:
+                    print('        ' + line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замер планов запросов до и после индексов')
+    parser.add_argument('--cars', type=int, default=2000, help='количество автомобилей в синтетических данных')
+    parser.add_argument('--repeat', type=int, default=5, help='повторов каждой страницы')
+    parser.add_argument('--plans', action='store_true', help='печатать планы запросов')
+    parser.add_argument('--json', help='сохранить результаты в JSON-файл')
+    parser.add_argument('--drop', action='store_true', help='пересоздать таблицы (обязательно: база стирается)')
+    args = parser.parse_args()
+    require_scratch_database(parser, args)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        counts = seed(cars=args.cars)
+        rebuild_ledger()
+        rebuild_car_totals()
+        rebuild_search_index()
+        print('Данные: ' + ', '.join(f'{table}={count}' for table, count in counts.items()))
+
+        for index in hot_indexes():
+            index.drop(db.engine)
+        with db.engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+        before = run(args.repeat)
+
+        for index in hot_indexes():
+            index.create(db.engine)
+        with db.engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+        after = run(args.repeat)
+
+    print_report('Без индексов', before, args.plans)
+    print_report('С индексами', after, args.plans)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'before': before, 'after': after}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Генерация синтетических данных для нагрузочных замеров.
+
+Заполняет все девять таблиц (автомобили, расходы, клиенты, аренды,
+платежи, разборки, поставщики, запчасти, продажи) пакетными вставками.
+Размер задается числом автомобилей и глубиной истории, плотность - числом
+записей на автомобиль, аренду и запчасть.
+
+Запуск: python -m benchmarks.seed --cars 2000 --years 5 --rentals-per-car 20 --drop
+"""
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from models import Car, Expense, Client, Rental, Payment, DisassemblyRecord, Supplier, Part, Sale
+
+CHUNK_SIZE = 5000
+EXPENSE_CATEGORIES = ['топливо', 'ремонт', 'запчасти', 'обслуживание']
+PART_NAMES = ['Фара', 'Бампер', 'Генератор', 'Стартер', 'Радиатор', 'Дверь', 'Капот', 'Зеркало',
+              'Амортизатор', 'Тормозной диск', 'Колодки', 'Фильтр', 'Ремень ГРМ', 'Насос']
+BRANDS = [('Lada', 'Vesta'), ('Lada', 'Granta'), ('Kia', 'Rio'), ('Hyundai', 'Solaris'),
+          ('Toyota', 'Camry'), ('Skoda', 'Octavia'), ('Renault', 'Logan'), ('VW', 'Polo')]
+
+
+def require_scratch_database(parser, args):
+    """Останавливает скрипт, который пересоздает таблицы, если база не указана явно.
+
+    Нужны флаг --drop и DATABASE_URL: без него приложение открывает рабочую
+    базу autobusiness.db, и замер стер бы ее данные.
+    """
+    if not args.drop:
+        parser.error('скрипт удаляет и заново создает все таблицы: подтвердите флагом --drop')
+    if not os.environ.get('DATABASE_URL'):
+        parser.error('DATABASE_URL не задан: укажите отдельную базу для замера, рабочая база была бы стерта')
+
+
+def bulk_insert(model, rows):
+    """Вставка строк пачками через executemany"""
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def seed(cars=500, years=3, expenses_per_car=20, rentals_per_car=10, payments_per_rental=2,
+         parts_per_car=10, sales_per_part=2, random_seed=42):
+    """Заполняет пустую базу связанными данными для всех моделей.
+
+    Идентификаторы назначаются явно, чтобы не перечитывать их после вставки.
+    Возвращает словарь с количеством строк по таблицам.
+    """
+    rnd = random.Random(random_seed)
+    today = date.today()
+    first_day = today - timedelta(days=365 * years)
+    now = datetime.utcnow()
+
+    def random_day():
+        return first_day + timedelta(days=rnd.randrange((today - first_day).days + 1))
+
+    car_rows = []
+    for car_id in range(1, cars + 1):
+        brand, model = rnd.choice(BRANDS)
+        car_rows.append(dict(
+            id=car_id, brand=brand, model=model, year=rnd.randint(2005, today.year),
+            vin=f'BENCH{car_id:012d}', purchase_price=rnd.randint(300, 3000) * 1000.0,
+            description='', status='active', created_at=now - timedelta(days=rnd.randrange(365 * years))
+        ))
+
+    expense_rows = []
+    for car_id in range(1, cars + 1):
+        for _ in range(expenses_per_car):
+            expense_rows.append(dict(
+                car_id=car_id, date=random_day(), amount=float(rnd.randint(500, 50000)),
+                category=rnd.choice(EXPENSE_CATEGORIES), description='', created_at=now
+            ))
+
+    client_rows = [dict(id=client_id, name=f'Клиент {client_id}', phone=f'+7900{client_id:07d}',
+                        email=f'client{client_id}@example.com', created_at=now)
+                   for client_id in range(1, max(cars // 2, 1) + 1)]
+
+    # Аренды по каждой машине идут друг за другом без пересечений
+    rental_rows = []
+    payment_rows = []
+    span = max((today - first_day).days // max(rentals_per_car, 1), 2)
+    rental_id = 0
+    for car_id in range(1, cars + 1):
+        for slot in range(rentals_per_car):
+            rental_id += 1
+            start = first_day + timedelta(days=slot * span + rnd.randrange(span // 2))
+            end = start + timedelta(days=rnd.randint(1, span // 2))
+            daily_rate = float(rnd.randint(15, 60) * 100)
+            total_amount = daily_rate * ((end - start).days + 1)
+            is_last = slot == rentals_per_car - 1
+            status = 'active' if is_last and end >= today else 'completed'
+            if status == 'active':
+                car_rows[car_id - 1]['status'] = 'rented'
+            rental_rows.append(dict(
+                id=rental_id, car_id=car_id, client_id=rnd.randint(1, len(client_rows)),
+                start_date=start, end_date=end, daily_rate=daily_rate, total_amount=total_amount,
+                status=status, created_at=datetime.combine(start, datetime.min.time())
+            ))
+            for _ in range(payments_per_rental):
+                payment_rows.append(dict(
+                    rental_id=rental_id, amount=round(total_amount / payments_per_rental, 2),
+                    payment_date=min(start + timedelta(days=rnd.randrange((end - start).days + 1)), today),
+                    description='', created_at=now
+                ))
+            rental_rows[-1]['balance_due'] = total_amount - round(total_amount / payments_per_rental, 2) * payments_per_rental
+
+    supplier_rows = [dict(id=supplier_id, name=f'Поставщик {supplier_id}', contact_person='',
+                          phone='', email='', address='', created_at=now)
+                     for supplier_id in range(1, 21)]
+
+    record_rows = []
+    for record_id in range(1, max(cars // 10, 1) + 1):
+        brand, model = rnd.choice(BRANDS)
+        record_rows.append(dict(
+            id=record_id, car_brand=brand, car_model=model, car_year=rnd.randint(1995, today.year),
+            vin=None, description='', disassembly_date=random_day(), created_at=now
+        ))
+
+    part_rows = []
+    sale_rows = []
+    for part_id in range(1, cars * parts_per_car + 1):
+        from_disassembly = rnd.random() < 0.5
+        price = float(rnd.randint(5, 500) * 100)
+        part_rows.append(dict(
+            id=part_id, name=f'{rnd.choice(PART_NAMES)} {rnd.choice(BRANDS)[0]}', code=f'P-{part_id:08d}',
+            quantity=rnd.randint(0, 20), price=price,
+            supplier_id=None if from_disassembly else rnd.randint(1, len(supplier_rows)),
+            disassembly_record_id=rnd.randint(1, len(record_rows)) if from_disassembly else None,
+            description='', location=f'Стеллаж {rnd.randint(1, 50)}',
+            created_at=now - timedelta(seconds=rnd.randrange(365 * years * 86400))
+        ))
+        for _ in range(sales_per_part):
+            quantity_sold = rnd.randint(1, 3)
+            sale_rows.append(dict(
+                part_id=part_id, quantity_sold=quantity_sold, sale_price=price,
+                total_amount=quantity_sold * price, sale_date=random_day(),
+                customer_name='', description='', created_at=now
+            ))
+
+    tables = [
+        (Car, car_rows), (Expense, expense_rows), (Client, client_rows), (Rental, rental_rows),
+        (Payment, payment_rows), (Supplier, supplier_rows), (DisassemblyRecord, record_rows),
+        (Part, part_rows), (Sale, sale_rows),
+    ]
+    for model, rows in tables:
+        bulk_insert(model, rows)
+    db.session.commit()
+
+    return {model.__tablename__: len(rows) for model, rows in tables}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Заполнение базы синтетическими данными')
+    parser.add_argument('--cars', type=int, default=500, help='количество автомобилей')
+    parser.add_argument('--years', type=int, default=3, help='глубина истории в годах')
+    parser.add_argument('--expenses-per-car', type=int, default=20, help='расходов на автомобиль')
+    parser.add_argument('--rentals-per-car', type=int, default=10, help='аренд на автомобиль')
+    parser.add_argument('--payments-per-rental', type=int, default=2, help='платежей на аренду')
+    parser.add_argument('--parts-per-car', type=int, default=10, help='запчастей на автомобиль')
+    parser.add_argument('--sales-per-part', type=int, default=2, help='продаж на запчасть')
+    parser.add_argument('--random-seed', type=int, default=42, help='зерно генератора (одинаковые данные при повторе)')
+    parser.add_argument('--drop', action='store_true', help='пересоздать таблицы перед заполнением')
+    args = parser.parse_args()
+
+    from ledger import rebuild_ledger
+    from car_totals import rebuild_car_totals
+    from search import rebuild_search_index
+
+    with create_app().app_context():
+        if args.drop:
+            db.drop_all()
+        db.create_all()
+        counts = seed(cars=args.cars, years=args.years, expenses_per_car=args.expenses_per_car,
+                      rentals_per_car=args.rentals_per_car, payments_per_rental=args.payments_per_rental,
+                      parts_per_car=args.parts_per_car, sales_per_part=args.sales_per_part,
+                      random_seed=args.random_seed)
+        rebuild_ledger()
+        rebuild_car_totals()
+        rebuild_search_index()
+
+    for table, count in counts.items():
+        print(f'{table:>22}: {count}')
+
+
+if __name__ == '__main__':
+    main()
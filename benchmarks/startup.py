@@ -0,0 +1,155 @@
+"""Холодный старт и память процесса приложения.
+
+Каждый замер - новый процесс python: импорт main (create_app) с нуля и
+первый запрос к главной странице через тестовый клиент, как у только что
+запущенного воркера gunicorn. Записываются полное время жизни процесса
+(с запуском интерпретатора), время импорта приложения, время первого
+ответа и резидентная память процесса после него.
+
+Вариант eager до импорта приложения загружает ReportLab, NumPy и
+Flask-Migrate - так стартовал каждый воркер, пока они импортировались на
+уровне модулей. Вариант lazy - текущий старт: эти библиотеки загружаются
+при первом отчете, расчете загрузки или команде `flask db`. Их импорт
+(deferred, мс) оплачивает первый такой запрос, а не каждый воркер. Если в
+варианте lazy тяжелая библиотека загрузилась при старте, это регрессия:
+код выхода 1.
+
+Запуск:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.startup --runs 10
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# Что раньше импортировалось при старте, а теперь - по требованию
+HEAVY_MODULES = (
+    'reportlab.lib.pagesizes',
+    'reportlab.lib.styles',
+    'reportlab.lib.units',
+    'reportlab.platypus',
+    'numpy',
+    'flask_migrate',
+)
+
+VARIANTS = ('eager', 'lazy')
+
+
+def import_modules(names):
+    """Импортирует модули, которых еще нет (и которые установлены). Возвращает время в мс"""
+    started = time.perf_counter()
+    for name in names:
+        if name in sys.modules:
+            continue
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    return (time.perf_counter() - started) * 1000
+
+
+def rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS - байты
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def child(variant):
+    """Один замер в отдельном процессе: результат - строка JSON в stdout"""
+    started = time.perf_counter()
+    if variant == 'eager':
+        import_modules(HEAVY_MODULES)
+    from main import app
+    imported = time.perf_counter()
+
+    status = app.test_client().get('/').status_code
+    responded = time.perf_counter()
+    loaded = sorted(name for name in HEAVY_MODULES if name in sys.modules and variant != 'eager')
+    result = {
+        'import_ms': (imported - started) * 1000,
+        'first_response_ms': (responded - imported) * 1000,
+        'rss_kb': rss_kb(),
+        'status': status,
+        'loaded_at_start': loaded,
+        'deferred_ms': 0.0,
+    }
+    if variant == 'deferred':
+        # Что оплатит первый запрос, которому нужны тяжелые библиотеки
+        result['deferred_ms'] = import_modules(HEAVY_MODULES)
+    print(json.dumps(result))
+
+
+def measure(variant, runs):
+    # Поток фоновых заданий стартует с первым запросом - в замере он не нужен
+    env = dict(os.environ, JOBS_ENABLED='0', LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'))
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--child', variant],
+                                env=env, capture_output=True, text=True, check=True).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample['process_ms'] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+
+    def median(key):
+        return round(statistics.median(sample[key] for sample in samples), 1)
+
+    return {
+        'runs': runs,
+        'process_ms': median('process_ms'),
+        'import_ms': median('import_ms'),
+        'first_response_ms': median('first_response_ms'),
+        'rss_mb': round(statistics.median(sample['rss_kb'] for sample in samples) / 1024, 1),
+        'deferred_ms': median('deferred_ms'),
+        'statuses': sorted({sample['status'] for sample in samples}),
+        'loaded_at_start': sorted({name for sample in samples for name in sample['loaded_at_start']}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время холодного старта и память процесса приложения')
+    parser.add_argument('--runs', type=int, default=10, help='процессов на вариант')
+    parser.add_argument('--save', help='сохранить результат в JSON-файл')
+    parser.add_argument('--child', choices=VARIANTS + ('deferred',), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    results = {}
+    print(f'{"вариант":<8} {"процесс, мс":>12} {"импорт, мс":>11} {"1-й ответ, мс":>14} '
+          f'{"RSS, МБ":>8} {"отложено, мс":>13}')
+    for variant in VARIANTS:
+        results[variant] = item = measure(variant, args.runs)
+        if variant == 'lazy':
+            # Отдельными процессами, чтобы отложенный импорт не попал во время старта
+            item['deferred_ms'] = measure('deferred', args.runs)['deferred_ms']
+        print(f"{variant:<8} {item['process_ms']:>12} {item['import_ms']:>11} {item['first_response_ms']:>14} "
+              f"{item['rss_mb']:>8} {item['deferred_ms']:>13}", flush=True)
+
+    eager, lazy = results['eager'], results['lazy']
+    print(f"\nИмпорт приложения: -{eager['import_ms'] - lazy['import_ms']:.0f} мс "
+          f"({lazy['import_ms'] / eager['import_ms']:.0%} от eager), "
+          f"память воркера: -{eager['rss_mb'] - lazy['rss_mb']:.1f} МБ")
+    statuses = sorted({status for item in results.values() for status in item['statuses']})
+    if statuses != [200]:
+        print(f"Главная страница ответила {statuses} - проверьте DATABASE_URL")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'Результат сохранен в {args.save}')
+
+    if lazy['loaded_at_start']:
+        print(f"При старте загружены отложенные библиотеки: {', '.join(lazy['loaded_at_start'])}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
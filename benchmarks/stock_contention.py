@@ -0,0 +1,100 @@
+"""Нагрузочная проверка списания со склада при параллельных продажах.
+
+Много потоков одновременно продают одну и ту же запчасть через /parts/sale,
+часть из них перед продажей берет резерв, часть бросает резерв без продажи.
+В конце проверяется, что остаток не ушел в минус и сходится с продажами.
+Скрипт пересоздает все таблицы, поэтому нужны отдельная база в DATABASE_URL
+и флаг --drop.
+
+Запуск: DATABASE_URL=sqlite:///bench.db python -m benchmarks.stock_contention --threads 16 --drop
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import func
+
+from app import create_app, db
+from benchmarks.seed import require_scratch_database
+from models import Part, Sale, StockHold
+
+app = create_app({'JOBS_ENABLED': False})
+
+
+def worker(number, args, barrier, outcomes):
+    client = app.test_client()
+    rng = random.Random(number)
+    barrier.wait()
+    for _ in range(args.attempts):
+        quantity = rng.randint(1, 3)
+        form = {'part_id': args.part_id, 'quantity_sold': quantity, 'sale_price': 10,
+                'sale_date': date.today().isoformat()}
+
+        if rng.random() < args.hold_ratio:
+            response = client.post(f'/api/parts/{args.part_id}/hold', data={'quantity': quantity})
+            if response.status_code != 200:
+                outcomes.append('hold_refused')
+                continue
+            token = response.get_json()['token']
+            if rng.random() < args.abandon_ratio:
+                client.post(f'/api/parts/holds/{token}/release')
+                outcomes.append('hold_abandoned')
+                continue
+            form['hold_token'] = token
+
+        response = client.post('/parts/sale', data=form)
+        outcomes.append('posted' if response.status_code == 302 else f'http_{response.status_code}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Параллельные продажи одной запчасти')
+    parser.add_argument('--threads', type=int, default=16, help='количество потоков')
+    parser.add_argument('--attempts', type=int, default=25, help='попыток продажи в каждом потоке')
+    parser.add_argument('--stock', type=int, default=200, help='начальный остаток запчасти')
+    parser.add_argument('--hold-ratio', type=float, default=0.5, help='доля продаж с предварительным резервом')
+    parser.add_argument('--abandon-ratio', type=float, default=0.2, help='доля брошенных резервов')
+    parser.add_argument('--drop', action='store_true', help='пересоздать таблицы (обязательно: база стирается)')
+    args = parser.parse_args()
+    require_scratch_database(parser, args)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        part = Part(name='Нагрузочная запчасть', code='LOAD-1', quantity=args.stock, price=10)
+        db.session.add(part)
+        db.session.commit()
+        args.part_id = part.id
+
+    barrier = threading.Barrier(args.threads)
+    outcomes = []
+    threads = [threading.Thread(target=worker, args=(number, args, barrier, outcomes))
+               for number in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        remaining = db.session.get(Part, args.part_id).quantity
+        sold = db.session.query(func.coalesce(func.sum(Sale.quantity_sold), 0)).scalar()
+        sales = Sale.query.count()
+        holds = StockHold.query.count()
+
+    print(f'Потоков: {args.threads}, попыток: {len(outcomes)}, время: {elapsed:.2f} с')
+    for outcome in sorted(set(outcomes)):
+        print(f'{outcome:>16}: {outcomes.count(outcome)}')
+    print(f'Продаж: {sales}, продано штук: {sold}, остаток: {remaining} из {args.stock}, висящих резервов: {holds}')
+
+    if remaining < 0 or remaining + sold != args.stock:
+        print('ОШИБКА: остаток не сходится с продажами')
+        sys.exit(1)
+    print('Остаток сходится с продажами и не уходит в минус')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Загрузка автопарка за длинный период: время расчета с numpy и без него.
+
+Оба варианта прохода по интервалам аренды должны дать одинаковый
+результат; отдельно показано время самих запросов к базе.
+
+Запуск:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --cars 3000 --years 5 --drop
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.utilization --years 5
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from app import create_app
+import utilization
+
+app = create_app()
+
+
+def measure(build, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = build()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время расчета загрузки автопарка')
+    parser.add_argument('--years', type=int, default=5, help='длина периода в годах')
+    parser.add_argument('--granularity', default='week', help='шаг кривой загрузки')
+    parser.add_argument('--repeat', type=int, default=3, help='повторов, берется лучшее время')
+    args = parser.parse_args()
+
+    end = date.today()
+    start = end - timedelta(days=365 * args.years)
+
+    with app.app_context():
+        rentals, load_ms = measure(lambda: (utilization.load_rentals(start, end), utilization.load_fleet()),
+                                   args.repeat)
+        print(f'Период {start} - {end}: автомобилей {len(rentals[1])}, аренд {len(rentals[0])}')
+        print(f'{"запросы к базе":<16} {load_ms:>8.1f} мс')
+
+        results = {}
+        variants = [('python', False)] + ([('numpy', True)] if utilization.numpy_module() is not None else [])
+        for name, use_numpy in variants:
+            results[name], elapsed = measure(
+                lambda: utilization.fleet_utilization(start, end, args.granularity, use_numpy=use_numpy), args.repeat)
+            print(f'{name:<16} {elapsed:>8.1f} мс (вместе с запросами)')
+
+        if len(results) == 2 and results['python'] != results['numpy']:
+            raise SystemExit('Результаты numpy и цикла не совпадают')
+        fleet = results['python']['fleet']
+        print(f'Занятость парка {fleet["occupancy"]:.1%}, доход на доступный день {fleet["revenue_per_available_day"]}')
+
+
+if __name__ == '__main__':
+    main()
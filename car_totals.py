@@ -0,0 +1,162 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import Car, CarTotals, Expense, Payment, Rental
+from versioning import bump_data_version
+
+# Итоги по автомобилю (car_totals) обновляются теми же транзакциями, что
+# добавляют расходы, аренды и платежи, поэтому прибыль автомобиля читается
+# одной строкой, сколько бы лет он ни был в парке. Сверка с исходными
+# таблицами - команда `flask check-car-totals`.
+
+TOTAL_FIELDS = ('total_expenses', 'total_income', 'rental_days', 'last_activity')
+
+
+def record_car_totals(car_id, day, expenses=0, income=0, rental_days=0):
+    """Прибавляет суммы к итогам автомобиля в рамках текущей транзакции.
+
+    Коммит не выполняется: итоги фиксируются вместе с исходной операцией.
+    """
+    last_activity = case(
+        (CarTotals.last_activity.is_(None), day),
+        (CarTotals.last_activity < day, day),
+        else_=CarTotals.last_activity
+    )
+    increment = update(CarTotals).where(CarTotals.car_id == car_id).values(
+        total_expenses=CarTotals.total_expenses + expenses,
+        total_income=CarTotals.total_income + income,
+        rental_days=CarTotals.rental_days + rental_days,
+        last_activity=last_activity
+    )
+
+    if db.session.execute(increment).rowcount:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(CarTotals(car_id=car_id, total_expenses=expenses, total_income=income,
+                                     rental_days=rental_days, last_activity=day))
+    except IntegrityError:
+        # Строку успели создать параллельно - просто увеличиваем ее
+        db.session.execute(increment)
+
+
+def record_car_expense(expense):
+    record_car_totals(expense.car_id, expense.date, expenses=expense.amount)
+
+
+def record_car_rental(rental):
+    record_car_totals(rental.car_id, rental.start_date, rental_days=rental_days(rental.start_date, rental.end_date))
+
+
+def record_car_payment(payment):
+    """Платеж относится к автомобилю своей аренды"""
+    car_id = db.session.query(Rental.car_id).filter(Rental.id == payment.rental_id).scalar()
+    if car_id is None:
+        raise ValueError(f'Аренда не найдена: {payment.rental_id}')
+    record_car_totals(car_id, payment.payment_date, income=payment.amount)
+
+
+def rental_days(start_date, end_date):
+    """Дней по договору аренды, включая первый и последний"""
+    return (end_date - start_date).days + 1
+
+
+def car_totals(car_id):
+    """Итоги одного автомобиля (нулевые, если операций еще не было)"""
+    return db.session.get(CarTotals, car_id) or CarTotals(
+        car_id=car_id, total_expenses=0, total_income=0, rental_days=0
+    )
+
+
+def compute_car_totals():
+    """Итоги всех автомобилей, пересчитанные из расходов, аренд и платежей: {car_id: {поле: значение}}"""
+    totals = {}
+
+    def entry(car_id):
+        return totals.setdefault(car_id, {'total_expenses': 0, 'total_income': 0,
+                                          'rental_days': 0, 'last_activity': None})
+
+    def touch(item, day):
+        if day is not None and (item['last_activity'] is None or day > item['last_activity']):
+            item['last_activity'] = day
+
+    expenses = db.session.query(Expense.car_id, func.sum(Expense.amount), func.max(Expense.date)) \
+        .group_by(Expense.car_id)
+    for car_id, amount, last_day in expenses:
+        item = entry(car_id)
+        item['total_expenses'] = amount or 0
+        touch(item, last_day)
+
+    income = db.session.query(Rental.car_id, func.sum(Payment.amount), func.max(Payment.payment_date)) \
+        .join(Payment, Payment.rental_id == Rental.id).group_by(Rental.car_id)
+    for car_id, amount, last_day in income:
+        item = entry(car_id)
+        item['total_income'] = amount or 0
+        touch(item, last_day)
+
+    # Разность дат в SQL у SQLite и PostgreSQL считается по-разному,
+    # поэтому дни аренды суммируются здесь
+    rentals = db.session.query(Rental.car_id, Rental.start_date, Rental.end_date) \
+        .execution_options(yield_per=1000)
+    for car_id, start_date, end_date in rentals:
+        item = entry(car_id)
+        item['rental_days'] += rental_days(start_date, end_date)
+        touch(item, start_date)
+
+    return totals
+
+
+def check_car_totals():
+    """Сверяет car_totals с исходными таблицами. Возвращает список (car_id, поле, в таблице, по расчету)"""
+    expected = compute_car_totals()
+    stored = {row.car_id: row for row in CarTotals.query}
+    empty = {'total_expenses': 0, 'total_income': 0, 'rental_days': 0, 'last_activity': None}
+
+    mismatches = []
+    for car_id in sorted(set(expected) | set(stored)):
+        values = expected.get(car_id, empty)
+        row = stored.get(car_id)
+        for field in TOTAL_FIELDS:
+            actual = getattr(row, field) if row is not None else empty[field]
+            # Суммы в копейках сравниваются точно
+            if actual != values[field]:
+                mismatches.append((car_id, field, actual, values[field]))
+    return mismatches
+
+
+def rebuild_car_totals():
+    """Полностью пересчитывает car_totals из исходных таблиц"""
+    db.session.query(CarTotals).delete()
+    totals = compute_car_totals()
+    known = {car_id for (car_id,) in db.session.query(Car.id)}
+    rows = [CarTotals(car_id=car_id, **values) for car_id, values in totals.items() if car_id in known]
+    db.session.add_all(rows)
+    # Итоги изменились: ответы API и отчеты, привязанные к версии, устарели
+    bump_data_version()
+    db.session.commit()
+    return len(rows)
+
+
+@click.command('check-car-totals')
+@with_appcontext
+@click.option('--fix', is_flag=True, help='пересчитать итоги, если есть расхождения')
+def check_car_totals_command(fix):
+    """Сверить итоги по автомобилям с расходами, арендами и платежами"""
+    mismatches = check_car_totals()
+    for car_id, field, actual, expected in mismatches:
+        print(f'Автомобиль {car_id}: {field} = {actual}, по расчету {expected}')
+    if not mismatches:
+        print('Итоги по автомобилям сходятся с исходными таблицами')
+        return
+    if not fix:
+        raise click.ClickException(f'Расхождений: {len(mismatches)} (исправить: --fix)')
+    rows = rebuild_car_totals()
+    print(f'Итоги по автомобилям пересчитаны: {rows} строк')
+
+
+def init_app(app):
+    app.cli.add_command(check_car_totals_command)
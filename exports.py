@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app import db
+from models import Car, Expense, Client, Rental, Payment, Part, Sale
+
+# Сколько строк база отдает за раз (серверный курсор) и сколько строк
+# уходит клиенту одним куском ответа
+FETCH_SIZE = 1000
+CHUNK_ROWS = 500
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Выгрузки: колонки (заголовок, выражение), соединения, столбец даты для
+# фильтра по периоду и столбцы для фильтров по автомобилю и поставщику
+DATASETS = {
+    'expenses': {
+        'columns': [
+            ('id', Expense.id), ('date', Expense.date), ('car_id', Expense.car_id),
+            ('car', Car.brand + ' ' + Car.model), ('category', Expense.category),
+            ('amount', Expense.amount), ('description', Expense.description),
+        ],
+        'joins': [(Car, Car.id == Expense.car_id)],
+        'date': Expense.date,
+        'car': Expense.car_id,
+        'supplier': None,
+    },
+    'payments': {
+        'columns': [
+            ('id', Payment.id), ('payment_date', Payment.payment_date), ('rental_id', Payment.rental_id),
+            ('car_id', Rental.car_id), ('client', Client.name), ('amount', Payment.amount),
+            ('description', Payment.description),
+        ],
+        'joins': [(Rental, Rental.id == Payment.rental_id), (Client, Client.id == Rental.client_id)],
+        'date': Payment.payment_date,
+        'car': Rental.car_id,
+        'supplier': None,
+    },
+    'sales': {
+        'columns': [
+            ('id', Sale.id), ('sale_date', Sale.sale_date), ('order_id', Sale.order_id), ('part_id', Sale.part_id),
+            ('part_code', Part.code), ('part_name', Part.name), ('supplier_id', Part.supplier_id),
+            ('quantity_sold', Sale.quantity_sold),
+            ('sale_price', Sale.sale_price), ('total_amount', Sale.total_amount),
+            ('customer_name', Sale.customer_name), ('description', Sale.description),
+        ],
+        'joins': [(Part, Part.id == Sale.part_id)],
+        'date': Sale.sale_date,
+        'car': None,
+        'supplier': Part.supplier_id,
+    },
+    'rentals': {
+        'columns': [
+            ('id', Rental.id), ('start_date', Rental.start_date), ('end_date', Rental.end_date),
+            ('car_id', Rental.car_id), ('car', Car.brand + ' ' + Car.model), ('client_id', Rental.client_id),
+            ('client', Client.name), ('daily_rate', Rental.daily_rate), ('total_amount', Rental.total_amount),
+            ('status', Rental.status),
+        ],
+        'joins': [(Car, Car.id == Rental.car_id), (Client, Client.id == Rental.client_id)],
+        'date': Rental.start_date,
+        'car': Rental.car_id,
+        'supplier': None,
+    },
+    'parts': {
+        'columns': [
+            ('id', Part.id), ('code', Part.code), ('name', Part.name), ('quantity', Part.quantity),
+            ('price', Part.price), ('supplier_id', Part.supplier_id),
+            ('disassembly_record_id', Part.disassembly_record_id), ('location', Part.location),
+            ('description', Part.description), ('created_at', Part.created_at),
+        ],
+        'joins': [],
+        'date': Part.created_at,
+        'car': None,
+        'supplier': Part.supplier_id,
+    },
+}
+
+
+def parse_filters(args):
+    """Фильтры выгрузки из параметров запроса: start_date, end_date, car_id, supplier_id"""
+    filters = {}
+    for name in ('start_date', 'end_date'):
+        if args.get(name):
+            try:
+                filters[name] = date.fromisoformat(args[name])
+            except ValueError:
+                raise ValueError(f'Некорректная дата {name}: {args[name]}')
+    for name in ('car_id', 'supplier_id'):
+        if args.get(name):
+            try:
+                filters[name] = int(args[name])
+            except ValueError:
+                raise ValueError(f'Некорректный {name}: {args[name]}')
+    return filters
+
+
+def export_statement(dataset, filters):
+    """SELECT выгрузки с фильтрами, упорядоченный по первичному ключу"""
+    spec = DATASETS[dataset]
+    statement = select(*[column.label(name) for name, column in spec['columns']])
+    for target, condition in spec['joins']:
+        statement = statement.join(target, condition)
+
+    date_column = spec['date']
+    start, end = filters.get('start_date'), filters.get('end_date')
+    if isinstance(date_column.type, db.DateTime):
+        # Для столбцов с временем конец периода включает весь последний день
+        start = start and datetime.combine(start, time.min)
+        end = end and datetime.combine(end + timedelta(days=1), time.min)
+        if end:
+            statement = statement.where(date_column < end)
+    elif end:
+        statement = statement.where(date_column <= end)
+    if start:
+        statement = statement.where(date_column >= start)
+
+    for name, key in (('car_id', 'car'), ('supplier_id', 'supplier')):
+        if name in filters:
+            if spec[key] is None:
+                raise ValueError(f'Фильтр {name} не поддерживается для выгрузки {dataset}')
+            statement = statement.where(spec[key] == filters[name])
+
+    return statement.order_by(spec['columns'][0][1])
+
+
+def json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # Суммы - строкой с копейками, как в базе: float исказил бы большие суммы
+        return str(value)
+    return value
+
+
+def stream_rows(statement):
+    """Строки выгрузки через серверный курсор пачками по FETCH_SIZE"""
+    result = db.session.execute(statement.execution_options(yield_per=FETCH_SIZE))
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def generate_csv(dataset, statement):
+    """CSV для Excel: BOM, разделитель ';'. Отдается кусками по CHUNK_ROWS строк"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    buffer.write('\ufeff')
+    writer.writerow([name for name, _ in DATASETS[dataset]['columns']])
+    # Заголовок уходит сразу, до первых строк из базы
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for number, row in enumerate(stream_rows(statement), start=1):
+        writer.writerow(['' if value is None else json_value(value) for value in row])
+        if number % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def generate_jsonl(dataset, statement):
+    """JSON Lines: один объект на строку"""
+    names = [name for name, _ in DATASETS[dataset]['columns']]
+    lines = []
+    for row in stream_rows(statement):
+        lines.append(json.dumps(dict(zip(names, map(json_value, row))), ensure_ascii=False))
+        if len(lines) == CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+GENERATORS = {
+    'csv': generate_csv,
+    'jsonl': generate_jsonl,
+}
+
+
+def export_filename(dataset, fmt, filters):
+    parts = [dataset]
+    if 'start_date' in filters:
+        parts.append(filters['start_date'].strftime('%Y%m%d'))
+    if 'end_date' in filters:
+        parts.append(filters['end_date'].strftime('%Y%m%d'))
+    return '_'.join(parts) + '.' + fmt
@@ -0,0 +1,28 @@
+# Настройки gunicorn для работы в продакшене:
+#   gunicorn -c gunicorn.conf.py main:app
+# Все значения можно переопределить переменными окружения.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Процессы и потоки: worker_class gthread обслуживает WEB_THREADS запросов
+# в каждом процессе. Пул соединений с базой в app.py рассчитан от WEB_THREADS
+workers = int(os.environ.get("WEB_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+
+# Построение отчетов идет в фоновых потоках, но долгие выгрузки (CSV) -
+# в самом запросе, поэтому таймаут с запасом
+timeout = int(os.environ.get("WEB_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Перезапуск процессов после N запросов страхует от утечек памяти
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+# Пустое значение WEB_ACCESS_LOG отключает журнал запросов
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
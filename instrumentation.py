@@ -0,0 +1,241 @@
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Профилирование запросов: время ответа, число и время SQL-запросов, самые
+# медленные запросы к базе и время отрисовки шаблонов. Включается
+# INSTRUMENTATION_ENABLED=1. Счетчики живут в памяти процесса: у каждого
+# воркера gunicorn свои, Prometheus собирает их с каждого воркера отдельно.
+# Для потоковых ответов (выгрузки) учитывается время до начала передачи.
+
+# Границы гистограмм: время ответа (секунды) и число SQL-запросов на ответ
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Длина текста SQL в журнале медленных запросов
+STATEMENT_MAX_LENGTH = 500
+
+# Эти адреса не учитываются, чтобы сбор метрик не искажал сами метрики
+IGNORED_ENDPOINTS = {'metrics.metrics', 'metrics.slow_requests', 'static'}
+
+
+def enabled():
+    return current_app.config['INSTRUMENTATION_ENABLED']
+
+
+class Histogram:
+    """Накопительная гистограмма в формате Prometheus: счетчики по верхним границам, сумма, количество"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for number, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[number] += 1
+        self.total += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    """Метрики запросов процесса и журнал последних медленных запросов"""
+
+    def __init__(self, slow_log_size=100, slow_request_ms=500):
+        self.slow_request_ms = slow_request_ms
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.slow_requests = Counter()
+        self.sql_queries = Counter()
+        self.sql_seconds = Counter()
+        self.template_seconds = Counter()
+        self.durations = {}
+        self.query_counts = {}
+        self.slow_log = deque(maxlen=slow_log_size)
+
+    def record(self, sample, slow):
+        endpoint = sample['endpoint']
+        with self.lock:
+            self.requests[(endpoint, sample['method'], sample['status'])] += 1
+            self.sql_queries[endpoint] += sample['sql_queries']
+            self.sql_seconds[endpoint] += sample['sql_ms'] / 1000
+            self.template_seconds[endpoint] += sample['template_ms'] / 1000
+            if endpoint not in self.durations:
+                self.durations[endpoint] = Histogram(DURATION_BUCKETS)
+                self.query_counts[endpoint] = Histogram(QUERY_COUNT_BUCKETS)
+            self.durations[endpoint].observe(sample['duration_ms'] / 1000)
+            self.query_counts[endpoint].observe(sample['sql_queries'])
+            if slow:
+                self.slow_requests[endpoint] += 1
+                self.slow_log.append(sample)
+
+    def slow(self):
+        """Журнал медленных запросов, последние первыми"""
+        with self.lock:
+            return list(reversed(self.slow_log))
+
+    def configure(self, slow_log_size, slow_request_ms):
+        with self.lock:
+            self.slow_log = deque(self.slow_log, maxlen=slow_log_size)
+            self.slow_request_ms = slow_request_ms
+
+    def reset(self):
+        with self.lock:
+            self.__init__(self.slow_log.maxlen, self.slow_request_ms)
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        with self.lock:
+            add_metric(lines, 'autobusiness_http_requests_total', 'counter', 'Обработано HTTP-запросов',
+                       ((dict(endpoint=e, method=m, status=s), v) for (e, m, s), v in sorted(self.requests.items())))
+            add_metric(lines, 'autobusiness_http_slow_requests_total', 'counter',
+                       f'Запросов дольше {self.slow_request_ms} мс',
+                       ((dict(endpoint=e), v) for e, v in sorted(self.slow_requests.items())))
+            add_histogram(lines, 'autobusiness_http_request_duration_seconds', 'Время ответа', self.durations)
+            add_histogram(lines, 'autobusiness_sql_queries_per_request', 'SQL-запросов на один ответ',
+                          self.query_counts)
+            add_metric(lines, 'autobusiness_sql_queries_total', 'counter', 'Выполнено SQL-запросов',
+                       ((dict(endpoint=e), v) for e, v in sorted(self.sql_queries.items())))
+            add_metric(lines, 'autobusiness_sql_duration_seconds_total', 'counter', 'Время выполнения SQL',
+                       ((dict(endpoint=e), round(v, 6)) for e, v in sorted(self.sql_seconds.items())))
+            add_metric(lines, 'autobusiness_template_render_seconds_total', 'counter', 'Время отрисовки шаблонов',
+                       ((dict(endpoint=e), round(v, 6)) for e, v in sorted(self.template_seconds.items())))
+        return '\n'.join(lines) + '\n'
+
+
+def label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{name}="{label_value(value)}"' for name, value in labels.items()) + '}'
+
+
+def add_metric(lines, name, kind, help_text, samples):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    for labels, value in samples:
+        lines.append(f'{name}{format_labels(labels)} {value}')
+
+
+def add_histogram(lines, name, help_text, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for endpoint, histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{format_labels(dict(endpoint=endpoint, le=bound))} {count}')
+        lines.append(f'{name}_bucket{format_labels(dict(endpoint=endpoint, le="+Inf"))} {histogram.total}')
+        lines.append(f'{name}_sum{format_labels(dict(endpoint=endpoint))} {round(histogram.sum, 6)}')
+        lines.append(f'{name}_count{format_labels(dict(endpoint=endpoint))} {histogram.total}')
+
+
+request_metrics = RequestMetrics()
+
+
+def start_request_timer():
+    if enabled():
+        g.request_started = time.perf_counter()
+        g.sql_seconds = 0.0
+        g.template_seconds = 0.0
+        g.slowest_statements = []
+        g.statement_counts = Counter()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and enabled():
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('statement_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if 'request_started' not in g:
+        return
+    g.sql_seconds += elapsed
+    g.statement_counts[statement] += 1
+    # Храним только самые медленные запросы ответа, а не все
+    entry = (elapsed, statement)
+    if len(g.slowest_statements) < current_app.config['SLOW_STATEMENTS_SHOWN']:
+        heapq.heappush(g.slowest_statements, entry)
+    else:
+        heapq.heappushpop(g.slowest_statements, entry)
+
+
+@event.listens_for(Engine, 'handle_error')
+def drop_statement_timer(exception_context):
+    # Запрос к базе завершился ошибкой - after_cursor_execute не будет
+    started = exception_context.connection.info.get('statement_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def start_template_timer(sender, template, context, **extra):
+    if 'request_started' in g:
+        g.template_started = time.perf_counter()
+
+
+def stop_template_timer(sender, template, context, **extra):
+    if 'template_started' in g:
+        g.template_seconds += time.perf_counter() - g.pop('template_started')
+
+
+def record_request_metrics(response):
+    """Записывает метрики ответа, медленные ответы - еще и в журнал"""
+    if 'request_started' not in g or request.endpoint in IGNORED_ENDPOINTS:
+        return response
+
+    duration_ms = (time.perf_counter() - g.request_started) * 1000
+    slow = duration_ms >= current_app.config['SLOW_REQUEST_MS']
+    sample = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'endpoint': request.endpoint or 'unmatched',
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'status': response.status_code,
+        'duration_ms': round(duration_ms, 1),
+        # Число запросов считает query_budget, здесь - только их время
+        'sql_queries': g.get('query_count', 0),
+        'sql_ms': round(g.sql_seconds * 1000, 1),
+        'template_ms': round(g.template_seconds * 1000, 1),
+    }
+    if slow:
+        sample['slowest_statements'] = [
+            {'ms': round(elapsed * 1000, 2), 'statement': statement[:STATEMENT_MAX_LENGTH]}
+            for elapsed, statement in sorted(g.slowest_statements, reverse=True)
+        ]
+        # Один и тот же запрос много раз за ответ - признак N+1
+        sample['repeated_statements'] = [
+            {'count': count, 'statement': statement[:STATEMENT_MAX_LENGTH]}
+            for statement, count in g.statement_counts.most_common(current_app.config['SLOW_STATEMENTS_SHOWN'])
+            if count > 1
+        ]
+        logger.warning('Медленный запрос %s %s: %.0f мс, SQL: %d запросов / %.0f мс, шаблоны: %.0f мс',
+                       sample['method'], sample['path'], duration_ms, sample['sql_queries'],
+                       sample['sql_ms'], sample['template_ms'])
+
+    request_metrics.record(sample, slow)
+    return response
+
+
+def init_app(app):
+    request_metrics.configure(app.config['SLOW_REQUEST_LOG_SIZE'], app.config['SLOW_REQUEST_MS'])
+    app.before_request(start_request_timer)
+    app.after_request(record_request_metrics)
+    before_render_template.connect(start_template_timer, app)
+    template_rendered.connect(stop_template_timer, app)
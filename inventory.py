@@ -0,0 +1,150 @@
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, delete, func, select, update
+
+from app import db
+from models import Part, StockHold
+
+# Списание со склада и временные резервы.
+# Остаток меняется только условным UPDATE: строка обновляется, если
+# свободного количества (остаток минус чужие действующие резервы) хватает,
+# иначе rowcount = 0 и продажа отклоняется. Две параллельные продажи не
+# могут обе пройти проверку и увести остаток в минус.
+
+
+class StockError(ValueError):
+    """Списание или резерв невозможны: не хватает свободного остатка или нет запчасти"""
+
+
+def lock_parts(part_ids):
+    """Блокирует строки запчастей до конца транзакции. Возвращает множество найденных id.
+
+    PostgreSQL: SELECT ... FOR UPDATE в порядке id, чтобы две корзины с
+    общими запчастями не ждали друг друга по кругу. SQLite блокирует всю
+    базу при первой записи, поэтому транзакция начинается с пустого
+    UPDATE - иначе две транзакции, начавшие с чтения, мешают друг другу
+    перейти к записи.
+    """
+    parts = Part.__table__
+    if db.session.get_bind().dialect.name == 'postgresql':
+        rows = db.session.execute(
+            select(parts.c.id).where(parts.c.id.in_(part_ids)).order_by(parts.c.id).with_for_update()
+        )
+        return set(rows.scalars())
+    db.session.execute(update(parts).where(parts.c.id.in_(part_ids)).values(quantity=parts.c.quantity))
+    return set(db.session.execute(select(parts.c.id).where(parts.c.id.in_(part_ids))).scalars())
+
+
+def lock_part(part_id):
+    """Блокирует строку одной запчасти. Возвращает False, если запчасти нет"""
+    return part_id in lock_parts([part_id])
+
+
+def held_quantity(part_id, exclude_tokens=()):
+    """Подзапрос: сколько штук запчасти держат действующие резервы (кроме exclude_tokens).
+
+    part_id - число или столбец parts.id (тогда подзапрос коррелирован со строкой UPDATE).
+    """
+    query = select(func.coalesce(func.sum(StockHold.quantity), 0)).where(
+        StockHold.part_id == part_id,
+        StockHold.expires_at > datetime.utcnow()
+    )
+    tokens = [token for token in exclude_tokens if token]
+    if tokens:
+        query = query.where(StockHold.token.not_in(tokens))
+    return query.scalar_subquery()
+
+
+def take_stock(part_id, quantity, hold_token=None):
+    """Списывает quantity штук одной запчасти, см. take_stock_batch"""
+    take_stock_batch({part_id: quantity}, [hold_token])
+
+
+def take_stock_batch(quantities, hold_tokens=()):
+    """Списывает со склада несколько запчастей одним UPDATE в текущей транзакции.
+
+    quantities - словарь {part_id: количество}. Собственные резервы продавца
+    (hold_tokens) не мешают списанию и снимаются, чужие - уменьшают
+    свободный остаток. Если хотя бы одной запчасти не хватает, бросает
+    StockError и не меняет ни одной строки склада.
+    """
+    if not quantities:
+        raise StockError('Не выбрано ни одной запчасти')
+    if any(quantity <= 0 for quantity in quantities.values()):
+        raise StockError('Количество должно быть больше нуля')
+    # Блокировка нужна для точного учета резервов: резерв, созданный
+    # параллельно, успеет зафиксироваться до подсчета. Сам остаток защищен
+    # условием UPDATE и без нее
+    found = lock_parts(list(quantities))
+    missing = [part_id for part_id in quantities if part_id not in found]
+    if missing:
+        raise StockError(f'Запчасть не найдена: {", ".join(map(str, missing))}')
+
+    parts = Part.__table__
+    requested = case(quantities, value=parts.c.id)
+    available = func.coalesce(parts.c.quantity, 0) - held_quantity(parts.c.id, hold_tokens)
+    # Для нескольких запчастей UPDATE может пройти не по всем строкам -
+    # точка сохранения позволяет откатить уже уменьшенные
+    savepoint = db.session.begin_nested() if len(quantities) > 1 else None
+    result = db.session.execute(
+        update(parts)
+        .where(parts.c.id.in_(list(quantities)), available >= requested)
+        .values(quantity=parts.c.quantity - requested)
+    )
+    if result.rowcount != len(quantities):
+        if savepoint is None:
+            raise StockError('Недостаточно товара на складе!')
+        savepoint.rollback()
+        short = db.session.execute(
+            select(parts.c.name).where(parts.c.id.in_(list(quantities)), available < requested)
+        ).scalars().all()
+        raise StockError(f'Недостаточно товара на складе: {", ".join(short)}')
+    if savepoint is not None:
+        savepoint.commit()
+
+    release_holds(hold_tokens)
+
+
+def place_hold(part_id, quantity, token=None):
+    """Резервирует quantity штук на STOCK_HOLD_SECONDS секунд.
+
+    Повторный вызов с тем же token меняет количество и продлевает резерв.
+    Возвращает пару (резерв, свободный остаток после резерва).
+    """
+    if quantity <= 0:
+        raise StockError('Количество должно быть больше нуля')
+    if not lock_part(part_id):
+        raise StockError('Запчасть не найдена')
+
+    now = datetime.utcnow()
+    db.session.execute(delete(StockHold).where(StockHold.part_id == part_id, StockHold.expires_at <= now))
+
+    free = db.session.execute(
+        select(func.coalesce(Part.quantity, 0) - held_quantity(part_id, [token])).where(Part.id == part_id)
+    ).scalar()
+    if free < quantity:
+        raise StockError(f'Свободно только {free} шт.')
+
+    expires_at = now + timedelta(seconds=current_app.config['STOCK_HOLD_SECONDS'])
+    hold = StockHold.query.filter_by(token=token, part_id=part_id).first() if token else None
+    if hold is None:
+        hold = StockHold(part_id=part_id, token=uuid.uuid4().hex, quantity=quantity, expires_at=expires_at)
+        db.session.add(hold)
+    else:
+        hold.quantity = quantity
+        hold.expires_at = expires_at
+
+    return hold, free - quantity
+
+
+def release_hold(token):
+    """Снимает резерв (если он еще есть)"""
+    release_holds([token])
+
+
+def release_holds(tokens):
+    tokens = [token for token in tokens if token]
+    if tokens:
+        db.session.execute(delete(StockHold).where(StockHold.token.in_(tokens)))
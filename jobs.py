@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import JobRun
+from availability import availability_index
+from kpi_cache import kpi_cache, METRIC_ACTIVE_CARS, METRIC_ACTIVE_RENTALS
+from rentals import (complete_overdue_rentals, sync_car_statuses, recompute_rental_balances, unpaid_rentals)
+from versioning import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+# Фоновые задания. В каждом процессе приложения поток JobRunner раз в
+# JOBS_INTERVAL_SECONDS пытается запустить задания. Запуск сначала
+# отмечается в job_runs условным UPDATE: отметку ставит только один процесс,
+# пока с прошлого запуска не прошел интервал, поэтому при нескольких
+# воркерах gunicorn задание выполняется один раз за интервал. Без потока
+# (JOBS_ENABLED=0) задания запускает отдельный процесс `flask run-jobs`.
+
+JOBS = {}
+
+
+def job(name):
+    """Регистрирует задание: функция без аргументов, возвращает словарь итогов"""
+    def decorator(run):
+        JOBS[name] = run
+        return run
+    return decorator
+
+
+@job('rental_lifecycle')
+def rental_lifecycle():
+    """Завершение просроченных аренд, статусы автомобилей и остатки к оплате"""
+    batch_size = current_app.config['JOB_BATCH_SIZE']
+    completed = complete_overdue_rentals(batch_size=batch_size)
+    cars = sync_car_statuses()
+    balances = recompute_rental_balances(batch_size=batch_size)
+    unpaid_count, unpaid_total = unpaid_rentals()
+
+    if completed or cars or balances:
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_ACTIVE_CARS, METRIC_ACTIVE_RENTALS)
+        availability_index.invalidate()
+    if unpaid_count:
+        logger.warning('Завершенных аренд с долгом: %d на сумму %s', unpaid_count, unpaid_total)
+
+    return {
+        'completed_rentals': completed,
+        'car_statuses_fixed': cars,
+        'balances_fixed': balances,
+        'unpaid_rentals': unpaid_count,
+        'unpaid_total': float(unpaid_total),
+    }
+
+
+def process_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_run(name, interval_seconds=None):
+    """Отмечает начало запуска. False, если другой процесс запускал задание меньше интервала назад.
+
+    Без interval_seconds запуск отмечается безусловно (ручной запуск).
+    """
+    now = datetime.utcnow()
+    statement = update(JobRun).where(JobRun.name == name).values(
+        started_at=now, owner=process_name(), run_count=JobRun.run_count + 1)
+    if interval_seconds is not None:
+        statement = statement.where(or_(JobRun.started_at.is_(None),
+                                        JobRun.started_at <= now - timedelta(seconds=interval_seconds)))
+    if db.session.execute(statement.execution_options(synchronize_session=False)).rowcount:
+        db.session.commit()
+        return True
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(JobRun(name=name, started_at=now, owner=process_name(), run_count=1))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # Строка уже есть, и запуск свежий - задание выполняет другой процесс
+        db.session.rollback()
+        return False
+
+
+def run_job(name, interval_seconds=None):
+    """Запускает задание, если удалось отметить запуск. Возвращает итоги или None"""
+    if not claim_run(name, interval_seconds):
+        return None
+
+    started = time.perf_counter()
+    result, error = None, None
+    try:
+        result = JOBS[name]()
+    except Exception as e:
+        db.session.rollback()
+        error = str(e)
+        logger.exception('Задание %s завершилось ошибкой', name)
+    duration_ms = round((time.perf_counter() - started) * 1000)
+
+    db.session.execute(
+        update(JobRun).where(JobRun.name == name).values(
+            finished_at=datetime.utcnow(), duration_ms=duration_ms,
+            result=json.dumps(result, ensure_ascii=False) if result is not None else None, error=error)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if error is None:
+        logger.info('Задание %s: %s за %d мс', name, result, duration_ms)
+    return result
+
+
+def run_jobs(names=None, interval_seconds=None):
+    """Запускает задания по очереди. Возвращает {имя: итоги} выполненных"""
+    results = {}
+    for name in names or JOBS:
+        result = run_job(name, interval_seconds)
+        if result is not None:
+            results[name] = result
+    return results
+
+
+class JobRunner:
+    """Поток, запускающий задания раз в interval_seconds в процессе приложения"""
+
+    def __init__(self, interval_seconds=300):
+        self.app = None
+        self.interval_seconds = interval_seconds
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        self.interval_seconds = app.config['JOBS_INTERVAL_SECONDS']
+
+    def start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.loop, name='jobs', daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def loop(self):
+        while not self.stopped.is_set():
+            try:
+                with self.app.app_context():
+                    run_jobs(interval_seconds=self.interval_seconds)
+            except Exception:
+                # Поток не должен умирать из-за ошибки базы - повторим через интервал
+                logger.exception('Ошибка запуска фоновых заданий')
+            self.stopped.wait(self.interval_seconds)
+
+
+job_runner = JobRunner()
+
+
+def start_job_runner():
+    """Поток заданий стартует с первым запросом: в CLI и миграциях он не нужен"""
+    if current_app.config['JOBS_ENABLED'] and not current_app.testing:
+        job_runner.start()
+
+
+@click.command('run-jobs')
+@with_appcontext
+@click.argument('names', nargs=-1)
+@click.option('--once', is_flag=True, help='выполнить задания один раз и выйти')
+@click.option('--force', is_flag=True, help='не ждать интервала с прошлого запуска')
+def run_jobs_command(names, once, force):
+    """Фоновые задания: завершение просроченных аренд, статусы автомобилей, остатки к оплате"""
+    unknown = [name for name in names if name not in JOBS]
+    if unknown:
+        raise click.ClickException(f'Неизвестные задания: {", ".join(unknown)} (есть: {", ".join(JOBS)})')
+    interval = current_app.config['JOBS_INTERVAL_SECONDS']
+    while True:
+        results = run_jobs(names, None if force else interval)
+        for name, result in results.items():
+            print(f'{name}: {json.dumps(result, ensure_ascii=False)}')
+        if once:
+            if not results:
+                print('Задания недавно выполнял другой процесс (запустить сейчас: --force)')
+            return
+        time.sleep(interval)
+
+
+def init_app(app):
+    job_runner.init_app(app)
+    app.before_request(start_job_runner)
+    app.cli.add_command(run_jobs_command)
@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+# Показатели главной страницы
+METRIC_ACTIVE_CARS = 'active_cars'
+METRIC_ACTIVE_RENTALS = 'active_rentals'
+METRIC_TOTAL_PARTS = 'total_parts'
+METRIC_MONTH_SUMMARY = 'month_summary'
+
+
+class MemoryBackend:
+    """LRU-кэш в памяти процесса с ограничением по времени жизни записи"""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisBackend:
+    """Общий кэш в Redis: сброс из одного воркера виден всем остальным"""
+
+    prefix = 'kpi:'
+
+    def __init__(self, url, ttl=300):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('Для KPI_CACHE_URL=redis://... нужен пакет redis')
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        # Дробные числа в кэше - только денежные суммы, читаем их как Decimal
+        return None if value is None else json.loads(value, parse_float=Decimal)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value, default=float), ex=self.ttl)
+
+    def delete(self, keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class KpiCache:
+    """Кэш показателей дашборда по метрике и месяцу.
+
+    Значение хранится вместе с версией данных, при которой оно посчитано, и
+    отдается, только пока версия не изменилась. Версию увеличивает каждая
+    запись (в том числе в других воркерах и командах CLI), поэтому кэш в
+    памяти процесса остается точным и при нескольких воркерах, а значение,
+    посчитанное до чужого коммита и сохраненное после него, не будет
+    прочитано. invalidate освобождает место сразу, не дожидаясь пересчета.
+    Общий бэкенд (KPI_CACHE_URL) избавляет воркеры от повторного расчета.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def key(metric, month=None):
+        return metric if month is None else f'{metric}:{month.isoformat()}'
+
+    def get_or_compute(self, metric, compute, version, month=None):
+        """Значение из кэша, если оно посчитано при версии данных version, иначе compute()"""
+        key = self.key(metric, month)
+        entry = self.backend.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = compute()
+        self.backend.set(key, (version, value))
+        return value
+
+    def invalidate(self, *metrics, month=None):
+        """Сбрасывает показатели; для помесячных нужен месяц изменения"""
+        self.backend.delete([self.key(metric, month) for metric in metrics])
+
+    def clear(self):
+        self.backend.clear()
+
+
+def create_backend(config):
+    url = config['KPI_CACHE_URL']
+    if url:
+        return RedisBackend(url, ttl=config['KPI_CACHE_TTL'])
+    return MemoryBackend(max_entries=config['KPI_CACHE_MAX_ENTRIES'], ttl=config['KPI_CACHE_TTL'])
+
+
+kpi_cache = KpiCache(MemoryBackend())
+
+
+def init_app(app):
+    kpi_cache.backend = create_backend(app.config)
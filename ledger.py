@@ -0,0 +1,143 @@
+import click
+from flask.cli import with_appcontext
+from app import db
+from models import MonthlyLedger, Payment, Sale, Expense
+from versioning import bump_data_version
+from datetime import date, timedelta
+from sqlalchemy import func, update, extract
+from sqlalchemy.exc import IntegrityError
+
+# Источники записей в месячной свертке
+SOURCE_RENTAL = 'rental'
+SOURCE_PARTS = 'parts'
+SOURCE_EXPENSE = 'expense'
+
+
+def month_start(day):
+    """Первое число месяца для указанной даты"""
+    return day.replace(day=1)
+
+
+def month_starts(count, today=None):
+    """Список первых чисел последних count месяцев, от старых к новым"""
+    current = month_start(today or date.today())
+    months = []
+    for _ in range(count):
+        months.append(current)
+        current = month_start(current - timedelta(days=1))
+    return list(reversed(months))
+
+
+def record_entry(day, source, amount, category=''):
+    """Добавляет сумму в месячную свертку в рамках текущей транзакции.
+
+    Коммит не выполняется: запись фиксируется вместе с исходной операцией.
+    """
+    month = month_start(day)
+    key = ledger_key(month, source, category)
+
+    result = db.session.execute(
+        update(MonthlyLedger).where(*key).values(amount=MonthlyLedger.amount + amount)
+    )
+    if result.rowcount:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(MonthlyLedger(month=month, source=source, category=category, amount=amount))
+    except IntegrityError:
+        # Строку успели создать параллельно - просто увеличиваем ее
+        db.session.execute(
+            update(MonthlyLedger).where(*key).values(amount=MonthlyLedger.amount + amount)
+        )
+
+
+def ledger_key(month, source, category):
+    """Условия поиска строки свертки по ключу"""
+    return (
+        MonthlyLedger.month == month,
+        MonthlyLedger.source == source,
+        MonthlyLedger.category == category,
+    )
+
+
+def rebuild_ledger():
+    """Полностью пересчитывает месячную свертку из исходных таблиц"""
+    db.session.query(MonthlyLedger).delete()
+
+    sources = [
+        (SOURCE_RENTAL, Payment.payment_date, Payment.amount, None),
+        (SOURCE_PARTS, Sale.sale_date, Sale.total_amount, None),
+        (SOURCE_EXPENSE, Expense.date, Expense.amount, Expense.category),
+    ]
+
+    rows = 0
+    for source, date_column, amount_column, category_column in sources:
+        year = extract('year', date_column)
+        month = extract('month', date_column)
+        columns = [year, month, func.sum(amount_column)]
+        group_by = [year, month]
+        if category_column is not None:
+            columns.append(category_column)
+            group_by.append(category_column)
+
+        for row in db.session.query(*columns).group_by(*group_by):
+            db.session.add(MonthlyLedger(
+                month=date(int(row[0]), int(row[1]), 1),
+                source=source,
+                category=row[3] if category_column is not None else '',
+                amount=row[2] or 0
+            ))
+            rows += 1
+
+    # Свертка изменилась: ответы API и отчеты, привязанные к версии, устарели
+    bump_data_version()
+    db.session.commit()
+    return rows
+
+
+def monthly_totals(first_month, last_month):
+    """Суммы по месяцам и источникам: {month: {source: amount}}"""
+    rows = db.session.query(
+        MonthlyLedger.month,
+        MonthlyLedger.source,
+        func.sum(MonthlyLedger.amount)
+    ).filter(
+        MonthlyLedger.month >= first_month,
+        MonthlyLedger.month <= last_month
+    ).group_by(MonthlyLedger.month, MonthlyLedger.source).all()
+
+    totals = {}
+    for month, source, amount in rows:
+        totals.setdefault(month, {})[source] = amount or 0
+    return totals
+
+
+def month_summary(month):
+    """Доходы от аренды, продаж запчастей и расходы за один месяц"""
+    totals = monthly_totals(month, month).get(month, {})
+    return (
+        totals.get(SOURCE_RENTAL, 0),
+        totals.get(SOURCE_PARTS, 0),
+        totals.get(SOURCE_EXPENSE, 0),
+    )
+
+
+def expense_categories():
+    """Суммы расходов по категориям за все время"""
+    return db.session.query(
+        MonthlyLedger.category,
+        func.sum(MonthlyLedger.amount)
+    ).filter(MonthlyLedger.source == SOURCE_EXPENSE).group_by(MonthlyLedger.category).all()
+
+
+@click.command('rebuild-ledger')
+@with_appcontext
+def rebuild_ledger_command():
+    """Пересчитать таблицу monthly_ledger из платежей, продаж и расходов"""
+    rows = rebuild_ledger()
+    print(f'Месячная свертка пересчитана: {rows} строк')
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_ledger_command)
@@ -1,4 +1,10 @@
-from app import app
+import os
 
+from app import create_app
+
+app = create_app()
+
+# Сервер разработки. В работе приложение запускается через gunicorn:
+#   gunicorn -c gunicorn.conf.py main:app
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=os.environ.get('FLASK_DEBUG') == '1')
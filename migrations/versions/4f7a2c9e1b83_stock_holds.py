@@ -0,0 +1,36 @@
+"""stock holds
+
+Revision ID: 4f7a2c9e1b83
+Revises: 9d1e6b3f5a42
+Create Date: 2026-10-17 10:12:41.208317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f7a2c9e1b83'
+down_revision = '9d1e6b3f5a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('part_id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(length=32), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['part_id'], ['parts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('token')
+    )
+    op.create_index('ix_stock_holds_part_id_expires_at', 'stock_holds', ['part_id', 'expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stock_holds_part_id_expires_at', table_name='stock_holds')
+    op.drop_table('stock_holds')
@@ -0,0 +1,35 @@
+"""monthly ledger rollup
+
+После применения на существующей базе заполните свертку командой
+`flask rebuild-ledger`.
+
+Revision ID: 7c2d5a8e9f10
+Revises: 3b9e1f4c2a7d
+Create Date: 2026-10-16 22:31:12.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d5a8e9f10'
+down_revision = '3b9e1f4c2a7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_ledger',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('month', 'source', 'category', name='uq_monthly_ledger_month_source_category')
+    )
+
+
+def downgrade():
+    op.drop_table('monthly_ledger')
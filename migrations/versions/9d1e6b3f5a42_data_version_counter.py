@@ -0,0 +1,28 @@
+"""data version counter
+
+Revision ID: 9d1e6b3f5a42
+Revises: e85a3c7d1f26
+Create Date: 2026-10-16 23:24:18.530164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1e6b3f5a42'
+down_revision = 'e85a3c7d1f26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('data_version')
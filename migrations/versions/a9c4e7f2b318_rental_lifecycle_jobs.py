@@ -0,0 +1,48 @@
+"""rental lifecycle jobs
+
+Остаток к оплате аренды (rentals.balance_due) заполняется из платежей.
+Просроченные аренды завершит первый запуск задания rental_lifecycle
+(`flask run-jobs --once`).
+
+Revision ID: a9c4e7f2b318
+Revises: f3b8d2e6a471
+Create Date: 2026-10-19 09:41:27.604518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c4e7f2b318'
+down_revision = 'f3b8d2e6a471'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_runs',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('owner', sa.String(length=100), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('run_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('rentals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('balance_due', sa.BigInteger(), nullable=False, server_default='0'))
+
+    op.execute(
+        'UPDATE rentals SET balance_due = total_amount - '
+        'COALESCE((SELECT SUM(amount) FROM payments WHERE payments.rental_id = rentals.id), 0)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('rentals', schema=None) as batch_op:
+        batch_op.drop_column('balance_due')
+
+    op.drop_table('job_runs')
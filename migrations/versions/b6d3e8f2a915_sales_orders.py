@@ -0,0 +1,41 @@
+"""sales orders
+
+Revision ID: b6d3e8f2a915
+Revises: 4f7a2c9e1b83
+Create Date: 2026-10-17 11:03:27.641950
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d3e8f2a915'
+down_revision = '4f7a2c9e1b83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_date', sa.Date(), nullable=False),
+    sa.Column('customer_name', sa.String(length=100), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('order_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_sales_order_id', ['order_id'], unique=False)
+        batch_op.create_foreign_key('fk_sales_order_id_sales_orders', 'sales_orders', ['order_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_sales_order_id_sales_orders', type_='foreignkey')
+        batch_op.drop_index('ix_sales_order_id')
+        batch_op.drop_column('order_id')
+
+    op.drop_table('sales_orders')
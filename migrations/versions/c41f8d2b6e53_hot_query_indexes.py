@@ -0,0 +1,50 @@
+"""hot query indexes
+
+Индексы под фильтры по датам и статусам из routes.py:
+- rentals (car_id, status, start_date, end_date) - проверка доступности авто;
+- rentals (status), cars (status) - счетчики на главной;
+- payments/sales/expenses по дате вместе с суммой - месячные суммы и
+  пересчет свертки читаются только из индекса;
+- внешние ключи expenses.car_id и payments.rental_id - карточка авто и
+  финансовая сводка гаража.
+
+На PostgreSQL индексы строятся CONCURRENTLY, без блокировки записи.
+
+Revision ID: c41f8d2b6e53
+Revises: 7c2d5a8e9f10
+Create Date: 2026-10-16 22:46:37.918254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f8d2b6e53'
+down_revision = '7c2d5a8e9f10'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_cars_status', 'cars', ['status']),
+    ('ix_expenses_car_id_date', 'expenses', ['car_id', 'date']),
+    ('ix_expenses_date_amount', 'expenses', ['date', 'amount']),
+    ('ix_rentals_car_id_status_dates', 'rentals', ['car_id', 'status', 'start_date', 'end_date']),
+    ('ix_rentals_status', 'rentals', ['status']),
+    ('ix_payments_rental_id_amount', 'payments', ['rental_id', 'amount']),
+    ('ix_payments_payment_date_amount', 'payments', ['payment_date', 'amount']),
+    ('ix_sales_sale_date_total_amount', 'sales', ['sale_date', 'total_amount']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
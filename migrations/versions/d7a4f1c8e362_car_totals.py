@@ -0,0 +1,35 @@
+"""car totals
+
+После применения на существующей базе заполните итоги командой
+`flask check-car-totals --fix`.
+
+Revision ID: d7a4f1c8e362
+Revises: b6d3e8f2a915
+Create Date: 2026-10-17 14:52:08.317604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a4f1c8e362'
+down_revision = 'b6d3e8f2a915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('car_totals',
+    sa.Column('car_id', sa.Integer(), nullable=False),
+    sa.Column('total_expenses', sa.Float(), nullable=False),
+    sa.Column('total_income', sa.Float(), nullable=False),
+    sa.Column('rental_days', sa.Integer(), nullable=False),
+    sa.Column('last_activity', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['car_id'], ['cars.id'], ),
+    sa.PrimaryKeyConstraint('car_id')
+    )
+
+
+def downgrade():
+    op.drop_table('car_totals')
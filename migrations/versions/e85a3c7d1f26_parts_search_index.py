@@ -0,0 +1,48 @@
+"""parts search index
+
+SQLite: внешняя FTS5-таблица parts_search с триграммным токенизатором,
+заполняется из существующих запчастей.
+PostgreSQL: GIN-индекс по tsvector и триграммные индексы pg_trgm.
+
+Revision ID: e85a3c7d1f26
+Revises: c41f8d2b6e53
+Create Date: 2026-10-16 23:05:51.207733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e85a3c7d1f26'
+down_revision = 'c41f8d2b6e53'
+branch_labels = None
+depends_on = None
+
+
+POSTGRES_DOCUMENT = ("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(code, '') "
+                     "|| ' ' || coalesce(description, ''))")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE parts_search USING fts5("
+                   "name, code, description, content='parts', content_rowid='id', tokenize='trigram')")
+        op.execute("INSERT INTO parts_search (parts_search) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY ix_parts_search_document ON parts USING gin ({POSTGRES_DOCUMENT})")
+            op.execute("CREATE INDEX CONCURRENTLY ix_parts_name_trgm ON parts USING gin (name gin_trgm_ops)")
+            op.execute("CREATE INDEX CONCURRENTLY ix_parts_code_trgm ON parts USING gin (code gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE parts_search")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_parts_code_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_parts_name_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_parts_search_document")
@@ -0,0 +1,52 @@
+"""money in cents
+
+Денежные столбцы переводятся из FLOAT в BIGINT с суммой в копейках
+(см. money.Money). Существующие суммы умножаются на 100 и округляются
+до копейки.
+
+Revision ID: f3b8d2e6a471
+Revises: d7a4f1c8e362
+Create Date: 2026-10-18 11:06:41.582093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d2e6a471'
+down_revision = 'd7a4f1c8e362'
+branch_labels = None
+depends_on = None
+
+MONEY_COLUMNS = {
+    'cars': ('purchase_price',),
+    'expenses': ('amount',),
+    'rentals': ('daily_rate', 'total_amount'),
+    'payments': ('amount',),
+    'parts': ('price',),
+    'sales_orders': ('total_amount',),
+    'sales': ('sale_price', 'total_amount'),
+    'monthly_ledger': ('amount',),
+    'car_totals': ('total_expenses', 'total_income'),
+}
+
+
+def upgrade():
+    for table, columns in MONEY_COLUMNS.items():
+        for column in columns:
+            op.execute(f'UPDATE {table} SET {column} = ROUND({column} * 100)')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.Float(), type_=sa.BigInteger(),
+                                      postgresql_using=f'{column}::bigint')
+
+
+def downgrade():
+    for table, columns in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.BigInteger(), type_=sa.Float(),
+                                      postgresql_using=f'{column}::double precision')
+        for column in columns:
+            op.execute(f'UPDATE {table} SET {column} = {column} / 100.0')
@@ -1,17 +1,21 @@
 from app import db
 from datetime import datetime, date
-from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from money import Money
 
 class Car(db.Model):
     """Модель для автомобилей в гараже"""
     __tablename__ = 'cars'
+    __table_args__ = (
+        db.Index('ix_cars_status', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     brand = db.Column(db.String(100), nullable=False)  # Марка
     model = db.Column(db.String(100), nullable=False)  # Модель
     year = db.Column(db.Integer, nullable=False)       # Год выпуска
     vin = db.Column(db.String(17), unique=True)        # VIN номер
-    purchase_price = db.Column(db.Float, default=0)    # Стоимость покупки
+    purchase_price = db.Column(Money, default=0)    # Стоимость покупки
     description = db.Column(db.Text)                   # Описание
     status = db.Column(db.String(20), default='active')  # Статус: active, rented, disassembled
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -26,11 +30,15 @@ class Car(db.Model):
 class Expense(db.Model):
     """Модель для расходов по автомобилям"""
     __tablename__ = 'expenses'
+    __table_args__ = (
+        db.Index('ix_expenses_car_id_date', 'car_id', 'date'),
+        db.Index('ix_expenses_date_amount', 'date', 'amount'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     car_id = db.Column(db.Integer, db.ForeignKey('cars.id'), nullable=False)
     date = db.Column(db.Date, nullable=False, default=date.today)
-    amount = db.Column(db.Float, nullable=False)       # Сумма расхода
+    amount = db.Column(Money, nullable=False)       # Сумма расхода
     category = db.Column(db.String(50), nullable=False)  # Категория: топливо, ремонт, запчасти, обслуживание
     description = db.Column(db.Text)                   # Описание расхода
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -57,14 +65,19 @@ class Client(db.Model):
 class Rental(db.Model):
     """Модель для контрактов аренды"""
     __tablename__ = 'rentals'
+    __table_args__ = (
+        db.Index('ix_rentals_car_id_status_dates', 'car_id', 'status', 'start_date', 'end_date'),
+        db.Index('ix_rentals_status', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     car_id = db.Column(db.Integer, db.ForeignKey('cars.id'), nullable=False)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
     start_date = db.Column(db.Date, nullable=False)    # Дата начала аренды
     end_date = db.Column(db.Date, nullable=False)      # Дата окончания аренды
-    daily_rate = db.Column(db.Float, nullable=False)   # Стоимость за день
-    total_amount = db.Column(db.Float, nullable=False) # Общая стоимость
+    daily_rate = db.Column(Money, nullable=False)   # Стоимость за день
+    total_amount = db.Column(Money, nullable=False) # Общая стоимость
+    balance_due = db.Column(Money, nullable=False, default=0)  # Остаток к оплате: стоимость минус платежи
     status = db.Column(db.String(20), default='active')  # Статус: active, completed, cancelled
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -77,10 +90,14 @@ class Rental(db.Model):
 class Payment(db.Model):
     """Модель для платежей по аренде"""
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_rental_id_amount', 'rental_id', 'amount'),
+        db.Index('ix_payments_payment_date_amount', 'payment_date', 'amount'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     rental_id = db.Column(db.Integer, db.ForeignKey('rentals.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)       # Сумма платежа
+    amount = db.Column(Money, nullable=False)       # Сумма платежа
     payment_date = db.Column(db.Date, nullable=False, default=date.today)
     description = db.Column(db.Text)                   # Описание платежа
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -133,7 +150,7 @@ class Part(db.Model):
     name = db.Column(db.String(200), nullable=False)   # Наименование запчасти
     code = db.Column(db.String(50), unique=True)       # Код запчасти
     quantity = db.Column(db.Integer, default=0)        # Количество на складе
-    price = db.Column(db.Float, nullable=False)        # Цена за единицу
+    price = db.Column(Money, nullable=False)        # Цена за единицу
     supplier_id = db.Column(db.Integer, db.ForeignKey('suppliers.id'))
     disassembly_record_id = db.Column(db.Integer, db.ForeignKey('disassembly_records.id'))
     description = db.Column(db.Text)                   # Описание запчасти
@@ -143,15 +160,36 @@ class Part(db.Model):
     def __repr__(self):
         return f'<Part {self.name} ({self.code})>'
 
+class SalesOrder(db.Model):
+    """Модель для заказа покупателя из нескольких запчастей (строки - Sale)"""
+    __tablename__ = 'sales_orders'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_date = db.Column(db.Date, nullable=False, default=date.today)
+    customer_name = db.Column(db.String(100))              # Имя покупателя
+    description = db.Column(db.Text)                       # Описание заказа
+    total_amount = db.Column(Money, nullable=False, default=0)  # Сумма по всем строкам
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Связи
+    lines = db.relationship('Sale', backref='order', lazy=True)
+    
+    def __repr__(self):
+        return f'<SalesOrder {self.id}: {self.total_amount}>'
+
 class Sale(db.Model):
     """Модель для продаж запчастей"""
     __tablename__ = 'sales'
+    __table_args__ = (
+        db.Index('ix_sales_sale_date_total_amount', 'sale_date', 'total_amount'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     part_id = db.Column(db.Integer, db.ForeignKey('parts.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('sales_orders.id'), index=True)  # Заказ, если продажа - его строка
     quantity_sold = db.Column(db.Integer, nullable=False)  # Количество проданных запчастей
-    sale_price = db.Column(db.Float, nullable=False)       # Цена продажи за единицу
-    total_amount = db.Column(db.Float, nullable=False)     # Общая сумма продажи
+    sale_price = db.Column(Money, nullable=False)       # Цена продажи за единицу
+    total_amount = db.Column(Money, nullable=False)     # Общая сумма продажи
     sale_date = db.Column(db.Date, nullable=False, default=date.today)
     customer_name = db.Column(db.String(100))              # Имя покупателя
     description = db.Column(db.Text)                       # Описание продажи
@@ -162,3 +200,108 @@ class Sale(db.Model):
     
     def __repr__(self):
         return f'<Sale Part:{self.part_id} Qty:{self.quantity_sold}>'
+
+class MonthlyLedger(db.Model):
+    """Свертка доходов и расходов по месяцам (обновляется вместе с операциями)"""
+    __tablename__ = 'monthly_ledger'
+    __table_args__ = (
+        db.UniqueConstraint('month', 'source', 'category', name='uq_monthly_ledger_month_source_category'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, nullable=False)             # Первое число месяца
+    source = db.Column(db.String(20), nullable=False)      # Источник: rental, parts, expense
+    category = db.Column(db.String(50), nullable=False, default='')  # Категория расхода (для expense)
+    amount = db.Column(Money, nullable=False, default=0)  # Сумма за месяц
+    
+    def __repr__(self):
+        return f'<MonthlyLedger {self.month} {self.source} {self.category}: {self.amount}>'
+
+
+class CarTotals(db.Model):
+    """Накопленные итоги по автомобилю (обновляются вместе с расходами, арендами и платежами)"""
+    __tablename__ = 'car_totals'
+    
+    car_id = db.Column(db.Integer, db.ForeignKey('cars.id'), primary_key=True)
+    total_expenses = db.Column(Money, nullable=False, default=0)  # Сумма расходов
+    total_income = db.Column(Money, nullable=False, default=0)    # Сумма платежей по аренде
+    rental_days = db.Column(db.Integer, nullable=False, default=0)   # Дней по договорам аренды
+    last_activity = db.Column(db.Date)                               # Дата последней операции
+    
+    @property
+    def profit(self):
+        return self.total_income - self.total_expenses
+    
+    def __repr__(self):
+        return f'<CarTotals Car:{self.car_id} {self.total_income} - {self.total_expenses}>'
+
+
+class DataVersion(db.Model):
+    """Счетчик версии данных: увеличивается при каждой записи через маршруты"""
+    __tablename__ = 'data_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.version}>'
+
+
+class JobRun(db.Model):
+    """Последний запуск фонового задания: кто и когда его начал и с каким итогом"""
+    __tablename__ = 'job_runs'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100))                  # Процесс последнего запуска (хост:pid)
+    started_at = db.Column(db.DateTime)                # Начало последнего запуска
+    finished_at = db.Column(db.DateTime)               # Окончание последнего запуска
+    duration_ms = db.Column(db.Integer)                # Длительность последнего запуска
+    result = db.Column(db.Text)                        # Итоги запуска (JSON)
+    error = db.Column(db.Text)                         # Ошибка последнего запуска
+    run_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<JobRun {self.name} {self.finished_at}>'
+
+
+
+class StockHold(db.Model):
+    """Временный резерв запчасти на время оформления продажи"""
+    __tablename__ = 'stock_holds'
+    __table_args__ = (
+        db.Index('ix_stock_holds_part_id_expires_at', 'part_id', 'expires_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    part_id = db.Column(db.Integer, db.ForeignKey('parts.id'), nullable=False)
+    token = db.Column(db.String(32), nullable=False, unique=True)  # Ключ резерва для формы продажи
+    quantity = db.Column(db.Integer, nullable=False)               # Зарезервировано штук
+    expires_at = db.Column(db.DateTime, nullable=False)            # Резерв снимается автоматически
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StockHold part={self.part_id} x{self.quantity} до {self.expires_at}>'
+
+
+# Профили загрузки связей для страниц: связи, которые шаблон читает у каждой
+# строки, подгружаются сразу (joinedload для many-to-one, selectinload для
+# коллекций), а не отдельным SELECT на строку.
+# Лямбды нужны потому, что обратные связи (backref) появляются только после
+# настройки мапперов.
+LOADER_PROFILES = {
+    # rent.html: активные аренды - клиент и автомобиль
+    'rent_active': lambda: (joinedload(Rental.client), joinedload(Rental.car)),
+    # rent.html: история аренд - клиент, автомобиль и сумма оплат
+    'rent_history': lambda: (joinedload(Rental.client), joinedload(Rental.car), selectinload(Rental.payments)),
+    # car_detail.html: аренды автомобиля - клиент и сумма оплат
+    'car_rentals': lambda: (joinedload(Rental.client), selectinload(Rental.payments)),
+    # parts.html: поставщик или запись о разборке
+    'parts': lambda: (joinedload(Part.supplier), joinedload(Part.disassembly_record)),
+    # disassembly.html: извлеченные запчасти
+    'disassembly': lambda: (selectinload(DisassemblyRecord.extracted_parts),),
+}
+
+
+def loader_options(profile):
+    """Опции загрузки связей для страницы из LOADER_PROFILES"""
+    return LOADER_PROFILES[profile]()
@@ -0,0 +1,76 @@
+import operator
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+# Денежные суммы хранятся в базе целым числом копеек (BIGINT), в Python -
+# Decimal с двумя знаками. Суммы SUM() считаются в базе точно, без
+# накопления ошибок float; результат агрегатов и выражений над столбцами
+# Money приходит уже в рублях (Decimal).
+
+CENT = Decimal('0.01')
+
+
+def to_decimal(value):
+    """Сумма в рублях как Decimal с двумя знаками (float - через строку, без хвостов двоичной дроби)"""
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def parse_money(value, default=None):
+    """Сумма из формы или файла: '1 234,50' -> Decimal('1234.50'). ValueError при ошибке"""
+    text = str(value if value is not None else '').strip().replace(' ', '').replace('\xa0', '').replace(',', '.')
+    if not text:
+        if default is not None:
+            return to_decimal(default)
+        raise ValueError('Не указана сумма')
+    try:
+        amount = to_decimal(text)
+    except InvalidOperation:
+        raise ValueError(f'Некорректная сумма: {value}')
+    if not amount.is_finite():
+        raise ValueError(f'Некорректная сумма: {value}')
+    return amount
+
+
+class Money(TypeDecorator):
+    """Денежный столбец: BIGINT с копейками в базе, Decimal в рублях в Python"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def _adapt_expression(self, op, other_comparator):
+            # Сумма, разность и произведение на количество - тоже деньги:
+            # без этого SUM(price * quantity) вернул бы копейки целым числом
+            if op in (operator.add, operator.sub, operator.mul):
+                return op, self.type
+            return super()._adapt_expression(op, other_comparator)
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(to_decimal(value).scaleb(2))
+
+    def process_literal_param(self, value, dialect):
+        return str(self.process_bind_param(value, dialect))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, float):
+            value = round(value)
+        return Decimal(value).scaleb(-2).quantize(CENT)
+
+
+class MoneyJSONProvider(DefaultJSONProvider):
+    """JSON для API и tojson: Decimal отдается числом, а не строкой"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return DefaultJSONProvider.default(o)
@@ -0,0 +1,78 @@
+from sqlalchemy import Integer, bindparam, func, insert, select, update
+
+from app import db
+from models import Sale, SalesOrder
+from money import Money, parse_money
+from inventory import StockError, take_stock_batch
+from ledger import record_entry, SOURCE_PARTS
+
+
+def parse_order_lines(form):
+    """Строки заказа из формы: параллельные списки part_id, quantity, price"""
+    part_ids = form.getlist('part_id')
+    quantities = form.getlist('quantity')
+    prices = form.getlist('price')
+    if not (len(part_ids) == len(quantities) == len(prices)):
+        raise StockError('Строки заказа заполнены не полностью')
+
+    lines = []
+    for part_id, quantity, price in zip(part_ids, quantities, prices):
+        try:
+            line = {'part_id': int(part_id), 'quantity': int(quantity), 'price': parse_money(price)}
+        except ValueError:
+            raise StockError('Некорректные количество или цена в строке заказа')
+        if line['quantity'] <= 0 or line['price'] < 0:
+            raise StockError('Количество должно быть больше нуля, цена - не меньше нуля')
+        lines.append(line)
+    if not lines:
+        raise StockError('Не выбрано ни одной запчасти')
+    return lines
+
+
+def create_order(lines, order_date, customer_name='', description='', hold_tokens=()):
+    """Оформляет заказ из нескольких строк в текущей транзакции.
+
+    Склад списывается одним UPDATE на все запчасти, строки (Sale) вставляются
+    одним executemany, суммы строк и заказа считает база. Число запросов не
+    зависит от количества строк. Фиксирует транзакцию вызывающий.
+    """
+    quantities = {}
+    for line in lines:
+        quantities[line['part_id']] = quantities.get(line['part_id'], 0) + line['quantity']
+    take_stock_batch(quantities, hold_tokens)
+
+    order = SalesOrder(order_date=order_date, customer_name=customer_name, description=description)
+    db.session.add(order)
+    db.session.flush()
+
+    sales = Sale.__table__
+    # Цена строки передается в копейках, сумму строки считает база. У
+    # количества свой тип: иначе в произведении с Money оно тоже стало бы
+    # суммой и ушло бы в базу умноженным на 100
+    line_price = bindparam('line_price', type_=Money())
+    line_quantity = bindparam('line_quantity', type_=Integer())
+    db.session.execute(
+        insert(sales).values(
+            order_id=order.id,
+            part_id=bindparam('line_part_id'),
+            quantity_sold=line_quantity,
+            sale_price=line_price,
+            total_amount=line_price * line_quantity,
+            sale_date=order_date,
+            customer_name=customer_name,
+            description=description,
+        ),
+        [{'line_part_id': line['part_id'], 'line_quantity': line['quantity'], 'line_price': line['price']}
+         for line in lines]
+    )
+
+    orders = SalesOrder.__table__
+    line_totals = select(func.coalesce(func.sum(sales.c.total_amount), 0)).where(sales.c.order_id == order.id)
+    total = db.session.execute(
+        update(orders).where(orders.c.id == order.id)
+        .values(total_amount=line_totals.scalar_subquery())
+        .returning(orders.c.total_amount)
+    ).scalar_one()
+
+    record_entry(order_date, SOURCE_PARTS, total)
+    return order, total
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import abort, request, url_for
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class KeysetPage:
+    """Одна страница выборки с курсором на следующую"""
+
+    def __init__(self, items, next_cursor, page_size, cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+
+def encode_cursor(values):
+    """Курсор - значения ключа сортировки последней строки страницы"""
+    payload = [['dt', value.isoformat()] if isinstance(value, datetime) else ['v', value] for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Значения ключа из курсора; ValueError, если курсор поврежден или подделан"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(payload, list):
+        raise ValueError('Курсор должен быть списком значений')
+
+    values = []
+    for item in payload:
+        if not isinstance(item, list) or len(item) != 2:
+            raise ValueError('Некорректное значение курсора')
+        kind, value = item
+        if kind == 'dt' and isinstance(value, str):
+            values.append(datetime.fromisoformat(value))
+        elif kind == 'v' and (value is None or isinstance(value, (str, int, float))):
+            values.append(value)
+        else:
+            raise ValueError('Некорректное значение курсора')
+    return values
+
+
+def page_size_arg():
+    """Размер страницы из параметра page_size с ограничением сверху"""
+    try:
+        page_size = int(request.args.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def paginate_keyset(query, order_columns, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Постраничная выборка по ключу (keyset) вместо OFFSET.
+
+    order_columns - выражения сортировки, все по убыванию; последним должен
+    идти уникальный столбец (id). Курсор хранит значения этих выражений для
+    последней показанной строки, следующая страница начинается строго после нее.
+    Поврежденный курсор или курсор от другой сортировки - ответ 400.
+    """
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+        except ValueError:
+            abort(400, description='Некорректный курсор страницы')
+        if len(values) != len(order_columns):
+            abort(400, description='Курсор не подходит к этой выборке')
+        query = query.filter(tuple_(*order_columns) < tuple(values))
+
+    key = query.add_columns(*order_columns) \
+        .order_by(*[column.desc() for column in order_columns]) \
+        .limit(page_size + 1).all()
+
+    rows = key[:page_size]
+    items = [row[0] for row in rows]
+    next_cursor = encode_cursor(list(rows[-1][1:])) if len(key) > page_size else None
+
+    return KeysetPage(items, next_cursor, page_size, cursor)
+
+
+def page_url(cursor=None):
+    """Ссылка на ту же страницу с другим курсором и прежними фильтрами"""
+    args = request.args.to_dict()
+    args.pop('cursor', None)
+    if cursor:
+        args['cursor'] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+def init_app(app):
+    app.add_template_global(page_url)
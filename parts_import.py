@@ -0,0 +1,288 @@
+import csv
+import io
+import itertools
+import os
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from models import Part, Supplier, DisassemblyRecord
+from money import Money, parse_money
+from search import index_inserted_parts
+from versioning import bump_data_version
+from kpi_cache import kpi_cache, METRIC_TOTAL_PARTS
+
+# Заголовки колонок файла: английские имена полей или подписи из интерфейса
+COLUMN_ALIASES = {
+    'name': 'name', 'наименование': 'name', 'название': 'name',
+    'code': 'code', 'код': 'code', 'код запчасти': 'code',
+    'quantity': 'quantity', 'количество': 'quantity', 'кол-во': 'quantity',
+    'price': 'price', 'цена': 'price',
+    'description': 'description', 'описание': 'description',
+    'location': 'location', 'местоположение': 'location',
+}
+REQUIRED_COLUMNS = ('name', 'quantity', 'price')
+
+# Сколько строк вставляется одним executemany и фиксируется одной транзакцией
+DEFAULT_BATCH_SIZE = 500
+
+
+class ImportResult:
+    """Итог импорта: сколько добавлено и обновлено, ошибки по строкам файла"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+    @property
+    def summary(self):
+        return f'добавлено {self.inserted}, обновлено {self.updated}, ошибок {len(self.errors)}'
+
+
+def map_header(header):
+    columns = [COLUMN_ALIASES.get(str(title or '').strip().lower()) for title in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f'В файле нет обязательных колонок: {", ".join(missing)}')
+    return columns
+
+
+def read_csv(stream):
+    """Строки CSV по одной: (номер строки, словарь значений). Разделитель - запятая, точка с запятой или табуляция"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    header_line = text.readline()
+    try:
+        dialect = csv.Sniffer().sniff(header_line, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(itertools.chain([header_line], text), dialect)
+    columns = map_header(next(reader, []))
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield reader.line_num, {column: value for column, value in zip(columns, values) if column}
+
+
+def read_xlsx(stream):
+    """Строки первого листа XLSX по одной, без загрузки книги целиком (нужен openpyxl)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Для импорта XLSX нужен пакет openpyxl')
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns = map_header(next(rows, ()))
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield line, {column: value for column, value in zip(columns, values) if column}
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return read_csv(stream)
+    if extension == '.xlsx':
+        return read_xlsx(stream)
+    raise ValueError('Поддерживаются файлы CSV и XLSX')
+
+
+def text_value(raw, column):
+    value = raw.get(column)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_row(raw):
+    """Проверяет строку файла и приводит значения к типам модели Part"""
+    name = text_value(raw, 'name')
+    if not name:
+        raise ValueError('Не указано наименование')
+
+    quantity = raw.get('quantity')
+    try:
+        if isinstance(quantity, float) and quantity.is_integer():
+            quantity = int(quantity)
+        quantity = int(str(quantity).strip())
+    except ValueError:
+        raise ValueError(f'Некорректное количество: {quantity}')
+    if quantity < 0:
+        raise ValueError('Количество не может быть отрицательным')
+
+    price = raw.get('price')
+    try:
+        price = parse_money(price)
+    except ValueError:
+        raise ValueError(f'Некорректная цена: {price}')
+    if price < 0:
+        raise ValueError('Цена не может быть отрицательной')
+
+    return {
+        'name': name,
+        'code': text_value(raw, 'code'),
+        'quantity': quantity,
+        'price': price,
+        'description': text_value(raw, 'description') or '',
+        'location': text_value(raw, 'location') or '',
+    }
+
+
+class PartImporter:
+    """Пакетный импорт запчастей от поставщика или с разборки.
+
+    Строки читаются потоком, проверяются и собираются в пачки по batch_size.
+    Каждая пачка - один executemany и одна транзакция. Коды запчастей
+    уникальны: повтор кода в файле - ошибка строки; код, который уже есть
+    на складе, - ошибка строки или, с update_existing, пополнение остатка и
+    новая цена. Ошибочные строки попадают в отчет, остальные импортируются.
+    """
+
+    def __init__(self, supplier_id=None, disassembly_record_id=None, update_existing=False,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        if (supplier_id is None) == (disassembly_record_id is None):
+            raise ValueError('Укажите поставщика или запись о разборке')
+        if supplier_id is not None and db.session.get(Supplier, supplier_id) is None:
+            raise ValueError(f'Поставщик {supplier_id} не найден')
+        if disassembly_record_id is not None and db.session.get(DisassemblyRecord, disassembly_record_id) is None:
+            raise ValueError(f'Запись о разборке {disassembly_record_id} не найдена')
+
+        self.supplier_id = supplier_id
+        self.disassembly_record_id = disassembly_record_id
+        self.update_existing = update_existing
+        self.batch_size = batch_size
+        self.result = ImportResult()
+
+    def run(self, rows):
+        seen_codes = {}
+        batch = []
+        try:
+            for line, raw in rows:
+                try:
+                    values = parse_row(raw)
+                except ValueError as e:
+                    self.result.add_error(line, str(e))
+                    continue
+
+                code = values['code']
+                if code is not None:
+                    if code in seen_codes:
+                        self.result.add_error(line, f'Код {code} уже встречался в строке {seen_codes[code]}')
+                        continue
+                    seen_codes[code] = line
+
+                batch.append((line, values))
+                if len(batch) >= self.batch_size:
+                    self.flush(batch)
+                    batch = []
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            # Файл не читается дальше: уже записанные пачки остаются
+            self.result.add_error(None, f'Ошибка чтения файла: {e}')
+
+        if batch:
+            self.flush(batch)
+        if self.result.inserted or self.result.updated:
+            kpi_cache.invalidate(METRIC_TOTAL_PARTS)
+        return self.result
+
+    def flush(self, batch):
+        codes = [values['code'] for _, values in batch if values['code'] is not None]
+        existing = {}
+        if codes:
+            existing = dict(db.session.execute(select(Part.code, Part.id).where(Part.code.in_(codes))).all())
+
+        new_rows = []
+        updates = []
+        for line, values in batch:
+            part_id = existing.get(values['code'])
+            if part_id is None:
+                new_rows.append((line, values))
+            elif self.update_existing:
+                updates.append((line, {'part_id': part_id, 'add_quantity': values['quantity'],
+                                       'new_price': values['price']}))
+            else:
+                self.result.add_error(line, f'Запчасть с кодом {values["code"]} уже есть на складе')
+
+        try:
+            with db.session.begin_nested():
+                self.write(new_rows, updates)
+        except SQLAlchemyError:
+            # Пачка не записалась (например, тот же код только что добавили
+            # параллельно) - повторяем по одной строке, чтобы найти виновную
+            for row in new_rows:
+                self.write_single([row], [])
+            for row in updates:
+                self.write_single([], [row])
+
+        bump_data_version()
+        db.session.commit()
+
+    def write_single(self, new_rows, updates):
+        line = (new_rows or updates)[0][0]
+        try:
+            with db.session.begin_nested():
+                self.write(new_rows, updates)
+        except SQLAlchemyError as e:
+            self.result.add_error(line, f'Ошибка записи: {e.orig if getattr(e, "orig", None) else e}')
+
+    def write(self, new_rows, updates):
+        if new_rows:
+            params = [dict(values, supplier_id=self.supplier_id, disassembly_record_id=self.disassembly_record_id)
+                      for _, values in new_rows]
+            # Один executemany на пачку: RETURNING с порядком строк SQLite
+            # выполняет построчно, поэтому id для индекса берутся из rowid
+            db.session.execute(insert(Part), params)
+            index_inserted_parts(params)
+
+        if updates:
+            parts = Part.__table__
+            db.session.execute(
+                update(parts).where(parts.c.id == bindparam('part_id')).values(
+                    quantity=func.coalesce(parts.c.quantity, 0) + bindparam('add_quantity'),
+                    price=bindparam('new_price', type_=Money()),
+                ),
+                [values for _, values in updates]
+            )
+
+        self.result.inserted += len(new_rows)
+        self.result.updated += len(updates)
+
+
+def import_parts(stream, filename, **options):
+    """Импорт запчастей из файла CSV/XLSX. Возвращает ImportResult"""
+    importer = PartImporter(**options)
+    return importer.run(read_rows(stream, filename))
+
+
+@click.command('import-parts')
+@with_appcontext
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--supplier-id', type=int, help='поставщик, от которого пришли запчасти')
+@click.option('--disassembly-record-id', type=int, help='запись о разборке, с которой сняты запчасти')
+@click.option('--update-existing', is_flag=True, help='пополнять остаток и обновлять цену для известных кодов')
+@click.option('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, show_default=True, help='строк в одной пачке')
+def import_parts_command(path, supplier_id, disassembly_record_id, update_existing, batch_size):
+    """Импортировать запчасти из файла CSV или XLSX"""
+    try:
+        with open(path, 'rb') as f:
+            result = import_parts(f, path, supplier_id=supplier_id, disassembly_record_id=disassembly_record_id,
+                                  update_existing=update_existing, batch_size=batch_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    for line, message in result.errors:
+        print(f'Строка {line}: {message}' if line else message)
+    print(f'Импорт завершен: {result.summary}')
+
+
+def init_app(app):
+    app.cli.add_command(import_parts_command)
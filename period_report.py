@@ -0,0 +1,240 @@
+from datetime import date
+from functools import cache
+
+from sqlalchemy import func, extract
+
+from app import db
+from models import Car, Expense, Rental, Payment, Part, Sale
+
+# Строк в одной таблице отчета (примерно страница A4)
+ROWS_PER_TABLE = 40
+# Размер пачки строк, которую база отдает за раз при потоковом чтении
+BATCH_SIZE = 500
+TOP_PARTS_LIMIT = 50
+
+# ReportLab импортируется внутри функций: модуль загружается при старте
+# приложения, а библиотека нужна только потоку, который строит отчет
+
+
+@cache
+def table_style():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+    ])
+
+
+class FlowableStream(list):
+    """Список flowable, который пополняется из итератора по мере верстки.
+
+    Platypus забирает элементы из начала списка по одному, поэтому в памяти
+    держится только текущая порция (одна таблица), а не весь отчет.
+    """
+
+    def __init__(self, chunks):
+        super().__init__()
+        self.chunks = iter(chunks)
+
+    def refill(self):
+        # Держим минимум два элемента, чтобы keepWithNext видел следующий
+        while list.__len__(self) < 2:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return
+            self.extend(chunk)
+
+    def __len__(self):
+        self.refill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self.refill()
+        return list.__getitem__(self, index)
+
+
+def parse_period_params(form):
+    """Параметры отчета за период из формы: start_date и end_date"""
+    try:
+        start = date.fromisoformat(form.get('start_date', ''))
+        end = date.fromisoformat(form.get('end_date', ''))
+    except ValueError:
+        raise ValueError('Укажите даты начала и окончания периода')
+    if start > end:
+        raise ValueError('Дата начала позже даты окончания')
+    return {'start': start.isoformat(), 'end': end.isoformat()}
+
+
+def money(value):
+    return f'{value or 0:.2f}'
+
+
+def table_chunks(header, rows, col_widths):
+    """Режет поток строк на таблицы по ROWS_PER_TABLE строк с шапкой"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == ROWS_PER_TABLE:
+            yield [make_table(header, batch, col_widths)]
+            batch = []
+    if batch:
+        yield [make_table(header, batch, col_widths)]
+
+
+def make_table(header, rows, col_widths):
+    from reportlab.platypus import Table
+
+    table = Table([header] + rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(table_style())
+    return table
+
+
+def monthly_rows(start, end):
+    """Доходы и расходы по месяцам периода: три сгруппированных запроса"""
+    sources = [
+        ('rental', Payment.payment_date, Payment.amount),
+        ('parts', Sale.sale_date, Sale.total_amount),
+        ('expense', Expense.date, Expense.amount),
+    ]
+    months = {}
+    for source, date_column, amount_column in sources:
+        year = extract('year', date_column)
+        month = extract('month', date_column)
+        query = db.session.query(year, month, func.sum(amount_column)).filter(
+            date_column >= start, date_column <= end
+        ).group_by(year, month)
+        for row_year, row_month, amount in query:
+            key = (int(row_year), int(row_month))
+            months.setdefault(key, {'rental': 0, 'parts': 0, 'expense': 0})[source] = amount or 0
+    return [(f'{year}-{month:02d}', values) for (year, month), values in sorted(months.items())]
+
+
+def expense_category_rows(start, end):
+    return db.session.query(Expense.category, func.sum(Expense.amount)).filter(
+        Expense.date >= start, Expense.date <= end
+    ).group_by(Expense.category).order_by(func.sum(Expense.amount).desc()).all()
+
+
+def top_parts_rows(start, end):
+    revenue = func.sum(Sale.total_amount)
+    return db.session.query(Part.name, Part.code, func.sum(Sale.quantity_sold), revenue).join(
+        Sale, Sale.part_id == Part.id
+    ).filter(
+        Sale.sale_date >= start, Sale.sale_date <= end
+    ).group_by(Part.id, Part.name, Part.code).order_by(revenue.desc()).limit(TOP_PARTS_LIMIT).all()
+
+
+def car_pnl_rows(start, end):
+    """Прибыль по каждому автомобилю за период, потоком пачками по BATCH_SIZE"""
+    expenses = db.session.query(
+        Expense.car_id.label('car_id'), func.sum(Expense.amount).label('total')
+    ).filter(Expense.date >= start, Expense.date <= end).group_by(Expense.car_id).subquery()
+
+    income = db.session.query(
+        Rental.car_id.label('car_id'), func.sum(Payment.amount).label('total')
+    ).join(Payment, Payment.rental_id == Rental.id).filter(
+        Payment.payment_date >= start, Payment.payment_date <= end
+    ).group_by(Rental.car_id).subquery()
+
+    total_expenses = func.coalesce(expenses.c.total, 0)
+    total_income = func.coalesce(income.c.total, 0)
+
+    query = db.session.query(
+        Car.brand, Car.model, Car.year, Car.vin, total_income, total_expenses
+    ).outerjoin(expenses, expenses.c.car_id == Car.id) \
+     .outerjoin(income, income.c.car_id == Car.id) \
+     .order_by(Car.id).yield_per(BATCH_SIZE)
+
+    for brand, model, year, vin, car_income, car_expenses in query:
+        yield [f'{brand} {model} ({year})', vin or '-', money(car_income), money(car_expenses),
+               money(car_income - car_expenses)]
+
+
+def report_story(start, end, styles):
+    """Генератор порций отчета: каждая порция - список flowable"""
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, PageBreak
+
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=16, spaceAfter=20, alignment=1)
+
+    months = monthly_rows(start, end)
+    total_rental = sum(values['rental'] for _, values in months)
+    total_parts = sum(values['parts'] for _, values in months)
+    total_expenses = sum(values['expense'] for _, values in months)
+    total_income = total_rental + total_parts
+
+    yield [
+        Paragraph("Отчет по прибыльности автобизнеса за период", title_style),
+        Paragraph(f"Период: {start.strftime('%d.%m.%Y')} - {end.strftime('%d.%m.%Y')}", styles['Normal']),
+        Spacer(1, 20),
+        make_table(['Показатель', 'Значение'], [
+            ['Доходы от аренды, руб.', money(total_rental)],
+            ['Доходы от продажи запчастей, руб.', money(total_parts)],
+            ['Расходы, руб.', money(total_expenses)],
+            ['Прибыль, руб.', money(total_income - total_expenses)],
+        ], [4*inch, 2*inch]),
+        Spacer(1, 20),
+    ]
+
+    yield [Paragraph("Доходы и расходы по месяцам", styles['Heading2'])]
+    yield from table_chunks(
+        ['Месяц', 'Аренда', 'Запчасти', 'Расходы', 'Прибыль'],
+        ([month, money(v['rental']), money(v['parts']), money(v['expense']),
+          money(v['rental'] + v['parts'] - v['expense'])] for month, v in months),
+        [1.2*inch, 1.3*inch, 1.3*inch, 1.3*inch, 1.3*inch]
+    )
+
+    yield [Spacer(1, 20), Paragraph("Расходы по категориям", styles['Heading2'])]
+    yield from table_chunks(
+        ['Категория', 'Сумма', 'Доля'],
+        ([category, money(amount), f'{(amount / total_expenses * 100) if total_expenses else 0:.1f}%']
+         for category, amount in expense_category_rows(start, end)),
+        [2.5*inch, 1.5*inch, 1*inch]
+    )
+
+    yield [Spacer(1, 20), Paragraph(f"Самые продаваемые запчасти (топ-{TOP_PARTS_LIMIT})", styles['Heading2'])]
+    yield from table_chunks(
+        ['Запчасть', 'Код', 'Продано, шт.', 'Выручка'],
+        ([name, code or '-', str(quantity), money(revenue)]
+         for name, code, quantity, revenue in top_parts_rows(start, end)),
+        [2.5*inch, 1.3*inch, 1*inch, 1.3*inch]
+    )
+
+    yield [PageBreak(), Paragraph("Прибыль по автомобилям", styles['Heading2'])]
+    yield from table_chunks(
+        ['Автомобиль', 'VIN', 'Доходы', 'Расходы', 'Прибыль'],
+        car_pnl_rows(start, end),
+        [2*inch, 1.5*inch, 1.1*inch, 1.1*inch, 1.1*inch]
+    )
+
+
+def draw_page_number(canvas, doc):
+    from reportlab.lib.pagesizes import A4
+
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.drawRightString(A4[0] - doc.rightMargin, doc.bottomMargin / 2, str(doc.page))
+    canvas.restoreState()
+
+
+def build_period_pdf(params, output):
+    """Многостраничный отчет за период params['start']..params['end'] в поток output"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate
+
+    start = date.fromisoformat(params['start'])
+    end = date.fromisoformat(params['end'])
+
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    story = FlowableStream(report_story(start, end, getSampleStyleSheet()))
+    doc.build(story, onFirstPage=draw_page_number, onLaterPages=draw_page_number)
@@ -0,0 +1,36 @@
+from app import db
+from models import Car, CarTotals, Part
+from sqlalchemy import func, case, and_
+
+
+def garage_financial_summary():
+    """Финансовая сводка по всем автомобилям гаража одним запросом.
+
+    Суммы берутся из накопленных итогов car_totals, а не из истории операций.
+    Возвращает список кортежей (car, total_expenses, total_income, profit).
+    """
+    total_expenses = func.coalesce(CarTotals.total_expenses, 0)
+    total_income = func.coalesce(CarTotals.total_income, 0)
+
+    rows = db.session.query(
+        Car,
+        total_expenses.label('total_expenses'),
+        total_income.label('total_income'),
+        (total_income - total_expenses).label('profit')
+    ).outerjoin(CarTotals, CarTotals.car_id == Car.id) \
+     .order_by(Car.id).all()
+
+    return rows
+
+
+def parts_stock_summary(parts_query):
+    """Итоги по складу для отфильтрованного запроса запчастей одним запросом"""
+    quantity = func.coalesce(Part.quantity, 0)
+    row = parts_query.order_by(None).with_entities(
+        func.count(Part.id).label('positions'),
+        func.coalesce(func.sum(quantity), 0).label('total_quantity'),
+        func.coalesce(func.sum(Part.price * quantity), 0).label('total_value'),
+        func.coalesce(func.sum(case((and_(quantity > 0, quantity < 5), 1), else_=0)), 0).label('low_stock'),
+        func.coalesce(func.sum(case((quantity == 0, 1), else_=0)), 0).label('out_of_stock')
+    ).one()
+    return row
@@ -0,0 +1,46 @@
+import logging
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Страница выполнила больше SQL-запросов, чем ей разрешено"""
+
+
+def query_budget(limit):
+    """Декоратор: максимальное число SQL-запросов за один запрос к странице"""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def check_query_budget(response):
+    """Проверяет бюджет запросов страницы.
+
+    В тестах (TESTING или QUERY_BUDGET_STRICT) превышение - ошибка,
+    в остальных случаях - предупреждение в лог.
+    """
+    view = current_app.view_functions.get(request.endpoint)
+    limit = getattr(view, 'query_budget', None)
+    count = g.get('query_count', 0)
+    if limit is not None and count > limit:
+        message = f'{request.endpoint}: {count} SQL-запросов при бюджете {limit}'
+        if current_app.config.get('QUERY_BUDGET_STRICT', current_app.testing):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+
+def init_app(app):
+    app.after_request(check_query_budget)
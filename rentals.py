@@ -0,0 +1,79 @@
+from datetime import date
+
+from sqlalchemy import exists, func, select, update
+
+from app import db
+from models import Car, Payment, Rental
+
+# Жизненный цикл аренд: завершение просроченных, статусы автомобилей и
+# остатки к оплате. Все пересчеты - UPDATE по условию в самой базе, без
+# загрузки строк в ORM. Таблица аренд обходится диапазонами первичного
+# ключа по batch_size строк с коммитом после каждой пачки, чтобы запись не
+# держала блокировку долго и не мешала маршрутам.
+
+# Сколько строк аренд обновляется одним UPDATE
+BATCH_SIZE = 1000
+
+
+def record_rental_payment(payment):
+    """Уменьшает остаток к оплате аренды в рамках текущей транзакции"""
+    db.session.execute(
+        update(Rental).where(Rental.id == payment.rental_id)
+        .values(balance_due=Rental.balance_due - payment.amount)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def batched_update(statement, id_column, batch_size=BATCH_SIZE):
+    """Выполняет UPDATE пачками по диапазонам id с коммитом после каждой. Возвращает число измененных строк"""
+    low, high = db.session.query(func.min(id_column), func.max(id_column)).one()
+    if low is None:
+        return 0
+    statement = statement.execution_options(synchronize_session=False)
+    changed = 0
+    for start in range(low, high + 1, batch_size):
+        changed += db.session.execute(statement.where(id_column >= start, id_column < start + batch_size)).rowcount
+        db.session.commit()
+    return changed
+
+
+def complete_overdue_rentals(today=None, batch_size=BATCH_SIZE):
+    """Завершает активные аренды, срок которых истек (день окончания уже прошел)"""
+    today = today or date.today()
+    statement = update(Rental).where(Rental.status == 'active', Rental.end_date < today) \
+        .values(status='completed')
+    return batched_update(statement, Rental.id, batch_size)
+
+
+def sync_car_statuses():
+    """Статус автомобиля по арендам: rented, пока есть активная аренда, иначе active.
+
+    Разобранные автомобили не трогаются. Возвращает число исправленных строк.
+    """
+    has_active_rental = exists().where(Rental.car_id == Car.id, Rental.status == 'active')
+    changed = 0
+    for status, condition in (('active', ~has_active_rental), ('rented', has_active_rental)):
+        opposite = 'rented' if status == 'active' else 'active'
+        changed += db.session.execute(
+            update(Car).where(Car.status == opposite, condition).values(status=status)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    db.session.commit()
+    return changed
+
+
+def recompute_rental_balances(batch_size=BATCH_SIZE):
+    """Пересчитывает остаток к оплате из платежей там, где он разошелся"""
+    paid = select(func.coalesce(func.sum(Payment.amount), 0)) \
+        .where(Payment.rental_id == Rental.id).scalar_subquery()
+    expected = Rental.total_amount - paid
+    statement = update(Rental).where(Rental.balance_due != expected).values(balance_due=expected)
+    return batched_update(statement, Rental.id, batch_size)
+
+
+def unpaid_rentals():
+    """Завершенные аренды с долгом: (количество, сумма долга)"""
+    count, total = db.session.query(func.count(Rental.id), func.coalesce(func.sum(Rental.balance_due), 0)).filter(
+        Rental.status == 'completed', Rental.balance_due > 0
+    ).one()
+    return count, total
@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+
+# Чтение из реплики. Если задан DATABASE_REPLICA_URL, у db появляется
+# второй bind "replica" со своим пулом соединений. Маршруты, отмеченные
+# @read_replica (аналитика, выгрузки, гараж, GET /api/v1), и отчеты,
+# которые они ставят в очередь, читают из него, запись всегда идет в
+# основную базу. Реплика отстает от основной базы, поэтому после записи
+# клиент еще REPLICA_STALENESS_SECONDS читает из основной: время последней
+# записи хранится в сессии (cookie), и страница после редиректа показывает
+# только что сохраненное.
+
+REPLICA_BIND = 'replica'
+
+# Ключ сессии со временем последней записи клиента
+LAST_WRITE_KEY = 'last_write_at'
+
+
+def read_replica(view):
+    """Декоратор: маршрут только читает данные и может обслуживаться репликой"""
+    view.read_replica = True
+    return view
+
+
+def replica_configured():
+    return REPLICA_BIND in current_app.extensions['sqlalchemy'].engines
+
+
+def reading_replica():
+    """Чтения текущего запроса (или задания в его контексте) идут в реплику"""
+    return has_app_context() and g.get('use_replica', False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Чтения внутри блока - из реплики, если она настроена"""
+    previous = g.get('use_replica', False)
+    g.use_replica = enabled and replica_configured()
+    try:
+        yield
+    finally:
+        g.use_replica = previous
+
+
+class RoutingSession(Session):
+    """Сессия db: чтения при g.use_replica - в реплику, flush и INSERT/UPDATE/DELETE - в основную базу"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                # Запись отмечается, чтобы клиент какое-то время читал из основной базы
+                g.wrote_primary = True
+            elif g.get('use_replica'):
+                engine = self._db.engines.get(REPLICA_BIND)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def recently_wrote():
+    last_write = session.get(LAST_WRITE_KEY)
+    return last_write is not None and time.time() - last_write < current_app.config['REPLICA_STALENESS_SECONDS']
+
+
+def route_reads():
+    """Отмеченные маршруты читают из реплики, если клиент недавно ничего не записывал"""
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'read_replica', False) and replica_configured() and not recently_wrote():
+        g.use_replica = True
+
+
+def remember_write(response):
+    if g.get('wrote_primary') and replica_configured():
+        session[LAST_WRITE_KEY] = time.time()
+    return response
+
+
+def init_app(app):
+    app.before_request(route_reads)
+    app.after_request(remember_write)
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import func
+
+from app import db
+from models import Car, Rental, Part
+from ledger import month_summary
+from versioning import current_data_version
+from replica import reading_replica, replica_reads
+from period_report import build_period_pdf, parse_period_params
+
+
+def build_dashboard_pdf(params, output):
+    """Отчет по прибыльности: основные показатели на дату params['date']"""
+    # ReportLab загружается при первом построении отчета, а не при старте воркера
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+
+    report_date = date.fromisoformat(params['date'])
+
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    story = []
+
+    # Стили
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Центрирование
+    )
+
+    # Заголовок
+    story.append(Paragraph("Отчет по прибыльности автобизнеса", title_style))
+    story.append(Spacer(1, 20))
+
+    # Период отчета
+    story.append(Paragraph(f"Период: {report_date.strftime('%d.%m.%Y')}", styles['Normal']))
+    story.append(Spacer(1, 20))
+
+    # Общая статистика
+    total_cars = Car.query.filter_by(status='active').count()
+    active_rentals = Rental.query.filter_by(status='active').count()
+    total_parts = db.session.query(func.sum(Part.quantity)).scalar() or 0
+
+    # Доходы и расходы за месяц отчета (из месячной свертки)
+    monthly_rental_income, monthly_parts_income, monthly_expenses = month_summary(report_date.replace(day=1))
+
+    monthly_income = monthly_rental_income + monthly_parts_income
+    monthly_profit = monthly_income - monthly_expenses
+
+    # Таблица с основными показателями
+    data = [
+        ['Показатель', 'Значение'],
+        ['Активных автомобилей', str(total_cars)],
+        ['Активных аренд', str(active_rentals)],
+        ['Запчастей на складе', str(total_parts)],
+        ['Доходы за месяц, руб.', f"{monthly_income:.2f}"],
+        ['Расходы за месяц, руб.', f"{monthly_expenses:.2f}"],
+        ['Прибыль за месяц, руб.', f"{monthly_profit:.2f}"]
+    ]
+
+    table = Table(data, colWidths=[4*inch, 2*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    story.append(table)
+
+    doc.build(story)
+
+
+# Виды отчетов: разбор параметров из формы, построитель (пишет PDF в файловый
+# объект) и имя файла для скачивания
+REPORT_TYPES = {
+    'dashboard': {
+        'params': lambda form: {'date': date.today().isoformat()},
+        'build': build_dashboard_pdf,
+        'filename': lambda params: f"report_{params['date'].replace('-', '')}.pdf",
+    },
+    'period': {
+        'params': parse_period_params,
+        'build': build_period_pdf,
+        'filename': lambda params: f"report_{params['start'].replace('-', '')}_{params['end'].replace('-', '')}.pdf",
+    },
+}
+
+
+class ReportPipeline:
+    """Фоновое построение PDF-отчетов с кэшем на диске.
+
+    Отчет адресуется хешем от вида, параметров и версии данных: пока данные
+    не менялись, повторный запрос отдает готовый файл без пересчета. Файлы
+    общие для всех воркеров, очередь заданий - своя в каждом процессе.
+    """
+
+    def __init__(self, directory=None, workers=2, max_age_days=7):
+        self.app = None
+        self.directory = directory
+        self.max_age_days = max_age_days
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reports')
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def init_app(self, app):
+        """Каталог кэша и число потоков из настроек; отчеты строятся в контексте app"""
+        self.app = app
+        self.directory = app.config['REPORTS_DIR']
+        self.max_age_days = app.config['REPORT_CACHE_MAX_AGE_DAYS']
+        self.executor = ThreadPoolExecutor(max_workers=app.config['REPORT_WORKERS'], thread_name_prefix='reports')
+
+    def report_key(self, kind, params, data_version):
+        payload = json.dumps({'kind': kind, 'params': params, 'data_version': data_version}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def pdf_path(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def meta_path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def request(self, kind, params):
+        """Ставит отчет в очередь, если его еще нет в кэше. Возвращает ключ отчета"""
+        if kind not in REPORT_TYPES:
+            raise ValueError(f'Неизвестный вид отчета: {kind}')
+        key = self.report_key(kind, params, current_data_version())
+        # Отчет читает из той же базы, что и запросивший его маршрут
+        replica = reading_replica()
+
+        with self.lock:
+            if os.path.exists(self.pdf_path(key)):
+                return key
+            job = self.jobs.get(key)
+            if job is None or (job.done() and job.exception() is not None):
+                self.jobs[key] = self.executor.submit(self.run, key, kind, params, replica)
+        return key
+
+    def run(self, key, kind, params, replica=False):
+        os.makedirs(self.directory, exist_ok=True)
+        self.prune()
+
+        # Пишем во временные файлы и атомарно переименовываем. PDF строится
+        # сразу в файл, без промежуточной копии в памяти
+        meta = {'kind': kind, 'params': params, 'filename': REPORT_TYPES[kind]['filename'](params)}
+        meta_tmp = self.write_tmp(self.meta_path(key), lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode()))
+
+        def build(f):
+            with self.app.app_context(), replica_reads(replica):
+                REPORT_TYPES[kind]['build'](params, f)
+
+        try:
+            pdf_tmp = self.write_tmp(self.pdf_path(key), build)
+        except Exception:
+            os.remove(meta_tmp)
+            raise
+        os.replace(meta_tmp, self.meta_path(key))
+        os.replace(pdf_tmp, self.pdf_path(key))
+
+    def write_tmp(self, path, write):
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def status(self, key):
+        """Состояние отчета: ready, pending, error или unknown"""
+        if os.path.exists(self.pdf_path(key)):
+            return {'status': 'ready'}
+        with self.lock:
+            job = self.jobs.get(key)
+        if job is None:
+            return {'status': 'unknown'}
+        if not job.done():
+            return {'status': 'pending'}
+        error = job.exception()
+        if error is not None:
+            return {'status': 'error', 'message': str(error)}
+        return {'status': 'ready'}
+
+    def download_name(self, key):
+        try:
+            with open(self.meta_path(key), encoding='utf-8') as f:
+                return json.load(f)['filename']
+        except (OSError, ValueError, KeyError):
+            return f'report_{key[:12]}.pdf'
+
+    def prune(self):
+        """Удаляет из кэша отчеты старше max_age_days"""
+        deadline = time.time() - self.max_age_days * 86400
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+report_pipeline = ReportPipeline()
+
+
+def init_app(app):
+    report_pipeline.init_app(app)
@@ -0,0 +1,159 @@
+import click
+from flask.cli import with_appcontext
+from app import db
+from models import Part
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, text
+
+# Полнотекстовый индекс запчастей.
+# SQLite: внешняя FTS5-таблица с триграммным токенизатором - ищет и по
+# началу слова, и по любой части кода. Таблицу нужно пополнять при вставке
+# запчасти (index_part).
+# PostgreSQL: GIN-индекс по tsvector и триграммные индексы pg_trgm прямо на
+# таблице parts - их поддерживает сама СУБД.
+SEARCH_TABLE = 'parts_search'
+MIN_TRIGRAM_LENGTH = 3
+
+# Веса колонок для bm25: совпадение в названии и коде важнее описания
+NAME_WEIGHT = 10.0
+CODE_WEIGHT = 5.0
+DESCRIPTION_WEIGHT = 1.0
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "name, code, description, content='parts', content_rowid='id', tokenize='trigram')",
+]
+SQLITE_DROP = [f"DROP TABLE IF EXISTS {SEARCH_TABLE}"]
+
+POSTGRES_DOCUMENT = ("to_tsvector('simple', coalesce({table}name, '') || ' ' || coalesce({table}code, '') "
+                     "|| ' ' || coalesce({table}description, ''))")
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_parts_search_document ON parts USING gin ({POSTGRES_DOCUMENT.format(table='')})",
+    "CREATE INDEX IF NOT EXISTS ix_parts_name_trgm ON parts USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_parts_code_trgm ON parts USING gin (code gin_trgm_ops)",
+]
+
+# Поисковые структуры создаются и удаляются вместе с таблицей parts (db.create_all / drop_all)
+for statement in SQLITE_CREATE:
+    event.listen(Part.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_CREATE:
+    event.listen(Part.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in SQLITE_DROP:
+    event.listen(Part.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+
+
+def dialect_name():
+    return db.session.get_bind().dialect.name
+
+
+def match_expression(term):
+    """Запрос FTS5: каждое слово в кавычках, слова объединяются через AND"""
+    words = [word.replace('"', '""') for word in term.split()]
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def prefix_tsquery(term):
+    """Запрос tsquery с поиском по началу каждого слова"""
+    words = [''.join(ch for ch in word if ch.isalnum()) for word in term.split()]
+    return ' & '.join(f'{word}:*' for word in words if word)
+
+
+def index_part(part):
+    """Добавляет запчасть в поисковый индекс в рамках текущей транзакции"""
+    if dialect_name() != 'sqlite':
+        return
+    db.session.flush()
+    index_parts([{'id': part.id, 'name': part.name, 'code': part.code, 'description': part.description}])
+
+
+def index_parts(rows):
+    """Добавляет в индекс пачку запчастей (словари id, name, code, description) одним executemany"""
+    if dialect_name() != 'sqlite' or not rows:
+        return
+    db.session.execute(
+        text(f'INSERT INTO {SEARCH_TABLE} (rowid, name, code, description) '
+             'VALUES (:id, :name, :code, :description)'),
+        [{'id': row['id'], 'name': row['name'], 'code': row.get('code'), 'description': row.get('description')}
+         for row in rows]
+    )
+
+
+def index_inserted_parts(rows):
+    """Добавляет в индекс пачку, только что вставленную одним executemany без RETURNING.
+
+    SQLite выдает новой строке rowid = max(rowid) + 1, а транзакция записи
+    держит блокировку до commit, поэтому строки пачки получают идущие подряд
+    id и последний из них - текущий максимум.
+    """
+    if dialect_name() != 'sqlite' or not rows:
+        return
+    last_id = db.session.scalar(select(func.max(Part.id)))
+    ids = range(last_id - len(rows) + 1, last_id + 1)
+    index_parts([dict(row, id=part_id) for row, part_id in zip(rows, ids)])
+
+
+def rebuild_search_index():
+    """Создает поисковые структуры, если их нет, и перестраивает индекс"""
+    if dialect_name() == 'sqlite':
+        for statement in SQLITE_CREATE:
+            db.session.execute(text(statement))
+        db.session.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"))
+    elif dialect_name() == 'postgresql':
+        for statement in POSTGRES_CREATE:
+            db.session.execute(text(statement))
+    db.session.commit()
+
+
+def search_parts(parts_query, term):
+    """Фильтрует запрос запчастей по строке поиска.
+
+    Возвращает пару (запрос, релевантность). Релевантность - выражение, по
+    которому нужно сортировать по убыванию, или None, если поиск идет без
+    индекса и ранжирования нет.
+    """
+    term = term.strip()
+    if not term:
+        return parts_query, None
+
+    dialect = dialect_name()
+
+    if dialect == 'sqlite' and all(len(word) >= MIN_TRIGRAM_LENGTH for word in term.split()):
+        matches = text(
+            f'SELECT rowid AS part_id, bm25({SEARCH_TABLE}, {NAME_WEIGHT}, {CODE_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank '
+            f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match'
+        ).columns(column('part_id'), column('rank')).bindparams(match=match_expression(term)).subquery()
+        # bm25 возвращает отрицательные значения: чем меньше, тем релевантнее
+        return parts_query.join(matches, matches.c.part_id == Part.id), -matches.c.rank
+
+    if dialect == 'postgresql':
+        tsquery = prefix_tsquery(term)
+        pattern = f'%{term}%'
+        document = literal_column(POSTGRES_DOCUMENT.format(table='parts.'))
+        conditions = [Part.code.ilike(pattern), Part.name.ilike(pattern)]
+        rank = func.similarity(func.coalesce(Part.code, ''), term) + func.similarity(Part.name, term)
+        if tsquery:
+            query = func.to_tsquery('simple', tsquery)
+            conditions.append(document.bool_op('@@')(query))
+            rank = rank + func.ts_rank(document, query)
+        return parts_query.filter(or_(*conditions)), rank
+
+    # Короткие запросы и прочие СУБД - поиск по вхождению без индекса
+    return parts_query.filter(
+        or_(
+            Part.name.ilike(f'%{term}%'),
+            Part.code.ilike(f'%{term}%'),
+            Part.description.ilike(f'%{term}%')
+        )
+    ), None
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Создать и заново заполнить поисковый индекс запчастей"""
+    rebuild_search_index()
+    print('Поисковый индекс запчастей перестроен')
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_search_index_command)
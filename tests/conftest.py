@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from benchmarks.seed import seed
+from car_totals import rebuild_car_totals
+from ledger import rebuild_ledger
+from search import rebuild_search_index
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Приложение на отдельной базе SQLite; TESTING включает строгий бюджет запросов"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'REPORTS_DIR': str(tmp_path / 'reports'),
+        'JOBS_ENABLED': False,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed_data(app):
+    """Заполняет базу связанными данными и пересчитывает производные таблицы: seed_data(cars=N)"""
+    def fill(cars=5, **options):
+        with app.app_context():
+            counts = seed(cars=cars, years=1, **options)
+            rebuild_ledger()
+            rebuild_car_totals()
+            rebuild_search_index()
+            return counts
+    return fill
+
+
+@pytest.fixture
+def count_queries(app):
+    """Число SQL-запросов, выполненных внутри вызова: count_queries(client.get, '/garage')"""
+    def run(call, *args, **kwargs):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            response = call(*args, **kwargs)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        return response, len(statements)
+    return run
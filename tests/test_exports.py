@@ -0,0 +1,100 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+import exports
+from app import db
+from models import Car, Expense, Part, Supplier
+
+
+@pytest.fixture
+def expenses(app):
+    with app.app_context():
+        cars = [Car(brand='Lada', model='Vesta', year=2020), Car(brand='Kia', model='Rio', year=2021)]
+        db.session.add_all(cars)
+        db.session.flush()
+        db.session.add_all([
+            Expense(car_id=cars[0].id, date=date(2030, 1, 31), amount=100, category='топливо', description='АЗС'),
+            Expense(car_id=cars[0].id, date=date(2030, 2, 1), amount=200, category='ремонт'),
+            Expense(car_id=cars[1].id, date=date(2030, 2, 28), amount=300, category='топливо'),
+            Expense(car_id=cars[1].id, date=date(2030, 3, 1), amount=400, category='ремонт'),
+        ])
+        db.session.commit()
+        return [car.id for car in cars]
+
+
+def read_csv(response):
+    text = response.get_data(as_text=True)
+    assert text.startswith('\ufeff')
+    return [line.split(';') for line in text[1:].splitlines()]
+
+
+def test_csv_has_header_and_iso_dates(client, expenses):
+    response = client.get('/export/expenses')
+
+    assert response.status_code == 200
+    assert response.content_type == 'text/csv; charset=utf-8'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=expenses.csv'
+    rows = read_csv(response)
+    assert rows[0] == ['id', 'date', 'car_id', 'car', 'category', 'amount', 'description']
+    assert [row[1] for row in rows[1:]] == ['2030-01-31', '2030-02-01', '2030-02-28', '2030-03-01']
+    assert rows[1][3:5] == ['Lada Vesta', 'топливо']
+    assert rows[2][6] == ''
+
+
+def test_csv_filters_by_period_and_car(client, expenses):
+    response = client.get('/export/expenses', query_string={
+        'start_date': '2030-02-01', 'end_date': '2030-02-28', 'car_id': expenses[1],
+    })
+
+    assert response.headers['Content-Disposition'] == 'attachment; filename=expenses_20300201_20300228.csv'
+    assert [row[1] for row in read_csv(response)[1:]] == ['2030-02-28']
+
+
+def test_jsonl_period_includes_whole_last_day(app, client):
+    with app.app_context():
+        supplier = Supplier(name='Поставщик')
+        db.session.add(supplier)
+        db.session.flush()
+        db.session.add_all([
+            Part(name='Фара', code='P-1', quantity=1, price=10, supplier_id=supplier.id,
+                 created_at=datetime(2030, 1, 31, 23, 59)),
+            Part(name='Бампер', code='P-2', quantity=1, price=10, supplier_id=supplier.id,
+                 created_at=datetime(2030, 2, 1, 0, 0)),
+            Part(name='Капот', code='P-3', quantity=1, price=10, created_at=datetime(2030, 1, 15)),
+        ])
+        db.session.commit()
+        supplier_id = supplier.id
+
+    response = client.get('/export/parts', query_string={
+        'format': 'jsonl', 'end_date': '2030-01-31', 'supplier_id': supplier_id,
+    })
+
+    assert response.content_type == 'application/x-ndjson; charset=utf-8'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(row['code'], row['created_at']) for row in rows] == [('P-1', '2030-01-31T23:59:00')]
+    assert list(rows[0]) == [name for name, _ in exports.DATASETS['parts']['columns']]
+
+
+@pytest.mark.parametrize('query', [
+    {'start_date': '31.01.2030'},
+    {'car_id': 'vesta'},
+    {'supplier_id': '1'},
+])
+def test_invalid_filters_are_rejected(client, expenses, query):
+    assert client.get('/export/expenses', query_string=query).status_code == 400
+
+
+def test_response_is_streamed_in_chunks(client, expenses, monkeypatch):
+    monkeypatch.setattr(exports, 'CHUNK_ROWS', 1)
+
+    response = client.get('/export/expenses', buffered=False)
+
+    assert response.is_streamed
+    chunks = [chunk.decode() for chunk in response.response]
+    response.close()
+    # Заголовок уходит отдельным куском до строк, дальше по одной строке на кусок
+    assert chunks[0] == '\ufeffid;date;car_id;car;category;amount;description\r\n'
+    assert len(chunks) >= 5
+    assert all(chunk.count('\n') <= 1 for chunk in chunks)
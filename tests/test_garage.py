@@ -0,0 +1,47 @@
+from datetime import date
+
+import pytest
+
+from app import db
+from models import Car, Client, Expense, Payment, Rental
+
+# Сводка гаража - один запрос на все автомобили, сколько бы их ни было
+GARAGE_MAX_QUERIES = 1
+
+
+def add_cars(app, count):
+    """Автомобили с расходами, арендой и платежом по ней"""
+    with app.app_context():
+        client = Client(name='Клиент')
+        db.session.add(client)
+        for number in range(1, count + 1):
+            car = Car(brand='Kia', model='Rio', year=2020, vin=f'TESTVIN{number:010d}', purchase_price=1000)
+            rental = Rental(car=car, client=client, start_date=date(2030, 1, 1), end_date=date(2030, 1, 10),
+                            daily_rate=100, total_amount=1000, status='completed')
+            db.session.add_all([
+                car,
+                Expense(car=car, date=date(2030, 1, 1), amount=50, category='ремонт'),
+                Expense(car=car, date=date(2030, 1, 2), amount=25, category='топливо'),
+                rental,
+                Payment(rental=rental, amount=400, payment_date=date(2030, 1, 5)),
+            ])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('cars', [3, 40])
+def test_garage_query_count_does_not_grow_with_cars(app, client, count_queries, cars):
+    add_cars(app, cars)
+
+    response, queries = count_queries(client.get, '/garage')
+
+    assert response.status_code == 200
+    assert queries <= GARAGE_MAX_QUERIES
+
+
+def test_garage_lists_every_car(app, client):
+    add_cars(app, 12)
+
+    response = client.get('/garage')
+
+    assert response.status_code == 200
+    assert response.data.count(b'TESTVIN') == 12
@@ -0,0 +1,92 @@
+import json
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import jobs
+from app import db
+from models import Car, Client, JobRun, Rental
+
+
+@pytest.fixture
+def counting_job(monkeypatch):
+    """Задание, которое только считает свои запуски"""
+    calls = []
+
+    def run():
+        calls.append(threading.current_thread().name)
+        return {'calls': len(calls)}
+
+    monkeypatch.setitem(jobs.JOBS, 'counting', run)
+    return calls
+
+
+@pytest.mark.parametrize('last_run', [None, timedelta(hours=1)], ids=['first-run', 'interval-passed'])
+def test_two_runners_claiming_the_same_slot_run_the_job_once(app, counting_job, last_run):
+    if last_run is not None:
+        with app.app_context():
+            db.session.add(JobRun(name='counting', started_at=datetime.utcnow() - last_run, run_count=1))
+            db.session.commit()
+
+    barrier = threading.Barrier(2)
+    results = []
+
+    def runner():
+        with app.app_context():
+            barrier.wait()
+            results.append(jobs.run_job('counting', interval_seconds=300))
+
+    threads = [threading.Thread(target=runner) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(counting_job) == 1
+    assert sorted(results, key=lambda result: result is not None) == [None, {'calls': 1}]
+    with app.app_context():
+        run = db.session.get(JobRun, 'counting')
+        assert run.run_count == (1 if last_run is None else 2)
+        assert json.loads(run.result) == {'calls': 1}
+
+
+def test_next_slot_opens_after_the_interval(app, counting_job):
+    with app.app_context():
+        assert jobs.run_job('counting', interval_seconds=300) == {'calls': 1}
+        assert jobs.run_job('counting', interval_seconds=300) is None
+        assert jobs.run_job('counting', interval_seconds=0) == {'calls': 2}
+
+
+@pytest.fixture
+def overdue_rental(app):
+    with app.app_context():
+        car = Car(brand='Lada', model='Vesta', year=2020, status='rented')
+        client = Client(name='Иванов')
+        db.session.add_all([car, client])
+        db.session.flush()
+        today = date.today()
+        rental = Rental(car_id=car.id, client_id=client.id, start_date=today - timedelta(days=10),
+                        end_date=today - timedelta(days=1), daily_rate=1000, total_amount=10000,
+                        balance_due=10000, status='active')
+        db.session.add(rental)
+        db.session.commit()
+        return rental.id
+
+
+def test_run_jobs_command_completes_overdue_rentals(app, overdue_rental):
+    result = app.test_cli_runner().invoke(args=['run-jobs', '--once', 'rental_lifecycle'])
+
+    assert result.exit_code == 0, result.output
+    name, payload = result.output.strip().split(': ', 1)
+    assert name == 'rental_lifecycle'
+    assert json.loads(payload) == {'completed_rentals': 1, 'car_statuses_fixed': 1, 'balances_fixed': 0,
+                                   'unpaid_rentals': 1, 'unpaid_total': 10000.0}
+    with app.app_context():
+        rental = db.session.get(Rental, overdue_rental)
+        assert rental.status == 'completed'
+        assert db.session.get(Car, rental.car_id).status == 'active'
+
+    # Интервал еще не прошел: повторный запуск без --force ничего не делает
+    again = app.test_cli_runner().invoke(args=['run-jobs', '--once'])
+    assert 'недавно выполнял другой процесс' in again.output
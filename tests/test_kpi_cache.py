@@ -0,0 +1,28 @@
+from app import db
+from api_payloads import dashboard_kpis
+from kpi_cache import KpiCache, MemoryBackend, METRIC_TOTAL_PARTS
+from models import Part
+from versioning import bump_data_version
+
+
+def test_value_computed_at_old_version_is_not_served():
+    cache = KpiCache(MemoryBackend())
+    # Чтение началось до коммита, а сохранило значение уже после его invalidate
+    cache.get_or_compute(METRIC_TOTAL_PARTS, lambda: 10, version=1)
+
+    assert cache.get_or_compute(METRIC_TOTAL_PARTS, lambda: 15, version=2) == 15
+    assert cache.get_or_compute(METRIC_TOTAL_PARTS, lambda: 99, version=2) == 15
+
+
+def test_dashboard_sees_write_from_another_process(app, seed_data):
+    seed_data(cars=2)
+    with app.app_context():
+        before = dashboard_kpis()['total_parts']
+
+        # Другой воркер или команда CLI: запись с новой версией данных, но без
+        # сброса кэша этого процесса
+        db.session.add(Part(name='Фара', code='NEW-1', quantity=7, price=100))
+        bump_data_version()
+        db.session.commit()
+
+        assert dashboard_kpis()['total_parts'] == before + 7
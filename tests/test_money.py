@@ -0,0 +1,80 @@
+import json
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func
+
+from app import db
+from models import Part
+from money import parse_money
+
+
+@pytest.mark.parametrize('text, amount', [
+    ('1 234,50', Decimal('1234.50')),
+    ('\xa012\xa0345', Decimal('12345.00')),
+    ('0.1', Decimal('0.10')),
+    ('10.005', Decimal('10.01')),
+    ('10.004', Decimal('10.00')),
+    ('-12,345', Decimal('-12.35')),
+    (0.1 + 0.2, Decimal('0.30')),
+    (27500, Decimal('27500.00')),
+])
+def test_parse_money(text, amount):
+    assert parse_money(text) == amount
+    assert parse_money(text).as_tuple().exponent == -2
+
+
+@pytest.mark.parametrize('text', ['', '   ', 'abc', '12,3,4', 'nan', 'NaN', 'sNaN', 'inf', '-Infinity',
+                                  float('nan'), float('inf'), '1e999999999'])
+def test_parse_money_rejects_non_amounts(text):
+    with pytest.raises(ValueError):
+        parse_money(text)
+
+
+def test_parse_money_default():
+    assert parse_money('', default=0) == Decimal('0.00')
+
+
+@pytest.fixture
+def parts(app):
+    with app.app_context():
+        db.session.add_all([
+            Part(name='Фара', code='P-1', quantity=3, price=Decimal('0.10')),
+            Part(name='Бампер', code='P-2', quantity=7, price=0.1 + 0.2),
+            Part(name='Капот', code='P-3', quantity=1, price=parse_money('27 500,005')),
+        ])
+        db.session.commit()
+
+
+def test_money_column_round_trip(app, parts):
+    with app.app_context():
+        db.session.expire_all()
+        assert [part.price for part in Part.query.order_by(Part.id)] == [
+            Decimal('0.10'), Decimal('0.30'), Decimal('27500.01'),
+        ]
+        # В базе - целые копейки
+        stored = db.session.execute(db.text('SELECT price FROM parts ORDER BY id')).scalars().all()
+        assert stored == [10, 30, 2750001]
+
+
+def test_money_expressions_stay_in_rubles(app, parts):
+    with app.app_context():
+        assert db.session.query(func.sum(Part.price)).scalar() == Decimal('27500.41')
+        assert db.session.query(func.sum(Part.price * Part.quantity)).scalar() == Decimal('27502.41')
+        assert db.session.query(func.sum(Part.price + Part.price - Part.price)).scalar() == Decimal('27500.41')
+        # Сравнение с рублями: параметр переводится в копейки
+        expensive = Part.query.filter(Part.price > Decimal('0.20')).order_by(Part.id)
+        assert [part.code for part in expensive] == ['P-2', 'P-3']
+
+
+def test_export_writes_exact_amounts(client, parts):
+    rows = [json.loads(line) for line in client.get('/export/parts?format=jsonl').get_data(as_text=True).splitlines()]
+    assert [row['price'] for row in rows] == ['0.10', '0.30', '27500.01']
+
+    csv_rows = client.get('/export/parts').get_data(as_text=True).splitlines()
+    assert [line.split(';')[4] for line in csv_rows[1:]] == ['0.10', '0.30', '27500.01']
+
+
+def test_api_writes_amounts_as_numbers(client, parts):
+    parts_payload = client.get('/api/v1/parts').json['parts']
+    assert sorted(part['price'] for part in parts_payload) == [0.1, 0.3, 27500.01]
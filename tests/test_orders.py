@@ -0,0 +1,36 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from ledger import SOURCE_PARTS, month_summary
+from models import MonthlyLedger, Part, Sale, SalesOrder
+
+
+@pytest.fixture
+def parts(app):
+    with app.app_context():
+        rows = [Part(name='Фара', code='P-1', quantity=10, price=100),
+                Part(name='Бампер', code='P-2', quantity=10, price=200)]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [part.id for part in rows]
+
+
+def test_order_stores_exact_quantities_and_totals(app, client, parts):
+    response = client.post('/parts/order', data={
+        'part_id': parts, 'quantity': ['1', '3'], 'price': ['1.00', '2.50'], 'sale_date': '2030-01-15',
+    })
+    assert response.status_code == 302
+
+    with app.app_context():
+        sales = Sale.query.order_by(Sale.part_id).all()
+        assert [(sale.quantity_sold, sale.sale_price, sale.total_amount) for sale in sales] == [
+            (1, Decimal('1.00'), Decimal('1.00')),
+            (3, Decimal('2.50'), Decimal('7.50')),
+        ]
+        assert SalesOrder.query.one().total_amount == Decimal('8.50')
+        assert [part.quantity for part in Part.query.order_by(Part.id)] == [9, 7]
+        assert db.session.query(MonthlyLedger.amount).filter_by(source=SOURCE_PARTS).scalar() == Decimal('8.50')
+        assert month_summary(date(2030, 1, 1))[1] == Decimal('8.50')
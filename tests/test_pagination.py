@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app import db
+from models import Part
+from pagination import encode_cursor
+
+CREATED_AT = datetime(2030, 1, 15, 12, 0)
+
+
+def add_parts(app, count):
+    """Запчасти с одинаковым created_at: порядок страниц держится только на id"""
+    with app.app_context():
+        db.session.add_all([Part(name=f'Запчасть {n}', code=f'P-{n}', quantity=1, price=10, created_at=CREATED_AT)
+                            for n in range(count)])
+        db.session.commit()
+        return [part_id for part_id, in db.session.query(Part.id).order_by(Part.id.desc())]
+
+
+def all_pages(client, page_size):
+    pages = []
+    cursor = None
+    while True:
+        args = {'page_size': page_size}
+        if cursor:
+            args['cursor'] = cursor
+        response = client.get('/api/v1/parts', query_string=args)
+        assert response.status_code == 200
+        pages.append([part['id'] for part in response.json['parts']])
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return pages
+
+
+# При 6 строках последняя страница заполнена ровно: лишней пустой страницы нет
+@pytest.mark.parametrize('count, sizes', [(7, [3, 3, 1]), (6, [3, 3])])
+def test_pages_cover_every_row_once_with_duplicate_sort_keys(app, client, count, sizes):
+    ids = add_parts(app, count)
+
+    pages = all_pages(client, 3)
+
+    assert [len(page) for page in pages] == sizes
+    assert [part_id for page in pages for part_id in page] == ids
+
+
+def test_last_page_cursor_returns_empty_page(app, client):
+    ids = add_parts(app, 3)
+
+    response = client.get('/api/v1/parts', query_string={'cursor': encode_cursor([CREATED_AT, ids[-1]])})
+
+    assert response.status_code == 200
+    assert response.json == {'parts': [], 'next_cursor': None}
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'не-курсор',
+    '!!!',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+    raw_cursor({'dt': '2030-01-15T12:00:00'}),
+    raw_cursor([['v', 1]]),
+    raw_cursor([['dt', 'вчера'], ['v', 1]]),
+    raw_cursor([['v', [1, 2]], ['v', 1]]),
+    raw_cursor([['sql', 'id'], ['v', 1]]),
+    raw_cursor(['dt', 'v']),
+])
+def test_invalid_cursor_is_rejected(app, client, cursor):
+    add_parts(app, 3)
+
+    assert client.get('/api/v1/parts', query_string={'cursor': cursor}).status_code == 400
+    assert client.get('/parts', query_string={'cursor': cursor}).status_code == 400
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from models import Part, Supplier
+from parts_import import import_parts
+from search import search_parts
+
+
+@pytest.fixture
+def supplier_id(app):
+    with app.app_context():
+        supplier = Supplier(name='Поставщик')
+        # id удаленной последней запчасти SQLite выдаст снова - индекс должен получить те же id
+        db.session.add_all([supplier, Part(name='Фара', code='OLD-1', quantity=1, price=10),
+                            Part(name='Бампер', code='OLD-2', quantity=1, price=10)])
+        db.session.commit()
+        db.session.delete(db.session.get(Part, 2))
+        db.session.commit()
+        return supplier.id
+
+
+def parts_csv(count):
+    lines = ['name;code;quantity;price'] + [f'Запчасть {n};IMP-{n:04d};{n};{n}.50' for n in range(count)]
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+def test_batch_is_one_executemany_insert(app, supplier_id):
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO parts '):
+            inserts.append(executemany)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = import_parts(parts_csv(120), 'parts.csv', supplier_id=supplier_id, batch_size=50)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert result.inserted == 120
+        assert inserts == [True, True, True]
+
+
+def test_imported_rows_are_indexed_under_their_own_ids(app, supplier_id):
+    with app.app_context():
+        import_parts(parts_csv(30), 'parts.csv', supplier_id=supplier_id, batch_size=7)
+
+        for n in (0, 6, 7, 29):
+            query, _ = search_parts(Part.query, f'IMP-{n:04d}')
+            assert [(part.name, part.quantity) for part in query] == [(f'Запчасть {n}', n)]
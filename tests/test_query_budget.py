@@ -0,0 +1,38 @@
+import pytest
+
+from query_budget import QueryBudgetExceeded
+
+# Страницы с бюджетом запросов: под TESTING превышение бюджета - исключение,
+# поэтому новый N+1 на любой из них роняет тест
+BUDGETED_PAGES = [
+    '/',
+    '/garage',
+    '/garage/car/1',
+    '/rent',
+    '/parts',
+    '/disassembly',
+    '/analytics',
+    '/api/v1/dashboard',
+    '/api/v1/analytics/monthly',
+    '/api/v1/analytics/expense-categories',
+    '/api/v1/cars',
+    '/api/v1/cars/1',
+    '/api/v1/parts',
+]
+
+
+@pytest.mark.parametrize('url', BUDGETED_PAGES)
+def test_page_stays_within_query_budget(client, seed_data, url):
+    seed_data(cars=20)
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+
+
+def test_budget_is_strict_under_testing(app, client, seed_data, monkeypatch):
+    seed_data(cars=3)
+    monkeypatch.setattr(app.view_functions['rent.rent'], 'query_budget', 1)
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/rent')
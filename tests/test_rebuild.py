@@ -0,0 +1,24 @@
+import pytest
+
+from car_totals import rebuild_car_totals
+from ledger import rebuild_ledger
+from versioning import current_data_version
+
+
+@pytest.mark.parametrize('rebuild', [rebuild_car_totals, rebuild_ledger])
+def test_rebuild_bumps_data_version(app, seed_data, rebuild):
+    seed_data(cars=2)
+    with app.app_context():
+        before = current_data_version()
+        rebuild()
+        assert current_data_version() == before + 1
+
+
+
+def test_api_etag_changes_after_rebuild(app, client, seed_data):
+    seed_data(cars=2)
+    etag = client.get('/api/v1/cars').headers['ETag']
+    with app.app_context():
+        rebuild_car_totals()
+
+    assert client.get('/api/v1/cars', headers={'If-None-Match': etag}).status_code == 200
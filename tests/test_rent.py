@@ -0,0 +1,79 @@
+import threading
+from datetime import date
+
+import pytest
+
+from app import db
+from models import Car, Client, Rental
+from views import rent as rent_views
+
+
+@pytest.fixture
+def car_and_client(app):
+    with app.app_context():
+        car = Car(brand='Kia', model='Rio', year=2020, purchase_price=1000)
+        client = Client(name='Клиент')
+        db.session.add_all([car, client])
+        db.session.commit()
+        return car.id, client.id
+
+
+def book(client, car_id, client_id, start, end):
+    return client.post('/rent/add_rental', data={
+        'car_id': car_id, 'client_id': client_id, 'start_date': start, 'end_date': end, 'daily_rate': '100',
+    })
+
+
+def active_rentals(app, car_id):
+    with app.app_context():
+        return Rental.query.filter_by(car_id=car_id, status='active').count()
+
+
+def test_add_rental_rejects_overlap_missed_by_stale_index(app, client, car_and_client):
+    car_id, client_id = car_and_client
+    # Индекс занятости этого воркера загружен, пока автомобиль был свободен
+    assert client.get(f'/api/car_availability/{car_id}?start_date=2030-01-01&end_date=2030-01-10').json['available']
+
+    # Другой воркер тем временем сдал автомобиль на пересекающиеся даты
+    with app.app_context():
+        db.session.add(Rental(car_id=car_id, client_id=client_id, start_date=date(2030, 1, 5),
+                              end_date=date(2030, 1, 15), daily_rate=100, total_amount=1100))
+        db.session.commit()
+
+    book(client, car_id, client_id, '2030-01-01', '2030-01-10')
+
+    assert active_rentals(app, car_id) == 1
+
+
+def test_add_rental_accepts_adjacent_period(app, client, car_and_client):
+    car_id, client_id = car_and_client
+    book(client, car_id, client_id, '2030-01-01', '2030-01-10')
+    book(client, car_id, client_id, '2030-01-11', '2030-01-20')
+
+    assert active_rentals(app, car_id) == 2
+
+
+def test_concurrent_bookings_of_one_car_create_one_rental(app, car_and_client, monkeypatch):
+    car_id, client_id = car_and_client
+    # Обе брони проверяют пересечение одновременно: без блокировки автомобиля
+    # обе не видят друг друга и создают две аренды
+    barrier = threading.Barrier(2)
+    check_overlap = rent_views.rental_overlaps
+
+    def rental_overlaps_together(*args):
+        result = check_overlap(*args)
+        try:
+            barrier.wait(timeout=1)
+        except threading.BrokenBarrierError:
+            pass
+        return result
+
+    monkeypatch.setattr(rent_views, 'rental_overlaps', rental_overlaps_together)
+    threads = [threading.Thread(target=book, args=(app.test_client(), car_id, client_id, '2030-02-01', '2030-02-10'))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert active_rentals(app, car_id) == 1
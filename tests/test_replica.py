@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from models import Car, Client
+from replica import REPLICA_BIND, replica_reads
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Основная база и реплика - копия основной, отставшая на один автомобиль"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+        'DATABASE_REPLICA_URL': f'sqlite:///{replica}',
+        'REPORTS_DIR': str(tmp_path / 'reports'),
+        'JOBS_ENABLED': False,
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Car(brand='Lada', model='Vesta', year=2020), Client(name='Иванов')])
+        db.session.commit()
+        with sqlite3.connect(primary) as source, sqlite3.connect(replica) as target:
+            source.backup(target)
+        db.session.add(Car(brand='Kia', model='Rio', year=2021))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # db общий для всех приложений процесса: metadata bind реплики, которую
+    # создал init_app, сломала бы create_all в следующих тестах без реплики
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def api_brands(client):
+    response = client.get('/api/v1/cars')
+    assert response.status_code == 200
+    return sorted(car['brand'] for car in response.json['cars'])
+
+
+def database_brands(path):
+    with sqlite3.connect(path) as connection:
+        return sorted(brand for brand, in connection.execute('SELECT brand FROM cars'))
+
+
+def test_read_views_use_replica(client):
+    assert api_brands(client) == ['Lada']
+    assert 'Rio' not in client.get('/garage').get_data(as_text=True)
+    # Страница без @read_replica читает из основной базы
+    assert 'Rio' in client.get('/rent').get_data(as_text=True)
+
+
+def test_fresh_write_keeps_next_read_on_primary(app, client):
+    response = client.post('/garage/add_car', data={'brand': 'Skoda', 'model': 'Octavia', 'year': '2022'})
+    assert response.status_code == 302
+
+    assert api_brands(client) == ['Kia', 'Lada', 'Skoda']
+    # Другой клиент ничего не записывал - ему отвечает реплика
+    assert api_brands(app.test_client()) == ['Lada']
+
+    app.config['REPLICA_STALENESS_SECONDS'] = 0
+    assert api_brands(client) == ['Lada']
+
+
+def test_writes_never_reach_replica(app, client, tmp_path):
+    client.post('/garage/add_car', data={'brand': 'Skoda', 'model': 'Octavia', 'year': '2022'})
+    with app.test_request_context(), replica_reads():
+        db.session.add(Car(brand='Renault', model='Logan', year=2019))
+        db.session.commit()
+
+    assert database_brands(tmp_path / 'replica.db') == ['Lada']
+    assert database_brands(tmp_path / 'primary.db') == ['Kia', 'Lada', 'Renault', 'Skoda']
+
+
+def test_replica_connections_are_read_only(app):
+    with app.app_context(), db.engines[REPLICA_BIND].connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("INSERT INTO cars (brand, model, year) VALUES ('Kia', 'Ceed', 2020)"))
@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+from app import db
+from models import Part, Supplier
+from parts_import import import_parts
+from search import rebuild_search_index, search_parts
+
+
+@pytest.fixture
+def catalog(app):
+    with app.app_context():
+        db.session.add_all([
+            Part(name='Колодки тормозные', code='BP-2108', quantity=1, price=100,
+                 description='Меняются вместе с фильтром'),
+            Part(name='Фильтр масляный', code='OF-2108', quantity=1, price=100, description='Для ВАЗ 2108'),
+            Part(name='Фильтр воздушный', code='AF-1118', quantity=1, price=100, description='Калина'),
+        ])
+        db.session.commit()
+        rebuild_search_index()
+
+
+def found(term):
+    """Коды найденных запчастей в порядке выдачи страницы /parts"""
+    query, rank = search_parts(Part.query, term)
+    if rank is not None:
+        query = query.order_by(rank.desc())
+    return [part.code for part in query.order_by(Part.id)]
+
+
+def test_partial_code_matches_inside_the_code(app, catalog):
+    with app.app_context():
+        assert sorted(found('2108')) == ['BP-2108', 'OF-2108']
+        assert found('F-11') == ['AF-1118']
+
+
+def test_word_prefix_matches_any_case(app, catalog):
+    with app.app_context():
+        assert sorted(found('филь')) == ['AF-1118', 'BP-2108', 'OF-2108']
+        assert found('ФИЛЬТР МАСЛ') == ['OF-2108']
+
+
+def test_short_term_falls_back_to_ilike(app, catalog):
+    with app.app_context():
+        query, rank = search_parts(Part.query, 'af')
+        assert rank is None
+        assert [part.code for part in query] == ['AF-1118']
+
+
+def test_name_match_ranks_above_description_match(app, catalog):
+    with app.app_context():
+        codes = found('фильтр')
+        assert sorted(codes[:2]) == ['AF-1118', 'OF-2108']
+        assert codes[2] == 'BP-2108'
+
+
+def test_added_part_is_searchable(app, client):
+    response = client.post('/parts/add_part', data={
+        'name': 'Ремень ГРМ', 'code': 'TB-21126', 'quantity': '2', 'price': '950',
+    })
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert found('21126') == ['TB-21126']
+        assert found('ремень') == ['TB-21126']
+
+
+def test_imported_parts_are_searchable(app):
+    csv = 'name;code;quantity;price\nСвеча зажигания;SP-100;4;250\nКатушка зажигания;IC-200;1;1900\n'
+    with app.app_context():
+        supplier = Supplier(name='Поставщик')
+        db.session.add(supplier)
+        db.session.commit()
+        result = import_parts(io.BytesIO(csv.encode()), 'parts.csv', supplier_id=supplier.id)
+        assert result.inserted == 2
+
+        assert sorted(found('зажиг')) == ['IC-200', 'SP-100']
+        assert found('IC-2') == ['IC-200']
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+from sqlalchemy import func
+
+from app import db
+from models import Part, Sale
+
+STOCK = 12
+THREADS = 8
+ATTEMPTS = 4
+
+
+@pytest.fixture
+def part_id(app):
+    with app.app_context():
+        part = Part(name='Фара', code='P-1', quantity=STOCK, price=100)
+        db.session.add(part)
+        db.session.commit()
+        return part.id
+
+
+def test_concurrent_sales_never_oversell(app, part_id):
+    """Спрос в несколько раз больше остатка: лишние продажи отклоняются, остаток не уходит в минус"""
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+
+    def sell():
+        client = app.test_client()
+        barrier.wait()
+        for _ in range(ATTEMPTS):
+            response = client.post('/parts/sale', data={
+                'part_id': part_id, 'quantity_sold': 2, 'sale_price': '100', 'sale_date': '2030-01-15',
+            })
+            statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=sell) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [302] * THREADS * ATTEMPTS
+    with app.app_context():
+        remaining = db.session.get(Part, part_id).quantity
+        sold = db.session.query(func.coalesce(func.sum(Sale.quantity_sold), 0)).scalar()
+        assert remaining >= 0
+        assert remaining + sold == STOCK
+        assert Sale.query.count() == sold // 2
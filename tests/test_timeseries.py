@@ -0,0 +1,114 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from ledger import SOURCE_EXPENSE, rebuild_ledger
+from models import Car, Expense, MonthlyLedger
+from timeseries import MAX_BUCKETS, range_series
+
+
+@pytest.fixture
+def add_expenses(app):
+    """Расходы по датам и пересчитанная свертка: add_expenses({date: сумма})"""
+    def add(amounts):
+        with app.app_context():
+            car = Car(brand='Lada', model='Vesta', year=2020)
+            db.session.add(car)
+            db.session.flush()
+            db.session.add_all([Expense(car_id=car.id, date=day, amount=amount, category='ремонт')
+                                for day, amount in amounts.items()])
+            db.session.commit()
+            rebuild_ledger()
+    return add
+
+
+def series(app, start, end, granularity):
+    with app.app_context():
+        result = range_series(start, end, granularity)
+    return list(zip(result['labels'], result['expenses']))
+
+
+def test_week_starts_on_monday(app, add_expenses):
+    # 6 января 2030 - воскресенье, 7 января - понедельник
+    add_expenses({date(2030, 1, 6): 10, date(2030, 1, 7): 20, date(2030, 1, 13): 30})
+
+    assert series(app, date(2030, 1, 1), date(2030, 1, 20), 'week') == [
+        ('2030-W01', 10), ('2030-W02', 50), ('2030-W03', 0),
+    ]
+
+
+def test_quarter_boundaries(app, add_expenses):
+    add_expenses({date(2029, 12, 31): 1, date(2030, 1, 1): 10, date(2030, 3, 31): 20,
+                  date(2030, 4, 1): 30, date(2030, 12, 31): 40})
+
+    assert series(app, date(2030, 1, 1), date(2030, 12, 31), 'quarter') == [
+        ('2030-Q1', 30), ('2030-Q2', 30), ('2030-Q3', 0), ('2030-Q4', 40),
+    ]
+
+
+def test_empty_intervals_are_zero(app, add_expenses):
+    add_expenses({date(2030, 6, 1): 10})
+
+    assert series(app, date(2028, 1, 1), date(2031, 12, 31), 'year') == [
+        ('2028', 0), ('2029', 0), ('2030', 10), ('2031', 0),
+    ]
+    assert series(app, date(2030, 5, 30), date(2030, 6, 2), 'day') == [
+        ('2030-05-30', 0), ('2030-05-31', 0), ('2030-06-01', 10), ('2030-06-02', 0),
+    ]
+
+
+def test_partial_edge_months_count_only_days_in_period(app, add_expenses):
+    add_expenses({date(2030, 3, 10): 1, date(2030, 3, 20): 10, date(2030, 4, 15): 100,
+                  date(2030, 5, 5): 1000, date(2030, 5, 25): 10000})
+
+    assert series(app, date(2030, 3, 15), date(2030, 5, 10), 'month') == [
+        ('2030-03', 10), ('2030-04', 100), ('2030-05', 1000),
+    ]
+    assert series(app, date(2030, 3, 15), date(2030, 3, 25), 'month') == [('2030-03', 10)]
+
+
+def test_whole_months_are_read_from_ledger(app, add_expenses):
+    add_expenses({date(2030, 2, 10): 10})
+    with app.app_context():
+        # Строка свертки без исходных расходов видна только шагам от месяца
+        db.session.add(MonthlyLedger(month=date(2030, 1, 1), source=SOURCE_EXPENSE, category='ремонт', amount=5))
+        db.session.commit()
+
+    assert series(app, date(2030, 1, 1), date(2030, 2, 28), 'month') == [('2030-01', 5), ('2030-02', 10)]
+    assert series(app, date(2030, 1, 1), date(2030, 2, 28), 'year') == [('2030', 15)]
+    assert sum(amount for _, amount in series(app, date(2030, 1, 1), date(2030, 2, 28), 'week')) == 10
+
+
+def test_month_series_query_count(app, add_expenses, count_queries):
+    add_expenses({date(2030, 1, 10): Decimal('0.10'), date(2030, 7, 20): Decimal('0.20')})
+
+    def build(start, end):
+        with app.app_context():
+            return range_series(start, end, 'month')
+
+    result, queries = count_queries(build, date(2025, 1, 1), date(2030, 12, 31))
+    assert queries == 1
+    assert sum(result['expenses']) == Decimal('0.30')
+
+    _, queries = count_queries(build, date(2025, 1, 15), date(2030, 12, 20))
+    assert queries == 2
+
+
+def test_too_many_buckets_is_400(client):
+    response = client.get('/api/v1/analytics/series', query_string={
+        'start_date': '2000-01-01', 'end_date': '2030-12-31', 'granularity': 'day',
+    })
+
+    assert response.status_code == 400
+    assert str(MAX_BUCKETS) in response.json['error']
+
+
+def test_too_many_buckets_on_page_falls_back_to_default_range(client):
+    response = client.get('/analytics', query_string={
+        'start_date': '2000-01-01', 'end_date': '2030-12-31', 'granularity': 'day',
+    })
+
+    assert response.status_code == 200
+    assert str(MAX_BUCKETS) in response.get_data(as_text=True)
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from utilization import numpy_module, sweep_numpy, sweep_python
+
+SWEEPS = [
+    pytest.param(sweep_python, id='python'),
+    pytest.param(sweep_numpy, id='numpy',
+                 marks=pytest.mark.skipif(numpy_module() is None, reason='numpy не установлен')),
+]
+
+
+def random_rentals(rng):
+    """Случайный парк: аренды пересекаются, примыкают друг к другу и идут с разрывами"""
+    span = rng.randint(1, 60)
+    car_count = rng.randint(1, 6)
+    available_from = [rng.randint(0, span - 1) for _ in range(car_count)]
+    rentals = []
+    for car in range(car_count):
+        for _ in range(rng.randint(0, 5)):
+            start = rng.randint(available_from[car], span - 1)
+            rentals.append((car, start, min(span - 1, start + rng.randint(0, 10))))
+    rentals.sort()
+    cars, starts, ends = (list(column) for column in zip(*rentals)) if rentals else ([], [], [])
+    return span, car_count, cars, starts, ends, available_from
+
+
+def brute_force(span, car_count, cars, starts, ends, available_from):
+    """Те же показатели перебором дней"""
+    busy_days = [set() for _ in range(car_count)]
+    for car, start, end in zip(cars, starts, ends):
+        busy_days[car].update(range(start, end + 1))
+
+    longest_gap, gap_count = [], []
+    for car in range(car_count):
+        gaps = []
+        run = 0
+        for day in range(available_from[car], span):
+            if day in busy_days[car]:
+                if run:
+                    gaps.append(run)
+                run = 0
+            else:
+                run += 1
+        if run:
+            gaps.append(run)
+        longest_gap.append(max(gaps, default=0))
+        gap_count.append(len(gaps))
+
+    occupied = [len(days) for days in busy_days]
+    busy = [sum(day in days for days in busy_days) for day in range(span)]
+    return occupied, longest_gap, gap_count, busy
+
+
+@pytest.mark.parametrize('sweep', SWEEPS)
+def test_sweep_matches_brute_force(sweep):
+    rng = random.Random(2030)
+    for _ in range(300):
+        rentals = random_rentals(rng)
+        assert sweep(*rentals) == brute_force(*rentals), rentals
+
+
+@pytest.mark.parametrize('query', [
+    {'start_date': '2020-01-01', 'end_date': '9999-12-31'},
+    {'start_date': '9999-12-30', 'end_date': '9999-12-31', 'granularity': 'day'},
+    {'start_date': '1830-01-01', 'end_date': '2030-12-31', 'granularity': 'day'},
+    {'start_date': '2000-01-01', 'end_date': '2030-12-31', 'granularity': 'year'},
+    {'start_date': '2030-01-01', 'end_date': '2030-12-31', 'granularity': 'hour'},
+])
+@pytest.mark.parametrize('url', ['/api/v1/utilization', '/api/v1/utilization/cars'])
+def test_out_of_range_period_is_400(client, url, query):
+    response = client.get(url, query_string=query)
+
+    assert response.status_code == 400
+    assert response.json['error']
+
+
+def test_longest_allowed_period_is_accepted(client, seed_data):
+    seed_data(cars=3)
+    # 20 лет - 7305 дней, в пределах MAX_SPAN_DAYS
+    response = client.get('/api/v1/utilization', query_string={
+        'start_date': '2011-01-01', 'end_date': '2030-12-31', 'granularity': 'month',
+    })
+
+    assert response.status_code == 200
+    assert len(response.json['curve']['buckets']) == 20 * 12
+
+
+def test_series_rejects_dates_past_max_date(client):
+    response = client.get('/api/v1/analytics/series', query_string={
+        'start_date': '9999-12-30', 'end_date': '9999-12-31', 'granularity': 'day',
+    })
+
+    assert response.status_code == 400
@@ -0,0 +1,223 @@
+from datetime import date, timedelta
+
+from sqlalchemy import Date, and_, cast, func, literal, or_, select, union_all
+
+from app import db
+from models import Expense, Payment, Sale
+from ledger import SOURCE_EXPENSE, SOURCE_PARTS, SOURCE_RENTAL, month_start, month_starts, monthly_totals
+
+# Ряды доходов и расходов за произвольный период с шагом день, неделя,
+# месяц, квартал или год. Шаги от месяца и крупнее читаются из месячной
+# свертки monthly_ledger; из исходных таблиц (платежи, продажи, расходы)
+# берутся только дни и недели и неполные месяцы на краях периода - одним
+# сгруппированным запросом (см. fact_totals). Пустые интервалы дополняются
+# нулями здесь. Пять лет по дням - один запрос, по месяцам - не больше двух.
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+# Шаги, интервалы которых складываются из целых месяцев
+LEDGER_GRANULARITIES = ('month', 'quarter', 'year')
+
+GRANULARITY_NAMES = {
+    'day': 'По дням',
+    'week': 'По неделям',
+    'month': 'По месяцам',
+    'quarter': 'По кварталам',
+    'year': 'По годам',
+}
+
+# Больше точек на графике все равно не различить; 5 лет по дням - 1827
+MAX_BUCKETS = 2000
+
+# Допустимые даты периода: у date.max уже не посчитать начало следующего интервала
+MIN_DATE = date(1900, 1, 1)
+MAX_DATE = date(2999, 12, 31)
+
+SOURCES = [
+    ('rental_income', Payment.payment_date, Payment.amount),
+    ('parts_income', Sale.sale_date, Sale.total_amount),
+    ('expenses', Expense.date, Expense.amount),
+]
+
+# Те же источники в месячной свертке
+LEDGER_SOURCES = {
+    SOURCE_RENTAL: 'rental_income',
+    SOURCE_PARTS: 'parts_income',
+    SOURCE_EXPENSE: 'expenses',
+}
+
+
+def bucket_start(day, granularity):
+    """Начало интервала, в который попадает дата (неделя начинается с понедельника)"""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'quarter':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day.replace(month=1, day=1)
+
+
+def next_bucket(start, granularity):
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    months = {'month': 1, 'quarter': 3, 'year': 12}[granularity]
+    month = start.month - 1 + months
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+
+
+def bucket_starts(start, end, granularity):
+    """Начала всех интервалов, пересекающих период [start, end]"""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f'Слишком много точек на графике (больше {MAX_BUCKETS}), выберите шаг крупнее')
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def bucket_label(start, granularity):
+    if granularity == 'day':
+        return start.isoformat()
+    if granularity == 'week':
+        year, week, _ = start.isocalendar()
+        return f'{year}-W{week:02d}'
+    if granularity == 'month':
+        return start.strftime('%Y-%m')
+    if granularity == 'quarter':
+        return f'{start.year}-Q{(start.month - 1) // 3 + 1}'
+    return str(start.year)
+
+
+def bucket_expression(column, granularity):
+    """Выражение SQL для группировки: начало интервала или сама дата.
+
+    PostgreSQL сворачивает даты в интервалы сам (date_trunc). В SQLite
+    группировка по выражению strftime требует сортировки во временном
+    B-дереве, а по самой дате идет по порядку покрывающего индекса
+    (дата, сумма) - в 2-4 раза быстрее. Строк при этом не больше, чем дней
+    в периоде, и в интервалы их сворачивает fact_totals.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return cast(func.date_trunc(granularity, column), Date)
+    return column
+
+
+def as_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if hasattr(value, 'date'):
+        return value.date()
+    return value
+
+
+def add_total(totals, name, bucket, amount):
+    totals[name][bucket] = totals[name].get(bucket, 0) + (amount or 0)
+
+
+def fact_totals(ranges, granularity):
+    """Суммы источников по интервалам из исходных таблиц: {источник: {начало интервала: сумма}}.
+
+    ranges - список периодов (начало, конец) включительно. Все источники
+    выбираются одним UNION ALL, каждый со своей группировкой.
+    """
+    selects = []
+    for name, date_column, amount_column in SOURCES:
+        bucket = bucket_expression(date_column, granularity)
+        selects.append(
+            select(literal(name).label('source'), bucket.label('bucket'), func.sum(amount_column).label('amount'))
+            .where(or_(*[and_(date_column >= start, date_column <= end) for start, end in ranges]))
+            .group_by(bucket)
+        )
+
+    totals = {name: {} for name, _, _ in SOURCES}
+    for name, value, amount in db.session.execute(union_all(*selects)):
+        add_total(totals, name, bucket_start(as_date(value), granularity), amount)
+    return totals
+
+
+def ledger_range_totals(start, end, granularity):
+    """То же, что fact_totals, для шагов из целых месяцев.
+
+    Целые месяцы периода берутся из monthly_ledger, неполные месяцы на
+    краях (период с 15-го числа или по сегодняшний день) - из исходных таблиц.
+    """
+    first_month = start if start.day == 1 else next_bucket(month_start(start), 'month')
+    last_month_end = end if (end + timedelta(days=1)).day == 1 else month_start(end) - timedelta(days=1)
+    if first_month > last_month_end:
+        return fact_totals([(start, end)], granularity)
+
+    edges = [(edge_start, edge_end) for edge_start, edge_end in (
+        (start, first_month - timedelta(days=1)),
+        (last_month_end + timedelta(days=1), end),
+    ) if edge_start <= edge_end]
+    totals = fact_totals(edges, granularity) if edges else {name: {} for name, _, _ in SOURCES}
+
+    for month, sources in monthly_totals(first_month, month_start(last_month_end)).items():
+        for source, amount in sources.items():
+            if source in LEDGER_SOURCES:
+                add_total(totals, LEDGER_SOURCES[source], bucket_start(as_date(month), granularity), amount)
+    return totals
+
+
+def range_series(start, end, granularity='month'):
+    """Доходы от аренды и продаж, расходы и прибыль по интервалам периода.
+
+    Возвращает словарь списков одинаковой длины: buckets (ISO-дата начала
+    интервала), labels, rental_income, parts_income, income, expenses, profit.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Неизвестный шаг: {granularity}')
+    if start > end:
+        raise ValueError('Дата начала позже даты окончания')
+    buckets = bucket_starts(start, end, granularity)
+
+    if granularity in LEDGER_GRANULARITIES:
+        totals = ledger_range_totals(start, end, granularity)
+    else:
+        totals = fact_totals([(start, end)], granularity)
+
+    series = {'buckets': [], 'labels': [], 'rental_income': [], 'parts_income': [],
+              'income': [], 'expenses': [], 'profit': []}
+    for bucket in buckets:
+        rental_income = totals['rental_income'].get(bucket, 0)
+        parts_income = totals['parts_income'].get(bucket, 0)
+        expenses = totals['expenses'].get(bucket, 0)
+        series['buckets'].append(bucket.isoformat())
+        series['labels'].append(bucket_label(bucket, granularity))
+        series['rental_income'].append(rental_income)
+        series['parts_income'].append(parts_income)
+        series['income'].append(rental_income + parts_income)
+        series['expenses'].append(expenses)
+        series['profit'].append(rental_income + parts_income - expenses)
+    return series
+
+
+def default_range(today=None):
+    """Период по умолчанию: последние 12 месяцев, включая текущий"""
+    today = today or date.today()
+    return month_starts(12, today)[0], today
+
+
+def parse_range_params(args):
+    """Период и шаг графика из параметров start_date, end_date, granularity"""
+    default_start, default_end = default_range()
+    try:
+        start = date.fromisoformat(args.get('start_date') or default_start.isoformat())
+        end = date.fromisoformat(args.get('end_date') or default_end.isoformat())
+    except ValueError:
+        raise ValueError('Даты периода указаны в неверном формате')
+    if not (MIN_DATE <= start <= MAX_DATE and MIN_DATE <= end <= MAX_DATE):
+        raise ValueError(f'Даты периода должны быть в пределах {MIN_DATE.year}-{MAX_DATE.year} годов')
+    granularity = args.get('granularity') or 'month'
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Неизвестный шаг: {granularity}')
+    if start > end:
+        raise ValueError('Дата начала позже даты окончания')
+    return start, end, granularity
@@ -0,0 +1,268 @@
+from datetime import timedelta
+from functools import cache
+
+from app import db
+from models import Car, Rental
+from timeseries import bucket_label, bucket_start, bucket_starts
+
+
+@cache
+def numpy_module():
+    """numpy, если установлен. Импорт при первом расчете, а не при старте воркера"""
+    try:
+        import numpy
+    except ImportError:
+        # numpy необязателен: без него тот же проход выполняется циклом по строкам
+        return None
+    return numpy
+
+
+# Загрузка автопарка за период.
+# Аренды всех автомобилей читаются одним запросом и переводятся в номера
+# дней от начала периода. Затем за один проход по отсортированным
+# интервалам перекрывающиеся и соседние аренды одного автомобиля
+# сливаются в отрезки занятости: из них получаются занятые дни, простои
+# между арендами и кривая загрузки парка (разностный массив по дням).
+# С numpy проход векторный, без него - цикл с тем же результатом.
+#
+# Автомобиль доступен с даты добавления (или первой аренды, если она
+# раньше) до конца периода. Отмененные аренды не учитываются.
+
+# Самый длинный период расчета: массивы проходов занимают по элементу на день
+MAX_SPAN_DAYS = 20 * 366
+
+
+def check_period(start, end, granularity):
+    """Проверяет период до расчета: порядок дат, длину и число точек кривой"""
+    if start > end:
+        raise ValueError('Дата начала позже даты окончания')
+    if (end - start).days + 1 > MAX_SPAN_DAYS:
+        raise ValueError(f'Период загрузки не может быть длиннее {MAX_SPAN_DAYS} дней')
+    bucket_starts(start, end, granularity)
+
+
+def load_rentals(start, end):
+    """Аренды, пересекающие период, отсортированные по автомобилю и началу"""
+    return db.session.query(Rental.car_id, Rental.start_date, Rental.end_date, Rental.daily_rate).filter(
+        Rental.status != 'cancelled',
+        Rental.start_date <= end,
+        Rental.end_date >= start
+    ).order_by(Rental.car_id, Rental.start_date).all()
+
+
+def load_fleet():
+    """Автомобили парка: все, кроме разобранных"""
+    return db.session.query(Car.id, Car.brand, Car.model, Car.created_at).filter(
+        Car.status != 'disassembled'
+    ).order_by(Car.id).all()
+
+
+def sweep_python(span, car_count, cars, starts, ends, available_from):
+    """Проход по интервалам циклом. Все даты - номера дней от начала периода,
+    интервалы отсортированы по автомобилю и началу.
+
+    Возвращает (занятые дни, самый длинный простой, число простоев) по
+    автомобилям и число занятых автомобилей по дням периода.
+    """
+    occupied = [0] * car_count
+    longest_gap = [0] * car_count
+    gap_count = [0] * car_count
+    last_end = [day - 1 for day in available_from]
+    diff = [0] * (span + 1)
+
+    def add_gap(car, gap):
+        if gap > 0:
+            gap_count[car] += 1
+            longest_gap[car] = max(longest_gap[car], gap)
+
+    def close(car, segment_start, segment_end):
+        add_gap(car, segment_start - last_end[car] - 1)
+        last_end[car] = segment_end
+        occupied[car] += segment_end - segment_start + 1
+        diff[segment_start] += 1
+        diff[segment_end + 1] -= 1
+
+    segment = None
+    for car, start, end in zip(cars, starts, ends):
+        if segment is not None and segment[0] == car and start <= segment[2] + 1:
+            segment[2] = max(segment[2], end)
+            continue
+        if segment is not None:
+            close(*segment)
+        segment = [car, start, end]
+    if segment is not None:
+        close(*segment)
+
+    # Простой после последней аренды (или весь период без аренд)
+    for car in range(car_count):
+        add_gap(car, span - 1 - last_end[car])
+
+    busy = []
+    running = 0
+    for value in diff[:span]:
+        running += value
+        busy.append(running)
+    return occupied, longest_gap, gap_count, busy
+
+
+def sweep_numpy(span, car_count, cars, starts, ends, available_from):
+    """То же, что sweep_python, векторно.
+
+    Номера дней каждого автомобиля сдвигаются на car * (span + 2), чтобы
+    накопленный максимум концов не переходил между автомобилями, - тогда
+    отрезки занятости всех автомобилей выделяются одним проходом.
+    """
+    np = numpy_module()
+    cars = np.asarray(cars, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    available_from = np.asarray(available_from, dtype=np.int64)
+    occupied = np.zeros(car_count, dtype=np.int64)
+    longest_gap = np.zeros(car_count, dtype=np.int64)
+    gap_count = np.zeros(car_count, dtype=np.int64)
+    diff = np.zeros(span + 1, dtype=np.int64)
+    last_end = available_from - 1
+
+    if len(cars):
+        offset = cars * (span + 2)
+        shifted_ends = np.maximum.accumulate(ends + offset)
+        previous = np.concatenate(([np.iinfo(np.int64).min // 2], shifted_ends[:-1]))
+        first = np.flatnonzero(starts + offset > previous + 1)
+
+        segment_car = cars[first]
+        segment_start = starts[first]
+        segment_end = np.maximum.reduceat(ends + offset, first) - offset[first]
+
+        occupied = np.bincount(segment_car, weights=segment_end - segment_start + 1,
+                               minlength=car_count).astype(np.int64)
+        np.add.at(diff, segment_start, 1)
+        np.add.at(diff, segment_end + 1, -1)
+
+        # Конец предыдущего отрезка того же автомобиля (для первого - день до доступности)
+        previous_end = np.concatenate(([0], segment_end[:-1]))
+        new_car = np.concatenate(([True], segment_car[1:] != segment_car[:-1]))
+        previous_end[new_car] = available_from[segment_car[new_car]] - 1
+        gaps = segment_start - previous_end - 1
+        has_gap = gaps > 0
+        np.add.at(gap_count, segment_car[has_gap], 1)
+        np.maximum.at(longest_gap, segment_car[has_gap], gaps[has_gap])
+
+        last = np.concatenate((segment_car[1:] != segment_car[:-1], [True]))
+        last_end[segment_car[last]] = segment_end[last]
+
+    tail = span - 1 - last_end
+    has_tail = tail > 0
+    gap_count[has_tail] += 1
+    longest_gap[has_tail] = np.maximum(longest_gap[has_tail], tail[has_tail])
+
+    busy = np.cumsum(diff[:span])
+    return occupied.tolist(), longest_gap.tolist(), gap_count.tolist(), busy.tolist()
+
+
+def fleet_utilization(start, end, granularity='month', use_numpy=None):
+    """Загрузка автопарка за период [start, end].
+
+    Возвращает словарь: fleet - итоги по парку, cars - показатели каждого
+    автомобиля, curve - доля занятых автомобилей по интервалам granularity.
+    """
+    check_period(start, end, granularity)
+    have_numpy = numpy_module() is not None
+    use_numpy = have_numpy if use_numpy is None else use_numpy and have_numpy
+    span = (end - start).days + 1
+
+    rentals = load_rentals(start, end)
+    fleet = load_fleet()
+    first_rental = {}
+    for car_id, rental_start, _, _ in rentals:
+        first_rental.setdefault(car_id, rental_start)
+
+    # Номера автомобилей 0..n-1 и день, с которого каждый доступен
+    index = {}
+    names = []
+    available_from = []
+    for car_id, brand, model, created_at in fleet:
+        added = created_at.date() if created_at else start
+        if car_id in first_rental:
+            added = min(added, first_rental[car_id])
+        if added > end:
+            continue
+        index[car_id] = len(names)
+        names.append((car_id, f'{brand} {model}'))
+        available_from.append(max((added - start).days, 0))
+
+    cars, starts, ends, revenue = [], [], [], [0] * len(names)
+    for car_id, rental_start, rental_end, daily_rate in rentals:
+        car = index.get(car_id)
+        if car is None:
+            continue
+        first_day = max((rental_start - start).days, 0)
+        last_day = min((rental_end - start).days, span - 1)
+        cars.append(car)
+        starts.append(first_day)
+        ends.append(last_day)
+        revenue[car] += (daily_rate or 0) * (last_day - first_day + 1)
+
+    sweep = sweep_numpy if use_numpy else sweep_python
+    occupied, longest_gap, gap_count, busy = sweep(span, len(names), cars, starts, ends, available_from)
+
+    # Размер парка по дням: автомобиль входит в парк с дня доступности
+    fleet_diff = [0] * (span + 1)
+    for day in available_from:
+        fleet_diff[day] += 1
+    fleet_size = []
+    running = 0
+    for value in fleet_diff[:span]:
+        running += value
+        fleet_size.append(running)
+
+    car_rows = []
+    for car, (car_id, name) in enumerate(names):
+        available = span - available_from[car]
+        car_rows.append({
+            'id': car_id,
+            'name': name,
+            'available_days': available,
+            'occupied_days': occupied[car],
+            'idle_days': available - occupied[car],
+            'occupancy': round(occupied[car] / available, 4) if available else 0,
+            'gaps': gap_count[car],
+            'longest_gap_days': longest_gap[car],
+            'revenue': round(revenue[car], 2),
+            'revenue_per_available_day': round(revenue[car] / available, 2) if available else 0,
+        })
+
+    available_total = sum(fleet_size)
+    occupied_total = sum(occupied)
+    revenue_total = sum(revenue)
+
+    curve = {'buckets': [], 'labels': [], 'occupancy': [], 'busy_car_days': [], 'available_car_days': []}
+    day = start
+    for number in range(span):
+        bucket = bucket_start(day, granularity)
+        if not curve['buckets'] or curve['buckets'][-1] != bucket.isoformat():
+            curve['buckets'].append(bucket.isoformat())
+            curve['labels'].append(bucket_label(bucket, granularity))
+            curve['busy_car_days'].append(0)
+            curve['available_car_days'].append(0)
+        curve['busy_car_days'][-1] += busy[number]
+        curve['available_car_days'][-1] += fleet_size[number]
+        day += timedelta(days=1)
+    # В интервале - средняя доля: занятые автомобиле-дни к доступным
+    curve['occupancy'] = [round(busy_days / size, 4) if size else 0
+                          for busy_days, size in zip(curve['busy_car_days'], curve['available_car_days'])]
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'granularity': granularity,
+        'fleet': {
+            'cars': len(names),
+            'available_days': available_total,
+            'occupied_days': occupied_total,
+            'idle_days': available_total - occupied_total,
+            'occupancy': round(occupied_total / available_total, 4) if available_total else 0,
+            'revenue': round(revenue_total, 2),
+            'revenue_per_available_day': round(revenue_total / available_total, 2) if available_total else 0,
+        },
+        'cars': car_rows,
+        'curve': curve,
+    }
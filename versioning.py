@@ -0,0 +1,35 @@
+from app import db
+from models import DataVersion
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+DATA_VERSION_ID = 1
+
+
+def bump_data_version():
+    """Увеличивает версию данных в рамках текущей транзакции.
+
+    Вызывается маршрутами, которые меняют данные, перед коммитом: кэши,
+    привязанные к версии (отчеты, ответы API), после этого считаются устаревшими.
+    """
+    result = db.session.execute(
+        update(DataVersion).where(DataVersion.id == DATA_VERSION_ID)
+        .values(version=DataVersion.version + 1)
+    )
+    if result.rowcount:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(DataVersion(id=DATA_VERSION_ID, version=1))
+    except IntegrityError:
+        db.session.execute(
+            update(DataVersion).where(DataVersion.id == DATA_VERSION_ID)
+            .values(version=DataVersion.version + 1)
+        )
+
+
+def current_data_version():
+    """Текущая версия данных (0, если записей еще не было)"""
+    version = db.session.query(DataVersion.version).filter(DataVersion.id == DATA_VERSION_ID).scalar()
+    return version or 0
@@ -0,0 +1,19 @@
+from views import analytics, api, dashboard, disassembly, garage, metrics, parts, rent
+
+# Маршруты приложения по модулям. Имена адресов - с именем модуля:
+# url_for('garage.car_detail', car_id=...), url_for('parts.parts')
+BLUEPRINTS = (
+    dashboard.bp,
+    garage.bp,
+    rent.bp,
+    disassembly.bp,
+    parts.bp,
+    analytics.bp,
+    api.bp,
+    metrics.bp,
+)
+
+
+def register_blueprints(app):
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
@@ -0,0 +1,133 @@
+import re
+from datetime import date
+
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, abort,
+                   Response, stream_with_context)
+
+from ledger import expense_categories as ledger_expense_categories
+from query_budget import query_budget
+from replica import read_replica
+from reports import REPORT_TYPES, report_pipeline
+from exports import DATASETS, FORMATS, GENERATORS, parse_filters, export_statement, export_filename
+from timeseries import GRANULARITY_NAMES, default_range, parse_range_params, range_series
+
+# Модуль Аналитика: графики, PDF-отчеты и выгрузки
+bp = Blueprint('analytics', __name__)
+
+# Ключ отчета в кэше - sha256 в hex
+REPORT_KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+@bp.route('/analytics')
+@read_replica
+@query_budget(4)
+def analytics():
+    """Страница модуля Аналитика"""
+    # Период и шаг графиков из параметров (по умолчанию - 12 месяцев помесячно);
+    # на каждый источник один сгруппированный запрос, пустые интервалы - нули
+    try:
+        start, end, granularity = parse_range_params(request.args)
+        series = range_series(start, end, granularity)
+    except ValueError as e:
+        flash(str(e), 'error')
+        start, end = default_range()
+        granularity = 'month'
+        series = range_series(start, end, granularity)
+    
+    # Статистика по категориям расходов
+    expense_categories = ledger_expense_categories()
+    
+    return render_template('analytics.html',
+                         months=series['labels'],
+                         income_data=series['income'],
+                         expense_data=series['expenses'],
+                         profit_data=series['profit'],
+                         expense_categories=expense_categories,
+                         granularity=granularity,
+                         granularities=GRANULARITY_NAMES,
+                         period_start=start.isoformat(),
+                         period_end=end.isoformat())
+
+
+@bp.route('/analytics/export_pdf')
+@read_replica
+def export_pdf():
+    """Экспорт отчета в PDF: готовый отчет отдается из кэша, иначе ставится в очередь"""
+    try:
+        key = report_pipeline.request('dashboard', {'date': date.today().isoformat()})
+        if report_pipeline.status(key)['status'] == 'ready':
+            return send_report(key)
+        flash('Отчет формируется, повторите скачивание через несколько секунд', 'success')
+    except Exception as e:
+        flash(f'Ошибка при создании PDF: {str(e)}', 'error')
+    
+    return redirect(url_for('analytics.analytics'))
+
+
+def report_status_payload(key):
+    """Ответ API о состоянии отчета"""
+    payload = dict(report_pipeline.status(key), key=key,
+                   status_url=url_for('analytics.report_status', key=key))
+    if payload['status'] == 'ready':
+        payload['download_url'] = url_for('analytics.download_report', key=key)
+    return payload
+
+
+def send_report(key):
+    """Отдает готовый отчет из кэша"""
+    return send_file(report_pipeline.pdf_path(key), mimetype='application/pdf', as_attachment=True,
+                     download_name=report_pipeline.download_name(key))
+
+
+@bp.route('/analytics/reports', methods=['POST'])
+@read_replica
+def request_report():
+    """API: поставить отчет в очередь (или найти готовый в кэше)"""
+    kind = request.form.get('kind', 'dashboard')
+    try:
+        if kind not in REPORT_TYPES:
+            raise ValueError(f'Неизвестный вид отчета: {kind}')
+        key = report_pipeline.request(kind, REPORT_TYPES[kind]['params'](request.form))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify(report_status_payload(key)), 202
+
+
+@bp.route('/analytics/reports/<key>')
+def report_status(key):
+    """API: состояние отчета для опроса со страницы"""
+    if not REPORT_KEY_PATTERN.fullmatch(key):
+        abort(404)
+    payload = report_status_payload(key)
+    return jsonify(payload), 404 if payload['status'] == 'unknown' else 200
+
+
+@bp.route('/analytics/reports/<key>/download')
+def download_report(key):
+    """Скачивание готового отчета из кэша"""
+    if not REPORT_KEY_PATTERN.fullmatch(key) or report_pipeline.status(key)['status'] != 'ready':
+        abort(404)
+    return send_report(key)
+
+
+@bp.route('/export', defaults={'dataset': None})
+@bp.route('/export/<dataset>')
+@read_replica
+def export_data(dataset):
+    """Потоковая выгрузка таблицы в CSV или JSON Lines с фильтрами по периоду, автомобилю и поставщику"""
+    dataset = dataset or request.args.get('dataset')
+    fmt = request.args.get('format', 'csv')
+    if dataset not in DATASETS or fmt not in FORMATS:
+        abort(404)
+    
+    try:
+        filters = parse_filters(request.args)
+        statement = export_statement(dataset, filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Строки читаются из базы и отдаются клиенту по мере выборки
+    response = Response(stream_with_context(GENERATORS[fmt](dataset, statement)), content_type=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={export_filename(dataset, fmt, filters)}'
+    return response
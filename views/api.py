@@ -0,0 +1,213 @@
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify, abort
+
+from app import db
+from models import Car, Part, loader_options
+from availability import availability_index
+from search import search_parts
+from pagination import paginate_keyset, page_size_arg
+from query_budget import query_budget
+from replica import read_replica
+from inventory import StockError, place_hold, release_hold
+from timeseries import bucket_starts, parse_range_params, range_series
+from utilization import check_period, fleet_utilization
+from api_payloads import (conditional_json, dashboard_kpis, monthly_series, months_arg, expense_category_totals,
+                 car_summaries, part_payload)
+
+# JSON API: резервы запчастей, занятость автомобилей и /api/v1
+bp = Blueprint('api', __name__)
+
+# Сколько автомобилей отдает /api/v1/utilization/cars по умолчанию и максимум
+UTILIZATION_CARS_SHOWN = 20
+UTILIZATION_CARS_MAX = 5000
+
+
+@bp.route('/api/parts/<int:part_id>/hold', methods=['POST'])
+def hold_part(part_id):
+    """API: зарезервировать запчасть на время оформления продажи (или продлить резерв)"""
+    try:
+        hold, available = place_hold(part_id, request.form.get('quantity', 1, type=int),
+                                     request.form.get('token'))
+        db.session.commit()
+    except StockError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    
+    return jsonify({'token': hold.token, 'quantity': hold.quantity,
+                    'expires_at': hold.expires_at.isoformat(), 'available': available})
+
+
+@bp.route('/api/parts/holds/<token>/release', methods=['POST'])
+def release_part_hold(token):
+    """API: снять резерв, если продажа отменена"""
+    release_hold(token)
+    db.session.commit()
+    return jsonify({'released': True})
+
+
+@bp.route('/api/car_availability/<int:car_id>')
+def car_availability(car_id):
+    """API для проверки доступности автомобиля"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    if not start_date or not end_date:
+        return jsonify({'available': False, 'message': 'Не указаны даты'})
+    
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        
+        # Проверяем пересечения с активными арендами по индексу занятости
+        available = availability_index.is_available(car_id, start, end)
+        message = 'Автомобиль доступен' if available else 'Автомобиль занят в указанные даты'
+        
+        return jsonify({'available': available, 'message': message})
+        
+    except Exception as e:
+        return jsonify({'available': False, 'message': f'Ошибка: {str(e)}'})
+
+
+@bp.route('/api/available_cars')
+def available_cars():
+    """API: все автомобили, свободные в указанный период, одним запросом"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    if not start_date or not end_date:
+        return jsonify({'cars': [], 'message': 'Не указаны даты'})
+    
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        
+        cars = db.session.query(Car.id, Car.brand, Car.model, Car.year).filter(
+            Car.status != 'disassembled'
+        ).order_by(Car.id).all()
+        free_ids = set(availability_index.free_cars([car.id for car in cars], start, end))
+        
+        return jsonify({'cars': [
+            {'id': car.id, 'brand': car.brand, 'model': car.model, 'year': car.year}
+            for car in cars if car.id in free_ids
+        ]})
+        
+    except Exception as e:
+        return jsonify({'cars': [], 'message': f'Ошибка: {str(e)}'})
+
+
+@bp.route('/api/v1/dashboard')
+@read_replica
+@query_budget(6)
+def api_dashboard():
+    """API: показатели главной страницы"""
+    return conditional_json(lambda: dashboard_kpis(use_cache=False))
+
+
+@bp.route('/api/v1/analytics/monthly')
+@read_replica
+@query_budget(2)
+def api_monthly():
+    """API: доходы, расходы и прибыль по месяцам (параметр months, по умолчанию 12)"""
+    count = months_arg()
+    return conditional_json(lambda: {'series': monthly_series(count)})
+
+
+@bp.route('/api/v1/analytics/series')
+@read_replica
+@query_budget(4)
+def api_series():
+    """API: доходы, расходы и прибыль за период (start_date, end_date) с шагом granularity"""
+    try:
+        start, end, granularity = parse_range_params(request.args)
+        # Проверка числа интервалов до ответа, чтобы ошибка пришла как 400
+        bucket_starts(start, end, granularity)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return conditional_json(lambda: {'granularity': granularity, 'series': range_series(start, end, granularity)})
+
+
+@bp.route('/api/v1/utilization')
+@read_replica
+@query_budget(3)
+def api_utilization():
+    """API: загрузка автопарка за период - итоги и кривая занятости с шагом granularity"""
+    try:
+        start, end, granularity = parse_range_params(request.args)
+        check_period(start, end, granularity)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def build():
+        report = fleet_utilization(start, end, granularity)
+        return {key: report[key] for key in ('start', 'end', 'granularity', 'fleet', 'curve')}
+    return conditional_json(build)
+
+
+@bp.route('/api/v1/utilization/cars')
+@read_replica
+@query_budget(3)
+def api_utilization_cars():
+    """API: загрузка каждого автомобиля за период, сначала самые простаивающие (limit - сколько вернуть)"""
+    try:
+        start, end, granularity = parse_range_params(request.args)
+        check_period(start, end, granularity)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = max(1, min(request.args.get('limit', UTILIZATION_CARS_SHOWN, type=int), UTILIZATION_CARS_MAX))
+    
+    def build():
+        cars = fleet_utilization(start, end, granularity)['cars']
+        cars.sort(key=lambda car: (car['occupancy'], car['id']))
+        return {'start': start.isoformat(), 'end': end.isoformat(), 'total': len(cars), 'cars': cars[:limit]}
+    return conditional_json(build)
+
+
+@bp.route('/api/v1/analytics/expense-categories')
+@read_replica
+@query_budget(2)
+def api_expense_categories():
+    """API: расходы по категориям за все время"""
+    return conditional_json(lambda: {'categories': expense_category_totals()})
+
+
+@bp.route('/api/v1/cars')
+@read_replica
+@query_budget(2)
+def api_cars():
+    """API: финансовые итоги по всем автомобилям"""
+    return conditional_json(lambda: {'cars': car_summaries()})
+
+
+@bp.route('/api/v1/cars/<int:car_id>')
+@read_replica
+@query_budget(2)
+def api_car(car_id):
+    """API: финансовые итоги одного автомобиля"""
+    def build():
+        summaries = car_summaries(car_id)
+        if not summaries:
+            abort(404)
+        return summaries[0]
+    return conditional_json(build)
+
+
+@bp.route('/api/v1/parts')
+@read_replica
+@query_budget(3)
+def api_parts():
+    """API: поиск запчастей (search, supplier_id) постранично по курсору"""
+    def build():
+        parts_query = Part.query
+        order_columns = [Part.created_at, Part.id]
+        search = request.args.get('search', '')
+        if search:
+            parts_query, rank = search_parts(parts_query, search)
+            if rank is not None:
+                order_columns.insert(0, rank)
+        if request.args.get('supplier_id'):
+            parts_query = parts_query.filter(Part.supplier_id == request.args.get('supplier_id'))
+        page = paginate_keyset(parts_query.options(*loader_options('parts')), order_columns,
+                               request.args.get('cursor'), page_size_arg())
+        return {'parts': [part_payload(part) for part in page.items], 'next_cursor': page.next_cursor}
+    return conditional_json(build)
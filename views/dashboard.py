@@ -0,0 +1,23 @@
+from flask import Blueprint, render_template
+
+from api_payloads import dashboard_kpis
+from query_budget import query_budget
+
+# Главная страница с показателями дашборда
+bp = Blueprint('dashboard', __name__)
+
+
+@bp.route('/')
+@query_budget(6)
+def index():
+    """Главная страница с общей статистикой"""
+    # Основная статистика для дашборда (из кэша, при промахе - из базы)
+    kpis = dashboard_kpis()
+    
+    return render_template('index.html',
+                         total_cars=kpis['total_cars'],
+                         active_rentals=kpis['active_rentals'],
+                         total_parts=kpis['total_parts'],
+                         monthly_income=kpis['monthly_income'],
+                         monthly_expenses=kpis['monthly_expenses'],
+                         monthly_profit=kpis['monthly_profit'])
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+
+from app import db
+from models import DisassemblyRecord, Supplier, Part, loader_options
+from search import index_part
+from pagination import paginate_keyset, page_size_arg
+from query_budget import query_budget
+from versioning import bump_data_version
+from kpi_cache import kpi_cache, METRIC_TOTAL_PARTS
+from money import parse_money
+
+# Модуль Разборка: разобранные автомобили и снятые с них запчасти
+bp = Blueprint('disassembly', __name__)
+
+
+@bp.route('/disassembly')
+@query_budget(4)
+def disassembly():
+    """Страница модуля Разборка"""
+    records = paginate_keyset(DisassemblyRecord.query.options(*loader_options('disassembly')),
+                              [DisassemblyRecord.created_at, DisassemblyRecord.id],
+                              request.args.get('cursor'), page_size_arg())
+    suppliers = Supplier.query.all()
+    
+    return render_template('disassembly.html', records=records, suppliers=suppliers)
+
+
+@bp.route('/disassembly/add_record', methods=['POST'])
+def add_disassembly_record():
+    """Добавление записи о разборке"""
+    try:
+        record = DisassemblyRecord(
+            car_brand=request.form['car_brand'],
+            car_model=request.form['car_model'],
+            car_year=int(request.form['car_year']),
+            vin=request.form.get('vin') or None,
+            description=request.form.get('description', ''),
+            disassembly_date=datetime.strptime(request.form['disassembly_date'], '%Y-%m-%d').date()
+        )
+        db.session.add(record)
+        bump_data_version()
+        db.session.commit()
+        flash('Запись о разборке успешно добавлена!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при добавлении записи: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('disassembly.disassembly'))
+
+
+@bp.route('/disassembly/add_part', methods=['POST'])
+def add_part_from_disassembly():
+    """Добавление запчасти с разборки"""
+    try:
+        part = Part(
+            name=request.form['name'],
+            code=request.form.get('code'),
+            quantity=int(request.form['quantity']),
+            price=parse_money(request.form['price']),
+            disassembly_record_id=int(request.form['disassembly_record_id']),
+            description=request.form.get('description', ''),
+            location=request.form.get('location', '')
+        )
+        db.session.add(part)
+        index_part(part)
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_TOTAL_PARTS)
+        flash('Запчасть успешно добавлена в склад!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при добавлении запчасти: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('disassembly.disassembly'))
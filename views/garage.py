@@ -0,0 +1,111 @@
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+
+from app import db
+from models import Car, Expense, Rental, loader_options
+from queries import garage_financial_summary
+from ledger import record_entry, SOURCE_EXPENSE
+from car_totals import car_totals, record_car_expense
+from query_budget import query_budget
+from replica import read_replica
+from versioning import bump_data_version
+from kpi_cache import kpi_cache, METRIC_ACTIVE_CARS, METRIC_MONTH_SUMMARY
+from money import parse_money
+
+# Модуль Гараж: автомобили и расходы по ним
+bp = Blueprint('garage', __name__)
+
+
+@bp.route('/garage')
+@read_replica
+@query_budget(2)
+def garage():
+    """Страница модуля Гараж - показывает только список автомобилей"""
+    # Финансы по автомобилям считаются агрегатами в SQL, без ленивой загрузки связей
+    cars = garage_financial_summary()
+    
+    return render_template('garage.html', cars=cars)
+
+
+@bp.route('/garage/add_car', methods=['POST'])
+def add_car():
+    """Добавление нового автомобиля"""
+    try:
+        car = Car(
+            brand=request.form['brand'],
+            model=request.form['model'],
+            year=int(request.form['year']),
+            purchase_price=parse_money(request.form.get('purchase_price'), default=0),
+            vin=request.form.get('vin') or None,
+            description=request.form.get('description', '')
+        )
+        db.session.add(car)
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_ACTIVE_CARS)
+        flash('Автомобиль успешно добавлен!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при добавлении автомобиля: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('garage.garage'))
+
+
+@bp.route('/garage/car/<int:car_id>')
+@read_replica
+@query_budget(5)
+def car_detail(car_id):
+    """Детальная информация об автомобиле"""
+    car = Car.query.get_or_404(car_id)
+    
+    # Получение всех расходов для данного автомобиля
+    expenses = Expense.query.filter_by(car_id=car_id).order_by(Expense.date.desc()).all()
+    
+    # Получение всех аренд для данного автомобиля
+    rentals = Rental.query.options(*loader_options('car_rentals')) \
+        .filter_by(car_id=car_id).order_by(Rental.created_at.desc()).all()
+    
+    # Финансовые показатели - накопленные итоги автомобиля, без суммирования истории
+    totals = car_totals(car_id)
+    
+    return render_template('car_detail.html', 
+                         car=car, 
+                         expenses=expenses,
+                         rentals=rentals,
+                         totals=totals,
+                         total_expenses=totals.total_expenses,
+                         total_income=totals.total_income)
+
+
+@bp.route('/garage/add_expense', methods=['POST'])
+def add_expense():
+    """Добавление расхода"""
+    try:
+        car_id = int(request.form['car_id'])
+        expense = Expense(
+            car_id=car_id,
+            date=datetime.strptime(request.form['date'], '%Y-%m-%d').date(),
+            amount=parse_money(request.form['amount']),
+            category=request.form['category'],
+            description=request.form.get('description', '')
+        )
+        db.session.add(expense)
+        record_entry(expense.date, SOURCE_EXPENSE, expense.amount, expense.category)
+        record_car_expense(expense)
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_MONTH_SUMMARY, month=expense.date.replace(day=1))
+        flash('Расход успешно добавлен!', 'success')
+        
+        # Проверяем, откуда был сделан запрос - из детальной страницы или из гаража
+        referer = request.headers.get('Referer', '')
+        if f'/garage/car/{car_id}' in referer:
+            return redirect(url_for('garage.car_detail', car_id=car_id))
+        else:
+            return redirect(url_for('garage.garage'))
+            
+    except Exception as e:
+        flash(f'Ошибка при добавлении расхода: {str(e)}', 'error')
+        db.session.rollback()
+        return redirect(url_for('garage.garage'))
@@ -0,0 +1,31 @@
+import hmac
+
+from flask import Blueprint, current_app, request, jsonify, abort, Response
+
+from instrumentation import request_metrics
+
+# Метрики процесса и журнал медленных запросов (см. instrumentation.py)
+bp = Blueprint('metrics', __name__)
+
+
+def check_metrics_access():
+    """Метрики доступны, только если профилирование включено и (при METRICS_TOKEN) передан токен"""
+    if not current_app.config['INSTRUMENTATION_ENABLED']:
+        abort(404)
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(403)
+
+
+@bp.route('/metrics')
+def metrics():
+    """Метрики процесса в текстовом формате Prometheus"""
+    check_metrics_access()
+    return Response(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@bp.route('/metrics/slow')
+def slow_requests():
+    """Журнал последних медленных запросов: время SQL и шаблонов, самые медленные и повторяющиеся запросы"""
+    check_metrics_access()
+    return jsonify({'threshold_ms': current_app.config['SLOW_REQUEST_MS'], 'requests': request_metrics.slow()})
@@ -0,0 +1,201 @@
+from datetime import datetime
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+
+from app import db
+from models import Supplier, Part, Sale, loader_options
+from queries import parts_stock_summary
+from ledger import record_entry, SOURCE_PARTS
+from search import index_part, search_parts
+from pagination import paginate_keyset, page_size_arg
+from query_budget import query_budget
+from versioning import bump_data_version
+from parts_import import import_parts
+from inventory import StockError, take_stock
+from orders import parse_order_lines, create_order
+from kpi_cache import kpi_cache, METRIC_TOTAL_PARTS, METRIC_MONTH_SUMMARY
+from money import parse_money
+
+# Модуль Учет запчастей: склад, поставщики, продажи и импорт
+bp = Blueprint('parts', __name__)
+
+# Сколько ошибок импорта показывать на странице (полный список - в CLI)
+IMPORT_ERRORS_SHOWN = 10
+
+
+@bp.route('/parts')
+@query_budget(4)
+def parts():
+    """Страница модуля Учет запчастей"""
+    # Фильтры поиска
+    search = request.args.get('search', '')
+    supplier_id = request.args.get('supplier_id')
+    
+    # Базовый запрос
+    parts_query = Part.query
+    
+    # Применяем фильтры (при поиске сначала идут самые релевантные)
+    order_columns = [Part.created_at, Part.id]
+    if search:
+        parts_query, rank = search_parts(parts_query, search)
+        if rank is not None:
+            order_columns.insert(0, rank)
+    
+    if supplier_id:
+        parts_query = parts_query.filter(Part.supplier_id == supplier_id)
+    
+    # Итоги по складу считаются в SQL по всей выборке, список - постранично
+    stock = parts_stock_summary(parts_query)
+    parts = paginate_keyset(parts_query.options(*loader_options('parts')), order_columns,
+                            request.args.get('cursor'), page_size_arg())
+    suppliers = Supplier.query.all()
+    
+    return render_template('parts.html', parts=parts, stock=stock, suppliers=suppliers)
+
+
+@bp.route('/parts/add_supplier', methods=['POST'])
+def add_supplier():
+    """Добавление нового поставщика"""
+    try:
+        supplier = Supplier(
+            name=request.form['name'],
+            contact_person=request.form.get('contact_person', ''),
+            phone=request.form.get('phone', ''),
+            email=request.form.get('email', ''),
+            address=request.form.get('address', '')
+        )
+        db.session.add(supplier)
+        bump_data_version()
+        db.session.commit()
+        flash('Поставщик успешно добавлен!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при добавлении поставщика: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('parts.parts'))
+
+
+@bp.route('/parts/add_part', methods=['POST'])
+def add_part():
+    """Добавление новой запчасти"""
+    try:
+        part = Part(
+            name=request.form['name'],
+            code=request.form.get('code'),
+            quantity=int(request.form['quantity']),
+            price=parse_money(request.form['price']),
+            supplier_id=int(request.form['supplier_id']) if request.form.get('supplier_id') else None,
+            description=request.form.get('description', ''),
+            location=request.form.get('location', '')
+        )
+        db.session.add(part)
+        index_part(part)
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_TOTAL_PARTS)
+        flash('Запчасть успешно добавлена!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при добавлении запчасти: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('parts.parts'))
+
+
+@bp.route('/parts/import', methods=['POST'])
+def import_parts_file():
+    """Пакетный импорт запчастей из CSV/XLSX от поставщика или с разборки"""
+    disassembly_record_id = request.form.get('disassembly_record_id', type=int)
+    supplier_id = request.form.get('supplier_id', type=int)
+    target = 'disassembly.disassembly' if disassembly_record_id else 'parts.parts'
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Выберите файл для импорта', 'error')
+        return redirect(url_for(target))
+    
+    try:
+        result = import_parts(upload.stream, upload.filename,
+                              supplier_id=supplier_id,
+                              disassembly_record_id=disassembly_record_id,
+                              update_existing=bool(request.form.get('update_existing')),
+                              batch_size=current_app.config['IMPORT_BATCH_SIZE'])
+    except Exception as e:
+        flash(f'Ошибка при импорте запчастей: {str(e)}', 'error')
+        db.session.rollback()
+        return redirect(url_for(target))
+    
+    flash(f'Импорт завершен: {result.summary}', 'success')
+    for line, message in result.errors[:IMPORT_ERRORS_SHOWN]:
+        flash(f'Строка {line}: {message}' if line else message, 'error')
+    if len(result.errors) > IMPORT_ERRORS_SHOWN:
+        flash(f'...и еще {len(result.errors) - IMPORT_ERRORS_SHOWN} ошибок', 'error')
+    
+    return redirect(url_for(target))
+
+
+@bp.route('/parts/sale', methods=['POST'])
+def sell_part():
+    """Продажа запчасти"""
+    try:
+        part_id = int(request.form['part_id'])
+        quantity_sold = int(request.form['quantity_sold'])
+        sale_price = parse_money(request.form['sale_price'])
+        
+        # Списываем со склада атомарно: проверка остатка и уменьшение - один
+        # условный UPDATE, резерв продавца (если был) снимается
+        take_stock(part_id, quantity_sold, request.form.get('hold_token'))
+        
+        # Создаем запись о продаже
+        sale = Sale(
+            part_id=part_id,
+            quantity_sold=quantity_sold,
+            sale_price=sale_price,
+            total_amount=quantity_sold * sale_price,
+            sale_date=datetime.strptime(request.form['sale_date'], '%Y-%m-%d').date(),
+            customer_name=request.form.get('customer_name', ''),
+            description=request.form.get('description', '')
+        )
+        
+        db.session.add(sale)
+        record_entry(sale.sale_date, SOURCE_PARTS, sale.total_amount)
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_TOTAL_PARTS)
+        kpi_cache.invalidate(METRIC_MONTH_SUMMARY, month=sale.sale_date.replace(day=1))
+        flash('Продажа успешно оформлена!', 'success')
+    except StockError as e:
+        flash(str(e), 'error')
+        db.session.rollback()
+    except Exception as e:
+        flash(f'Ошибка при оформлении продажи: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('parts.parts'))
+
+
+@bp.route('/parts/order', methods=['POST'])
+def create_sales_order():
+    """Продажа нескольких запчастей одним заказом"""
+    try:
+        lines = parse_order_lines(request.form)
+        order_date = datetime.strptime(request.form['sale_date'], '%Y-%m-%d').date()
+        
+        # Склад, строки и суммы - пакетными запросами, одна фиксация на весь заказ
+        order, total = create_order(lines, order_date,
+                                    customer_name=request.form.get('customer_name', ''),
+                                    description=request.form.get('description', ''),
+                                    hold_tokens=request.form.getlist('hold_token'))
+        order_id = order.id
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_TOTAL_PARTS)
+        kpi_cache.invalidate(METRIC_MONTH_SUMMARY, month=order_date.replace(day=1))
+        flash(f'Заказ №{order_id} оформлен: {len(lines)} поз. на сумму {total:.2f} ₽', 'success')
+    except StockError as e:
+        flash(str(e), 'error')
+        db.session.rollback()
+    except Exception as e:
+        flash(f'Ошибка при оформлении заказа: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('parts.parts'))
@@ -0,0 +1,150 @@
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+
+from app import db
+from models import Car, Client, Rental, Payment, loader_options
+from ledger import record_entry, SOURCE_RENTAL
+from availability import availability_index, lock_car, rental_overlaps
+from car_totals import record_car_rental, record_car_payment
+from rentals import record_rental_payment
+from pagination import paginate_keyset, page_size_arg
+from query_budget import query_budget
+from versioning import bump_data_version
+from kpi_cache import kpi_cache, METRIC_ACTIVE_CARS, METRIC_ACTIVE_RENTALS, METRIC_MONTH_SUMMARY
+from money import parse_money
+
+# Модуль Аренда: клиенты, контракты и платежи
+bp = Blueprint('rent', __name__)
+
+
+@bp.route('/rent')
+@query_budget(7)
+def rent():
+    """Страница модуля Аренда"""
+    clients = Client.query.all()
+    cars = Car.query.filter_by(status='active').all()
+    active_rentals = Rental.query.options(*loader_options('rent_active')) \
+        .filter_by(status='active').order_by(Rental.created_at.desc()).all()
+    
+    # История аренд выводится постранично
+    rentals = paginate_keyset(Rental.query.options(*loader_options('rent_history')), [Rental.created_at, Rental.id],
+                              request.args.get('cursor'), page_size_arg())
+    
+    return render_template('rent.html', clients=clients, cars=cars,
+                         active_rentals=active_rentals, rentals=rentals)
+
+
+@bp.route('/rent/add_client', methods=['POST'])
+def add_client():
+    """Добавление нового клиента"""
+    try:
+        client = Client(
+            name=request.form['name'],
+            phone=request.form.get('phone', ''),
+            email=request.form.get('email', '')
+        )
+        db.session.add(client)
+        bump_data_version()
+        db.session.commit()
+        flash('Клиент успешно добавлен!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при добавлении клиента: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('rent.rent'))
+
+
+@bp.route('/rent/add_rental', methods=['POST'])
+def add_rental():
+    """Создание нового контракта аренды"""
+    try:
+        start_date = datetime.strptime(request.form['start_date'], '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.form['end_date'], '%Y-%m-%d').date()
+        daily_rate = parse_money(request.form['daily_rate'])
+        days = (end_date - start_date).days + 1
+        total_amount = daily_rate * days
+        
+        rental = Rental(
+            car_id=int(request.form['car_id']),
+            client_id=int(request.form['client_id']),
+            start_date=start_date,
+            end_date=end_date,
+            daily_rate=daily_rate,
+            total_amount=total_amount,
+            balance_due=total_amount
+        )
+        
+        # Аренды одного автомобиля создаются по очереди: строка автомобиля
+        # заблокирована до коммита. Пересечение проверяется в базе - индекс
+        # занятости воркера может не знать об арендах из других процессов
+        if not lock_car(rental.car_id):
+            raise ValueError('Автомобиль не найден')
+        if rental_overlaps(rental.car_id, start_date, end_date):
+            availability_index.invalidate()
+            raise ValueError('Автомобиль уже арендован на эти даты')
+
+        # Обновляем статус автомобиля
+        car = Car.query.get(rental.car_id)
+        car.status = 'rented'
+        
+        db.session.add(rental)
+        record_car_rental(rental)
+        bump_data_version()
+        db.session.commit()
+        availability_index.add(rental.car_id, rental.start_date, rental.end_date, rental.id)
+        kpi_cache.invalidate(METRIC_ACTIVE_CARS, METRIC_ACTIVE_RENTALS)
+        flash('Контракт аренды успешно создан!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при создании контракта: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('rent.rent'))
+
+
+@bp.route('/rent/add_payment', methods=['POST'])
+def add_payment():
+    """Добавление платежа по аренде"""
+    try:
+        payment = Payment(
+            rental_id=int(request.form['rental_id']),
+            amount=parse_money(request.form['amount']),
+            payment_date=datetime.strptime(request.form['payment_date'], '%Y-%m-%d').date(),
+            description=request.form.get('description', '')
+        )
+        db.session.add(payment)
+        record_entry(payment.payment_date, SOURCE_RENTAL, payment.amount)
+        record_car_payment(payment)
+        record_rental_payment(payment)
+        bump_data_version()
+        db.session.commit()
+        kpi_cache.invalidate(METRIC_MONTH_SUMMARY, month=payment.payment_date.replace(day=1))
+        flash('Платеж успешно добавлен!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при добавлении платежа: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('rent.rent'))
+
+
+@bp.route('/rent/complete/<int:rental_id>')
+def complete_rental(rental_id):
+    """Завершение аренды"""
+    try:
+        rental = Rental.query.get_or_404(rental_id)
+        rental.status = 'completed'
+        
+        # Возвращаем статус автомобиля
+        car = Car.query.get(rental.car_id)
+        car.status = 'active'
+        
+        bump_data_version()
+        db.session.commit()
+        availability_index.remove(rental.car_id, rental.id)
+        kpi_cache.invalidate(METRIC_ACTIVE_CARS, METRIC_ACTIVE_RENTALS)
+        flash('Аренда успешно завершена!', 'success')
+    except Exception as e:
+        flash(f'Ошибка при завершении аренды: {str(e)}', 'error')
+        db.session.rollback()
+    
+    return redirect(url_for('rent.rent'))